@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalSuppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(max_length=100, verbose_name='Modèle')),
+                ('objet_id', models.CharField(max_length=64, verbose_name='Identifiant')),
+                ('date_suppression', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Supprimé le')),
+            ],
+            options={
+                'verbose_name': 'Suppression journalisée',
+                'verbose_name_plural': 'Suppressions journalisées',
+                'ordering': ['date_suppression', 'id'],
+            },
+        ),
+    ]
@@ -104,4 +104,67 @@ class TimeStampedModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
     class Meta:
         abstract = True
+
+
+class EtatInitialMixin:
+    """
+    Mémorise les valeurs lues en base (from_db) : l'état précédent d'une
+    instance est connu au moment du save(), sans relire sa ligne
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._etat_initial = dict(zip(field_names, values))
+        return instance
+
+    def valeurs_chargees(self):
+        return {
+            champ.attname: self.__dict__[champ.attname]
+            for champ in self._meta.concrete_fields
+            if champ.attname in self.__dict__
+        }
+
+    def etat_initial(self):
+        """
+        Copie non sauvegardée de l'instance dans son état lu en base (None
+        pour une instance créée en mémoire). Les objets liés en cache dont
+        la clé n'a pas changé sont repris, sans requête.
+        """
+        initiales = getattr(self, '_etat_initial', None)
+        if initiales is None:
+            return None
+        ancien = self.__class__(**{**self.valeurs_chargees(), **initiales})
+        for champ in self._meta.concrete_fields:
+            if (
+                champ.is_relation and champ.is_cached(self)
+                and getattr(ancien, champ.attname) == getattr(self, champ.attname)
+            ):
+                champ.set_cached_value(ancien, champ.get_cached_value(self))
+        return ancien
+
+    def memoriser_etat_initial(self):
+        """L'état courant devient l'état de référence (après un save())"""
+        self._etat_initial = self.valeurs_chargees()
     
+
+
+class JournalSuppression(models.Model):
+    """
+    Trace des objets supprimés, alimentée par un signal post_delete
+
+    Utilisée par les sauvegardes incrémentales (scripts/backup.py) pour
+    rejouer les suppressions survenues depuis la sauvegarde précédente.
+    """
+
+    modele = models.CharField(max_length=100, verbose_name="Modèle")
+    objet_id = models.CharField(max_length=64, verbose_name="Identifiant")
+    date_suppression = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Supprimé le")
+
+    class Meta:
+        verbose_name = "Suppression journalisée"
+        verbose_name_plural = "Suppressions journalisées"
+        ordering = ['date_suppression', 'id']
+
+    def __str__(self):
+        return f"{self.modele} #{self.objet_id}"
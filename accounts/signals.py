@@ -0,0 +1,73 @@
+# accounts/signals.py
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from .models import JournalSuppression
+from .utils import MODELES_DERIVES, get_project_models
+
+
+# Suppressions à journaliser à la validation de la transaction courante : [(modèle, pk)]
+_en_attente = threading.local()
+
+
+def journaliser_suppression(sender, instance, **kwargs):
+    """
+    Note la suppression d'un objet ; le journal est écrit au commit
+
+    Une suppression en cascade de N objets donne une seule insertion
+    (bulk_create) au lieu de N.
+    """
+    en_attente = getattr(_en_attente, 'objets', None)
+    if en_attente is None:
+        en_attente = _en_attente.objets = []
+    en_attente.append((sender, instance.pk))
+
+    transaction.on_commit(enregistrer_suppressions)
+
+
+def enregistrer_suppressions():
+    """
+    Écrit les suppressions notées, en une insertion
+
+    Le premier rappel exécuté au commit traite toute la liste. Après un
+    rollback, les objets notés existent encore : ils sont écartés au commit
+    suivant, une requête par modèle.
+    """
+    objets = getattr(_en_attente, 'objets', None)
+    _en_attente.objets = None
+    if not objets:
+        return
+
+    par_modele = {}
+    for model, pk in objets:
+        par_modele.setdefault(model, set()).add(pk)
+
+    journal = []
+    for model, pks in par_modele.items():
+        existants = set(model._base_manager.filter(pk__in=pks).values_list('pk', flat=True))
+        journal.extend(
+            JournalSuppression(modele=model._meta.label, objet_id=str(pk))
+            for pk in pks - existants
+        )
+    JournalSuppression.objects.bulk_create(journal, batch_size=1000)
+
+
+def connecter_journal():
+    """
+    Branche le journal sur chaque modèle du projet
+
+    Le signal est connecté modèle par modèle (et non pour tous les
+    émetteurs) afin que les suppressions des modèles de Django et des
+    paquets installés, et celles des tables dérivées (MODELES_DERIVES),
+    restent des suppressions rapides, sans chargement des objets.
+    """
+    for model in get_project_models():
+        if model is JournalSuppression or model._meta.label in MODELES_DERIVES:
+            continue
+        post_delete.connect(
+            journaliser_suppression,
+            sender=model,
+            dispatch_uid=f'journal_suppression_{model._meta.label}'
+        )
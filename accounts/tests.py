@@ -1,6 +1,14 @@
+from datetime import date
+
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from immeuble.models import Immeuble, Appartement, OccupationMensuelle
+from .models import JournalSuppression
+
 class AccountURLsTestCase(TestCase):
     """Tests pour les URLs de l'app contrats"""
 
@@ -24,4 +32,77 @@ class AccountURLsTestCase(TestCase):
     def test_user_create_url(self):
         """Test la résolution de l'URL de modification"""
         url = reverse('accounts:create_user')
-        self.assertEqual(url, '/accounts/users/create/')
\ No newline at end of file
+        self.assertEqual(url, '/accounts/users/create/')
+
+
+class JournalSuppressionTestCase(TestCase):
+    """Tests du journal des suppressions (sauvegardes incrémentales)"""
+
+    def test_suppression_journalisee(self):
+        """La suppression d'un objet du projet, et de ses dépendants, est tracée"""
+        immeuble = Immeuble.objects.create(nom="Le Parc", adresse="1 allée du Parc", ville="Nantes", code_postal="44000")
+        appartement = Appartement.objects.create(immeuble=immeuble, numero="A1", etage=0)
+        immeuble_id, appartement_id = immeuble.id, appartement.id
+
+        with self.captureOnCommitCallbacks(execute=True):
+            immeuble.delete()
+
+        self.assertEqual(
+            set(JournalSuppression.objects.values_list('modele', 'objet_id')),
+            {('immeuble.Immeuble', str(immeuble_id)), ('immeuble.Appartement', str(appartement_id))}
+        )
+
+    def test_journal_en_une_insertion(self):
+        """Une suppression en cascade écrit le journal en une seule insertion"""
+        immeuble = Immeuble.objects.create(nom="Le Parc", adresse="1 allée du Parc", ville="Nantes", code_postal="44000")
+        Appartement.objects.bulk_create([
+            Appartement(immeuble=immeuble, numero=f"A{i}", etage=0) for i in range(20)
+        ])
+
+        with self.captureOnCommitCallbacks() as rappels:
+            immeuble.delete()
+        with CaptureQueriesContext(connection) as requetes:
+            for rappel in rappels:
+                rappel()
+
+        inserts = [r for r in requetes.captured_queries if r['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(JournalSuppression.objects.count(), 21)
+
+    def test_tables_derivees_ignorees(self):
+        """Les tables dérivées restent des suppressions rapides, sans journal"""
+        immeuble = Immeuble.objects.create(nom="Le Parc", adresse="1 allée du Parc", ville="Nantes", code_postal="44000")
+        OccupationMensuelle.objects.bulk_create([
+            OccupationMensuelle(immeuble=immeuble, mois=date(2025, mois, 1)) for mois in range(1, 13)
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                OccupationMensuelle.objects.all().delete()
+
+        self.assertFalse(JournalSuppression.objects.exists())
+
+    def test_suppression_annulee(self):
+        """Un objet dont la suppression a été annulée n'est pas journalisé"""
+        immeuble = Immeuble.objects.create(nom="Le Parc", adresse="1 allée du Parc", ville="Nantes", code_postal="44000")
+
+        try:
+            with transaction.atomic():
+                immeuble.delete()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        immeuble = Immeuble.objects.get(nom="Le Parc")
+        autre = Immeuble.objects.create(nom="Le Bois", adresse="2 allée du Bois", ville="Nantes", code_postal="44000")
+        autre_id = autre.id
+
+        with self.captureOnCommitCallbacks(execute=True):
+            autre.delete()
+
+        self.assertEqual(list(JournalSuppression.objects.values_list('objet_id', flat=True)), [str(autre_id)])
+
+    def test_modeles_externes_ignores(self):
+        """Les modèles de Django ne sont pas journalisés"""
+        Group.objects.create(name="Gestionnaires").delete()
+
+        self.assertFalse(JournalSuppression.objects.exists())
@@ -0,0 +1,37 @@
+# accounts/utils.py
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+
+# Tables dérivées (recalculables à partir des autres) ou techniques : leurs
+# suppressions ne sont pas journalisées et chaque sauvegarde, même
+# incrémentale, les contient en entier (scripts/backup.py)
+MODELES_DERIVES = {
+    'paiements.StatistiqueMensuelle',
+    'paiements.RegularisationCharges',
+    'immeuble.OccupationMensuelle',
+    'src.PerformanceVue',
+    'src.RequeteLente',
+}
+
+
+def get_project_models():
+    """
+    Modèles des applications du projet (hors Django et paquets installés)
+
+    Tous les modèles gérés par Django sont pris en compte, y compris ceux
+    ajoutés ultérieurement.
+    """
+    racine = Path(settings.BASE_DIR).resolve()
+    models = []
+    for config in apps.get_app_configs():
+        chemin = Path(config.path).resolve()
+        if not chemin.is_relative_to(racine) or 'site-packages' in chemin.parts:
+            continue
+        models.extend(
+            model for model in config.get_models()
+            if model._meta.managed and not model._meta.proxy
+        )
+    return models
@@ -14,7 +14,7 @@ class ContratForm(forms.ModelForm):
         fields = [
             'appartement', 'date_debut', 'date_fin',
             'loyer_mensuel', 'charges_mensuelles', 'jour_echeance', 'depot_garantie',
-            'indice_reference', 'date_revision', 'notes', 'actif', 'fichier_contrat',
+            'indice_reference', 'trimestre_reference', 'date_revision', 'notes', 'actif', 'fichier_contrat',
             'preavis_donne', 'date_preavis', 'etat_lieux_entree', 'etat_lieux_sortie'
         ]
         widgets = {
@@ -63,6 +63,7 @@ class ContratForm(forms.ModelForm):
         # Rendre certains champs non obligatoires
         self.fields['date_fin'].required = False
         self.fields['indice_reference'].required = False
+        self.fields['trimestre_reference'].required = False
         self.fields['date_revision'].required = False
         self.fields['date_preavis'].required = False
 
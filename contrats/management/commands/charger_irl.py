@@ -0,0 +1,21 @@
+# contrats/management/commands/charger_irl.py
+
+from django.core.management.base import BaseCommand
+
+from contrats.revision import RevisionManager, FICHIER_IRL
+
+
+class Command(BaseCommand):
+    help = "Charge la table des indices IRL depuis un fichier CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fichier',
+            nargs='?',
+            default=FICHIER_IRL,
+            help="Fichier CSV (annee,trimestre,valeur[,date_publication])"
+        )
+
+    def handle(self, *args, **options):
+        nombre = RevisionManager.charger_indices(options['fichier'])
+        self.stdout.write(self.style.SUCCESS(f'{nombre} indice(s) IRL chargé(s)'))
@@ -0,0 +1,54 @@
+# contrats/management/commands/reviser_loyers.py
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from contrats.revision import RevisionManager
+
+
+class Command(BaseCommand):
+    help = "Applique la révision annuelle IRL aux contrats dont la date de révision est échue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--debut',
+            type=date.fromisoformat,
+            default=date.today() - timedelta(days=365),
+            help="Début de période (AAAA-MM-JJ, défaut : il y a un an)"
+        )
+        parser.add_argument(
+            '--fin',
+            type=date.fromisoformat,
+            default=date.today(),
+            help="Fin de période (AAAA-MM-JJ, défaut : aujourd'hui)"
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les révisions sans les appliquer")
+
+    def handle(self, *args, **options):
+        resultat = RevisionManager.reviser_loyers(
+            options['debut'],
+            options['fin'],
+            dry_run=options['dry_run'],
+        )
+
+        for revision in resultat['revisions']:
+            self.stdout.write(
+                f"✓ Contrat #{revision.contrat_id} au {revision.date_revision:%d/%m/%Y} : "
+                f"{revision.ancien_loyer}€ → {revision.nouveau_loyer}€ "
+                f"(IRL {revision.ancien_indice} → {revision.nouvel_indice.valeur})"
+            )
+        for ignore in resultat['ignores']:
+            self.stdout.write(
+                self.style.WARNING(f"✗ Contrat #{ignore['contrat'].id} : {ignore['raison']}")
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"\nSimulation : {len(resultat['revisions'])} révision(s), aucune modification enregistrée"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nRévision terminée : {len(resultat['revisions'])} contrat(s) révisé(s), "
+                f"{len(resultat['ignores'])} ignoré(s)"
+            ))
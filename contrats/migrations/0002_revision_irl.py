@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contrats',
+            name='trimestre_reference',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(1, 'T1'), (2, 'T2'), (3, 'T3'), (4, 'T4')], null=True, verbose_name='Trimestre de référence IRL'),
+        ),
+        migrations.CreateModel(
+            name='IndiceIRL',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('trimestre', models.PositiveSmallIntegerField(choices=[(1, 'T1'), (2, 'T2'), (3, 'T3'), (4, 'T4')], verbose_name='Trimestre')),
+                ('valeur', models.DecimalField(decimal_places=2, max_digits=8, verbose_name="Valeur de l'indice")),
+                ('date_publication', models.DateField(verbose_name='Date de publication')),
+            ],
+            options={
+                'verbose_name': 'Indice IRL',
+                'verbose_name_plural': 'Indices IRL',
+                'ordering': ['-annee', '-trimestre'],
+                'unique_together': {('annee', 'trimestre')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RevisionLoyer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('date_revision', models.DateField(verbose_name='Date de révision')),
+                ('ancien_loyer', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Ancien loyer')),
+                ('nouveau_loyer', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Nouveau loyer')),
+                ('ancien_indice', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Ancien indice')),
+                ('contrat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='contrats.contrats')),
+                ('nouvel_indice', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='revisions', to='contrats.indiceirl', verbose_name='Nouvel indice')),
+            ],
+            options={
+                'verbose_name': 'Révision de loyer',
+                'verbose_name_plural': 'Révisions de loyer',
+                'ordering': ['-date_revision'],
+                'unique_together': {('contrat', 'date_revision')},
+            },
+        ),
+    ]
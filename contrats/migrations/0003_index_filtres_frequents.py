@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0002_revision_irl'),
+        ('immeuble', '0002_appartement_surface_tantiemes'),
+        ('persons', '0002_index_filtres_frequents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contrats',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['date_debut'], name='contrat_actif_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrats',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['date_fin'], name='contrat_actif_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrats',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['date_revision'], name='contrat_actif_revision_idx'),
+        ),
+    ]
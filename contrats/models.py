@@ -1,13 +1,16 @@
 # contrats/models.py
 
+from decimal import Decimal
+
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
-from accounts.models import TimeStampedModel
+from accounts.models import EtatInitialMixin, TimeStampedModel
 from persons.models import Locataires
 from immeuble.models import Appartement
 
 
-class Contrats(TimeStampedModel):
+class Contrats(EtatInitialMixin, TimeStampedModel):
     """Modèle pour les contrats de bail"""
 
     # ✅ RELATION ManyToMany (système simplifié)
@@ -73,6 +76,12 @@ class Contrats(TimeStampedModel):
         blank=True,
         verbose_name="Indice de référence IRL"
     )
+    trimestre_reference = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        choices=[(1, 'T1'), (2, 'T2'), (3, 'T3'), (4, 'T4')],
+        verbose_name="Trimestre de référence IRL"
+    )
     date_revision = models.DateField(
         null=True,
         blank=True,
@@ -110,6 +119,13 @@ class Contrats(TimeStampedModel):
         ordering = ['-date_debut']
         verbose_name = "Contrat"
         verbose_name_plural = "Contrats"
+        indexes = [
+            # Index partiels : les filtres courants (génération des quittances,
+            # tableau de bord, relances, révisions) portent sur les contrats actifs
+            models.Index(fields=['date_debut'], condition=models.Q(actif=True), name='contrat_actif_debut_idx'),
+            models.Index(fields=['date_fin'], condition=models.Q(actif=True), name='contrat_actif_fin_idx'),
+            models.Index(fields=['date_revision'], condition=models.Q(actif=True), name='contrat_actif_revision_idx'),
+        ]
 
     def __str__(self):
         locataires_noms = self.get_locataires_display()
@@ -197,7 +213,102 @@ class Contrats(TimeStampedModel):
         ContratLocataire.objects.filter(
             contrat=self,
             locataire=locataire
-        ).update(date_sortie=date_sortie)
+        ).update(date_sortie=date_sortie, updated_at=timezone.now())
+
+
+class IndiceIRL(models.Model):
+    """Indice de référence des loyers (IRL) publié par l'INSEE"""
+
+    annee = models.PositiveSmallIntegerField(verbose_name="Année")
+    trimestre = models.PositiveSmallIntegerField(
+        choices=[(1, 'T1'), (2, 'T2'), (3, 'T3'), (4, 'T4')],
+        verbose_name="Trimestre"
+    )
+    valeur = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        verbose_name="Valeur de l'indice"
+    )
+    date_publication = models.DateField(verbose_name="Date de publication")
+
+    class Meta:
+        ordering = ['-annee', '-trimestre']
+        unique_together = ['annee', 'trimestre']
+        verbose_name = "Indice IRL"
+        verbose_name_plural = "Indices IRL"
+
+    def __str__(self):
+        return f"IRL T{self.trimestre} {self.annee} : {self.valeur}"
+
+
+class RevisionLoyer(TimeStampedModel):
+    """Historique des révisions annuelles de loyer"""
+
+    contrat = models.ForeignKey(
+        Contrats,
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+    date_revision = models.DateField(verbose_name="Date de révision")
+
+    ancien_loyer = models.DecimalField(max_digits=8, decimal_places=2, verbose_name="Ancien loyer")
+    nouveau_loyer = models.DecimalField(max_digits=8, decimal_places=2, verbose_name="Nouveau loyer")
+
+    ancien_indice = models.DecimalField(max_digits=8, decimal_places=2, verbose_name="Ancien indice")
+    nouvel_indice = models.ForeignKey(
+        IndiceIRL,
+        on_delete=models.PROTECT,
+        related_name='revisions',
+        verbose_name="Nouvel indice"
+    )
+
+    class Meta:
+        ordering = ['-date_revision']
+        unique_together = ['contrat', 'date_revision']
+        verbose_name = "Révision de loyer"
+        verbose_name_plural = "Révisions de loyer"
+
+    def __str__(self):
+        return f"Révision {self.date_revision} - {self.contrat} : {self.ancien_loyer}€ → {self.nouveau_loyer}€"
+
+    @property
+    def variation(self):
+        """Variation du loyer en pourcentage"""
+        return ((self.nouveau_loyer / self.ancien_loyer - 1) * 100).quantize(Decimal('0.01'))
+
+
+def historique_loyers(contrats):
+    """
+    Révisions de loyer d'un ensemble de contrats, en une requête
+
+    Args:
+        contrats: QuerySet ou liste d'identifiants de contrats
+
+    Returns:
+        dict: {contrat_id: [(date_revision, ancien_loyer), ...]} par date croissante
+    """
+    historique = {}
+    for contrat_id, date_revision, ancien_loyer in RevisionLoyer.objects.filter(
+        contrat__in=contrats
+    ).order_by('contrat', 'date_revision').values_list('contrat', 'date_revision', 'ancien_loyer'):
+        historique.setdefault(contrat_id, []).append((date_revision, ancien_loyer))
+    return historique
+
+
+def loyer_en_vigueur(loyer_actuel, revisions, jour):
+    """
+    Loyer applicable à une date : celui d'avant la première révision
+    postérieure, ou le loyer actuel du contrat s'il n'y en a pas
+
+    Args:
+        loyer_actuel: Contrats.loyer_mensuel
+        revisions: Révisions du contrat, par date croissante (voir historique_loyers)
+        jour: Date considérée (en pratique, l'échéance du mois)
+    """
+    for date_revision, ancien_loyer in revisions:
+        if jour < date_revision:
+            return ancien_loyer
+    return loyer_actuel
 
 
 class ContratLocataire(TimeStampedModel):
@@ -282,7 +393,7 @@ class ContratLocataire(TimeStampedModel):
             ContratLocataire.objects.filter(
                 contrat=self.contrat,
                 principal=True
-            ).exclude(pk=self.pk).update(principal=False)
+            ).exclude(pk=self.pk).update(principal=False, updated_at=timezone.now())
 
         # Définir date_entree par défaut
         if not self.date_entree:
@@ -0,0 +1,213 @@
+# contrats/revision.py
+import csv
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from paiements.signals import cellules_revision
+from paiements.statistiques import StatistiqueManager
+from .models import Contrats, IndiceIRL, RevisionLoyer
+
+
+# Fichier IRL livré avec l'application (source : INSEE)
+FICHIER_IRL = Path(__file__).resolve().parent / 'data' / 'irl.csv'
+
+
+def date_publication_estimee(annee, trimestre):
+    """L'INSEE publie l'IRL d'un trimestre vers le milieu du mois qui suit sa fin"""
+    if trimestre == 4:
+        return date(annee + 1, 1, 15)
+    return date(annee, 3 * trimestre + 1, 15)
+
+
+def ajouter_un_an(jour):
+    """Même date l'année suivante (le 29 février devient le 28)"""
+    try:
+        return jour.replace(year=jour.year + 1)
+    except ValueError:
+        return jour.replace(year=jour.year + 1, day=28)
+
+
+class RevisionManager:
+    """Moteur de révision annuelle des loyers selon l'IRL"""
+
+    @staticmethod
+    def charger_indices(chemin=None):
+        """
+        Charge (ou met à jour) la table des indices IRL depuis un fichier CSV
+
+        Colonnes attendues : annee, trimestre, valeur et, optionnellement,
+        date_publication (AAAA-MM-JJ). Sans date de publication, celle-ci est
+        estimée au 15 du mois suivant la fin du trimestre.
+
+        Args:
+            chemin: Chemin du fichier (défaut : fichier livré avec l'application)
+
+        Returns:
+            int: Nombre d'indices chargés
+        """
+        chemin = Path(chemin) if chemin else FICHIER_IRL
+
+        indices = []
+        with open(chemin, newline='', encoding='utf-8') as f:
+            for ligne in csv.DictReader(f):
+                annee = int(ligne['annee'])
+                trimestre = int(ligne['trimestre'])
+                publication = ligne.get('date_publication')
+                indices.append(IndiceIRL(
+                    annee=annee,
+                    trimestre=trimestre,
+                    valeur=Decimal(ligne['valeur']),
+                    date_publication=(
+                        date.fromisoformat(publication) if publication
+                        else date_publication_estimee(annee, trimestre)
+                    ),
+                ))
+
+        IndiceIRL.objects.bulk_create(
+            indices,
+            update_conflicts=True,
+            unique_fields=['annee', 'trimestre'],
+            update_fields=['valeur', 'date_publication'],
+        )
+        return len(indices)
+
+    @staticmethod
+    def calculer_revisions(debut, fin, immeubles=None):
+        """
+        Calcule les révisions des contrats dont la date de révision tombe dans [debut, fin]
+
+        Le nouveau loyer est : loyer × nouvel indice / ancien indice, où le
+        nouvel indice est le dernier IRL publié à la date de révision pour le
+        trimestre de référence du contrat. Sans trimestre renseigné, celui-ci
+        est déduit de la valeur de l'indice de référence s'il n'y a pas
+        d'ambiguïté.
+
+        Args:
+            debut, fin: Période des dates de révision
+            immeubles: Liste d'immeubles (optionnel, sinon tous)
+
+        Returns:
+            dict: Contrats modifiés (non sauvegardés), révisions et contrats ignorés
+        """
+        indices_par_trimestre = {1: [], 2: [], 3: [], 4: []}
+        indices_par_valeur = {}
+        for indice in IndiceIRL.objects.order_by('annee', 'trimestre'):
+            indices_par_trimestre[indice.trimestre].append(indice)
+            indices_par_valeur.setdefault(indice.valeur, []).append(indice)
+
+        contrats = Contrats.objects.filter(
+            actif=True,
+            date_revision__gte=debut,
+            date_revision__lte=fin
+        ).select_related('appartement__immeuble').order_by('date_revision', 'id')
+
+        if immeubles:
+            contrats = contrats.filter(appartement__immeuble__in=immeubles)
+
+        contrats_revises = []
+        revisions = []
+        ignores = []
+        maintenant = timezone.now()
+
+        for contrat in contrats:
+            if not contrat.loyer_mensuel:
+                ignores.append({'contrat': contrat, 'raison': 'Loyer mensuel non renseigné'})
+                continue
+            if not contrat.indice_reference:
+                ignores.append({'contrat': contrat, 'raison': 'Indice de référence non renseigné'})
+                continue
+
+            correspondances = [
+                i for i in indices_par_valeur.get(contrat.indice_reference, [])
+                if i.date_publication <= contrat.date_revision
+            ]
+
+            trimestre = contrat.trimestre_reference
+            if not trimestre:
+                trimestres = {i.trimestre for i in correspondances}
+                if len(trimestres) != 1:
+                    ignores.append({
+                        'contrat': contrat,
+                        'raison': 'Trimestre de référence inconnu ou ambigu'
+                    })
+                    continue
+                trimestre = trimestres.pop()
+
+            publies = [
+                i for i in indices_par_trimestre[trimestre]
+                if i.date_publication <= contrat.date_revision
+            ]
+            if not publies:
+                ignores.append({'contrat': contrat, 'raison': 'Aucun indice publié pour ce trimestre'})
+                continue
+            nouvel_indice = publies[-1]
+
+            annees_ancien = [i.annee for i in correspondances if i.trimestre == trimestre]
+            if annees_ancien and nouvel_indice.annee <= max(annees_ancien):
+                ignores.append({'contrat': contrat, 'raison': 'Aucun nouvel indice publié'})
+                continue
+
+            ancien_loyer = contrat.loyer_mensuel
+            ancien_indice = contrat.indice_reference
+            nouveau_loyer = (
+                ancien_loyer * nouvel_indice.valeur / ancien_indice
+            ).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+            revisions.append(RevisionLoyer(
+                contrat=contrat,
+                date_revision=contrat.date_revision,
+                ancien_loyer=ancien_loyer,
+                nouveau_loyer=nouveau_loyer,
+                ancien_indice=ancien_indice,
+                nouvel_indice=nouvel_indice,
+            ))
+
+            contrat.loyer_mensuel = nouveau_loyer
+            contrat.indice_reference = nouvel_indice.valeur
+            contrat.trimestre_reference = trimestre
+            contrat.date_revision = ajouter_un_an(contrat.date_revision)
+            contrat.updated_at = maintenant
+            contrats_revises.append(contrat)
+
+        return {
+            'contrats': contrats_revises,
+            'revisions': revisions,
+            'ignores': ignores,
+        }
+
+    @staticmethod
+    def reviser_loyers(debut, fin, immeubles=None, dry_run=False):
+        """
+        Applique les révisions IRL de la période en une seule passe
+
+        Les contrats sont mis à jour par bulk_update et l'historique est
+        enregistré par bulk_create dans une même transaction. bulk_update
+        n'émet pas de signal : les statistiques mensuelles des contrats
+        révisés sont invalidées explicitement, à partir du mois de la
+        révision. En mode simulation
+        (dry_run), rien n'est écrit.
+
+        Returns:
+            dict: Résultat de calculer_revisions, avec le mode utilisé
+        """
+        resultat = RevisionManager.calculer_revisions(debut, fin, immeubles=immeubles)
+
+        if not dry_run:
+            with transaction.atomic():
+                Contrats.objects.bulk_update(
+                    resultat['contrats'],
+                    ['loyer_mensuel', 'indice_reference', 'trimestre_reference',
+                     'date_revision', 'updated_at'],
+                    batch_size=500,
+                )
+                RevisionLoyer.objects.bulk_create(resultat['revisions'], batch_size=1000)
+                StatistiqueManager.invalider(
+                    set().union(*(cellules_revision(revision) for revision in resultat['revisions']))
+                )
+
+        resultat['dry_run'] = dry_run
+        return resultat
@@ -6,6 +6,8 @@ from django.views.generic import ListView, CreateView, UpdateView
 from django.urls import reverse_lazy
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.utils import timezone
+from django.db.models import Prefetch
 from datetime import date
 
 from .models import Contrats, ContratLocataire
@@ -27,7 +29,17 @@ class Contrats_ListView(ListView):
     context_object_name = 'contrats'
 
     def get_queryset(self):
-        return Contrats.objects.select_related('appartement').prefetch_related('locataires')
+        # Locataires présents, dans l'ordre du bail : une requête pour toute la page
+        # (get_tous_locataires() en ferait une par contrat)
+        return Contrats.objects.select_related('appartement__immeuble').prefetch_related(
+            Prefetch(
+                'contratlocataire_set',
+                queryset=ContratLocataire.objects.filter(
+                    date_sortie__isnull=True
+                ).select_related('locataire').order_by('ordre'),
+                to_attr='relations_actives'
+            )
+        )
 
 
 @method_decorator(login_required, name='dispatch')
@@ -219,7 +231,7 @@ def definir_principal(request, contrat_id, relation_id):
     ContratLocataire.objects.filter(
         contrat=contrat,
         principal=True
-    ).update(principal=False)
+    ).update(principal=False, updated_at=timezone.now())
 
     # Définir le nouveau principal
     relation.principal = True
@@ -246,7 +258,7 @@ def modifier_ordre_locataires(request, contrat_id):
             ContratLocataire.objects.filter(
                 id=relation_id,
                 contrat=contrat
-            ).update(ordre=index)
+            ).update(ordre=index, updated_at=timezone.now())
 
         messages.success(request, 'Ordre des locataires mis à jour.')
         return redirect('contrats:contrat_locataires', contrat_id=contrat.id)
@@ -9,4 +9,4 @@ class Immeuble(admin.ModelAdmin):
 
 @admin.register(Appartement)
 class Appartement(admin.ModelAdmin):
-    list_display = ('immeuble', 'numero', 'etage', 'proprietaire', 'loue' )
\ No newline at end of file
+    list_display = ('immeuble', 'numero', 'etage', 'proprietaire', 'loue', 'surface', 'tantiemes')
\ No newline at end of file
@@ -22,6 +22,7 @@ class AppartementForm(forms.ModelForm):
         model = Appartement
         fields = [
             'immeuble', 'numero', 'etage', 'proprietaire' ,'loue',
+            'surface', 'tantiemes',
         ]
         widgets = {
             'immeuble': forms.Select(attrs={'class': 'form-control'}),
@@ -29,6 +30,8 @@ class AppartementForm(forms.ModelForm):
             'proprietaire': forms.Select(attrs={'class': 'form-control'}),
             'etage': forms.NumberInput(attrs={'class': 'form-control'}),
             'loué': forms.CheckboxInput(attrs={'class': 'form-control'}),
+            'surface': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'tantiemes': forms.NumberInput(attrs={'class': 'form-control'}),
         }
 
 class ImmeubleSearchForm(forms.Form):
@@ -0,0 +1,64 @@
+# immeuble/management/commands/occupation.py
+
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand
+
+from immeuble.models import Immeuble, Appartement
+from immeuble.occupation import OccupationManager
+from paiements.statistiques import ajouter_mois, fin_de_mois
+
+
+def mois_argument(valeur):
+    """Mois au format AAAA-MM"""
+    return datetime.strptime(valeur, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Matérialise les mois manquants de l'occupation puis affiche taux et vacances "
+        "par immeuble sur une période (à planifier en début de mois)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', type=mois_argument, help="Premier mois (AAAA-MM, défaut : onze mois avant la fin)")
+        parser.add_argument('--fin', type=mois_argument, help="Dernier mois (AAAA-MM, défaut : mois courant)")
+        parser.add_argument(
+            '--reconstruire', action='store_true',
+            help="Recalcule d'abord toute l'occupation matérialisée (reprise d'historique, import en masse)"
+        )
+
+    def handle(self, *args, **options):
+        if options['reconstruire']:
+            nombre = OccupationManager.reconstruire()
+            self.stdout.write(self.style.SUCCESS(f'{nombre} occupation(s) mensuelle(s) recalculée(s)'))
+
+        fin = options['fin'] or date.today().replace(day=1)
+        debut = options['debut'] or ajouter_mois(fin, -11)
+
+        # Nouveau mois, nouvel immeuble : les lectures ne matérialisent rien
+        nombre = OccupationManager.completer(debut, fin)
+        if nombre:
+            self.stdout.write(self.style.SUCCESS(f'{nombre} occupation(s) mensuelle(s) ajoutée(s)'))
+
+        taux = OccupationManager.taux(debut, fin)
+
+        # Vacances observées dans la période, cumulées par immeuble
+        immeuble_de = dict(Appartement.objects.values_list('id', 'immeuble'))
+        vacances = {}
+        for appartement, periodes in OccupationManager.vacances(debut, fin_de_mois(fin)).items():
+            vacances.setdefault(immeuble_de[appartement], []).extend(periodes)
+
+        self.stdout.write(f"Occupation de {debut:%m/%Y} à {fin:%m/%Y}")
+        self.stdout.write(f"  {'Immeuble':<30}{'taux (%)':>10}{'vacances':>10}{'durée moy. (j)':>16}")
+        for immeuble in Immeuble.objects.order_by('nom'):
+            if immeuble.pk not in taux:
+                continue
+            periodes = vacances.get(immeuble.pk, [])
+            jours = sum((fin_periode - debut_periode).days + 1 for debut_periode, fin_periode in periodes)
+            duree = f"{jours / len(periodes):.0f}" if periodes else '-'
+            self.stdout.write(f"  {immeuble.nom[:29]:<30}{taux[immeuble.pk]:>10}{len(periodes):>10}{duree:>16}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Parc entier : {OccupationManager.taux_global(debut, fin)} % d'occupation"
+        ))
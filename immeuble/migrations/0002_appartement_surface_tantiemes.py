@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('immeuble', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appartement',
+            name='surface',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True, verbose_name='Surface (m²)'),
+        ),
+        migrations.AddField(
+            model_name='appartement',
+            name='tantiemes',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Tantièmes'),
+        ),
+    ]
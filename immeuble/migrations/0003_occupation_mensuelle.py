@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('immeuble', '0002_appartement_surface_tantiemes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupationMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField(help_text='Premier jour du mois', verbose_name='Mois')),
+                ('nb_appartements', models.PositiveIntegerField(default=0)),
+                ('nb_appartements_occupes', models.PositiveIntegerField(default=0, help_text='Appartements occupés au moins un jour du mois')),
+                ('jours_disponibles', models.PositiveIntegerField(default=0)),
+                ('jours_occupes', models.PositiveIntegerField(default=0)),
+                ('entrees', models.PositiveIntegerField(default=0)),
+                ('sorties', models.PositiveIntegerField(default=0)),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+                ('immeuble', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupations_mensuelles', to='immeuble.immeuble')),
+            ],
+            options={
+                'verbose_name': 'Occupation mensuelle',
+                'verbose_name_plural': 'Occupations mensuelles',
+                'ordering': ['-mois', 'immeuble'],
+                'unique_together': {('immeuble', 'mois')},
+            },
+        ),
+    ]
@@ -2,7 +2,7 @@
 
 from django.core.validators import MinValueValidator
 from django.db import models
-from accounts.models import TimeStampedModel
+from accounts.models import EtatInitialMixin, TimeStampedModel
 from persons.models import Proprietaires
 from accounts.models import CustomUser
 
@@ -24,13 +24,27 @@ class Immeuble(TimeStampedModel):
         return self.nom
 
 
-class Appartement(TimeStampedModel):
+class Appartement(EtatInitialMixin, TimeStampedModel):
     immeuble = models.ForeignKey(Immeuble, related_name='appartements', on_delete=models.CASCADE)
     numero = models.CharField(max_length=10)
     proprietaire = models.ForeignKey(Proprietaires, blank=True, null=True, on_delete=models.SET_NULL)
     etage = models.PositiveIntegerField()
     loue = models.BooleanField(default=False)
 
+    # Bases de répartition des charges
+    surface = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Surface (m²)",
+    )
+    tantiemes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Tantièmes",
+    )
+
     # Financier
     loyer_base = models.DecimalField(
         max_digits=8,
@@ -53,3 +67,45 @@ class Appartement(TimeStampedModel):
         return f"{self.immeuble} - App : {self.numero}"
 
 
+
+
+class OccupationMensuelle(models.Model):
+    """Occupation d'un immeuble pour un mois, déduite des contrats (maintenue par immeuble/occupation.py)"""
+
+    immeuble = models.ForeignKey(
+        Immeuble,
+        on_delete=models.CASCADE,
+        related_name='occupations_mensuelles'
+    )
+    mois = models.DateField(verbose_name="Mois", help_text="Premier jour du mois")
+
+    nb_appartements = models.PositiveIntegerField(default=0)
+    nb_appartements_occupes = models.PositiveIntegerField(
+        default=0,
+        help_text="Appartements occupés au moins un jour du mois"
+    )
+
+    # Jours-appartements : base du taux d'occupation
+    jours_disponibles = models.PositiveIntegerField(default=0)
+    jours_occupes = models.PositiveIntegerField(default=0)
+
+    # Rotation : débuts et fins d'occupation dans le mois
+    entrees = models.PositiveIntegerField(default=0)
+    sorties = models.PositiveIntegerField(default=0)
+
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-mois', 'immeuble']
+        unique_together = ['immeuble', 'mois']
+        verbose_name = "Occupation mensuelle"
+        verbose_name_plural = "Occupations mensuelles"
+
+    def __str__(self):
+        return f"{self.immeuble} - {self.mois.strftime('%m/%Y')}"
+
+    @property
+    def taux_occupation(self):
+        if not self.jours_disponibles:
+            return None
+        return round(self.jours_occupes * 100 / self.jours_disponibles, 1)
@@ -0,0 +1,292 @@
+# immeuble/occupation.py
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Min, Q, Sum
+
+from contrats.models import Contrats
+from paiements.relances import iterer_mois
+from paiements.statistiques import fin_de_mois
+from src.agregats import AgregatMensuel
+from .models import Immeuble, Appartement, OccupationMensuelle
+
+
+UN_JOUR = timedelta(days=1)
+
+CHAMPS_OCCUPATION = [
+    'nb_appartements', 'nb_appartements_occupes', 'jours_disponibles',
+    'jours_occupes', 'entrees', 'sorties', 'date_calcul',
+]
+
+
+def fusionner(periodes):
+    """
+    Fusionne des périodes [debut, fin] qui se chevauchent ou se touchent
+
+    Balayage par date de début : chaque période prolonge la précédente ou
+    en ouvre une nouvelle. Une fin à None signifie « sans terme ».
+
+    Returns:
+        list: Périodes disjointes, triées
+    """
+    fusion = []
+    for debut, fin in sorted(periodes, key=lambda periode: periode[0]):
+        if fusion:
+            debut_courant, fin_courante = fusion[-1]
+            if fin_courante is None:
+                continue
+            if debut <= fin_courante + UN_JOUR:
+                if fin is None or fin > fin_courante:
+                    fusion[-1] = (debut_courant, fin)
+                continue
+        fusion.append((debut, fin))
+    return fusion
+
+
+def complement(periodes, debut, fin):
+    """Périodes de [debut, fin] non couvertes par des périodes fusionnées"""
+    trous = []
+    curseur = debut
+    for periode_debut, periode_fin in periodes:
+        if periode_debut > fin:
+            break
+        if periode_debut > curseur:
+            trous.append((curseur, periode_debut - UN_JOUR))
+        if periode_fin is None:
+            return trous
+        curseur = max(curseur, periode_fin + UN_JOUR)
+    if curseur <= fin:
+        trous.append((curseur, fin))
+    return trous
+
+
+class OccupationManager(AgregatMensuel):
+    """
+    Occupation des appartements déduite des dates des contrats
+
+    Un appartement est occupé du début de son contrat à sa fin effective (à
+    défaut, sa fin prévue ; un contrat actif sans fin court toujours). Les
+    périodes des contrats successifs sont fusionnées par appartement, leurs
+    trous sont les vacances. L'occupation est matérialisée par immeuble et
+    par mois (OccupationMensuelle), en jours-appartements, sur le parc actuel.
+    """
+
+    modele = OccupationMensuelle
+    champs = CHAMPS_OCCUPATION
+
+    @staticmethod
+    def contrats_en_cours(jour):
+        """Contrats qui occupent leur appartement le jour donné"""
+        return Contrats.objects.filter(date_debut__lte=jour).filter(
+            Q(date_fin_effective__gte=jour)
+            | Q(date_fin_effective__isnull=True, date_fin__gte=jour)
+            | Q(date_fin_effective__isnull=True, date_fin__isnull=True, actif=True)
+        )
+
+    @staticmethod
+    def appartements_occupes(jour):
+        """Nombre d'appartements occupés le jour donné"""
+        return OccupationManager.contrats_en_cours(jour).values('appartement').distinct().count()
+
+    @staticmethod
+    def periodes(immeubles=None, jusqu_au=None):
+        """
+        Périodes d'occupation fusionnées de chaque appartement (une requête)
+
+        Args:
+            immeubles: Liste d'identifiants d'immeubles (défaut : tous)
+            jusqu_au: Ignore les contrats commençant après cette date
+
+        Returns:
+            dict: {appartement_id: [(debut, fin ou None)]}
+        """
+        contrats = Contrats.objects.all()
+        if immeubles is not None:
+            contrats = contrats.filter(appartement__immeuble_id__in=immeubles)
+        if jusqu_au is not None:
+            contrats = contrats.filter(date_debut__lte=jusqu_au)
+
+        par_appartement = {}
+        for appartement, debut, fin_prevue, fin_effective, actif in contrats.values_list(
+            'appartement', 'date_debut', 'date_fin', 'date_fin_effective', 'actif'
+        ):
+            fin = fin_effective or fin_prevue
+            if (fin is None and not actif) or (fin is not None and fin < debut):
+                # Contrat clos sans date de fin ou dates incohérentes : pas d'occupation connue
+                continue
+            par_appartement.setdefault(appartement, []).append((debut, fin))
+
+        return {appartement: fusionner(periodes) for appartement, periodes in par_appartement.items()}
+
+    @staticmethod
+    def vacances(debut, fin, immeubles=None):
+        """
+        Périodes de vacance de chaque appartement entre debut et fin inclus
+
+        Returns:
+            dict: {appartement_id: [(debut, fin)]}, appartements jamais loués compris
+        """
+        appartements = Appartement.objects.all()
+        if immeubles is not None:
+            appartements = appartements.filter(immeuble_id__in=immeubles)
+        periodes = OccupationManager.periodes(immeubles, jusqu_au=fin)
+        return {
+            appartement: complement(periodes.get(appartement, []), debut, fin)
+            for appartement in appartements.values_list('id', flat=True)
+        }
+
+    @staticmethod
+    def calculer(debut, fin, immeubles=None):
+        """
+        Calcule l'occupation de chaque (immeuble, mois) de la période
+
+        Deux requêtes (appartements, contrats) quel que soit le nombre
+        d'immeubles et de mois ; chaque période d'occupation n'est
+        parcourue que sur les mois qu'elle couvre.
+
+        Args:
+            debut, fin: Premiers jours du premier et du dernier mois
+            immeubles: Liste d'identifiants d'immeubles (défaut : tous)
+
+        Returns:
+            dict: {(immeuble_id, mois): OccupationMensuelle non sauvegardée}
+        """
+        if immeubles is None:
+            immeubles = list(Immeuble.objects.values_list('id', flat=True))
+        fin_periode = fin_de_mois(fin)
+
+        immeuble_de = dict(
+            Appartement.objects.filter(immeuble_id__in=immeubles).values_list('id', 'immeuble')
+        )
+        nb_appartements = Counter(immeuble_de.values())
+
+        occupations = {}
+        for immeuble_id in immeubles:
+            for mois in iterer_mois(debut, fin):
+                nombre = nb_appartements.get(immeuble_id, 0)
+                occupations[(immeuble_id, mois)] = OccupationMensuelle(
+                    immeuble_id=immeuble_id,
+                    mois=mois,
+                    nb_appartements=nombre,
+                    jours_disponibles=nombre * fin_de_mois(mois).day,
+                )
+
+        occupes = {}
+        for appartement, periodes in OccupationManager.periodes(immeubles, jusqu_au=fin_periode).items():
+            immeuble_id = immeuble_de[appartement]
+            for periode_debut, periode_fin in periodes:
+                if periode_fin is not None and periode_fin < debut:
+                    continue
+
+                premier_jour = max(periode_debut, debut)
+                dernier_jour = min(periode_fin or fin_periode, fin_periode)
+                for mois in iterer_mois(premier_jour, dernier_jour):
+                    occupation = occupations[(immeuble_id, mois)]
+                    occupation.jours_occupes += (
+                        min(dernier_jour, fin_de_mois(mois)) - max(premier_jour, mois)
+                    ).days + 1
+                    occupes.setdefault((immeuble_id, mois), set()).add(appartement)
+
+                if periode_debut >= debut:
+                    occupations[(immeuble_id, periode_debut.replace(day=1))].entrees += 1
+                if periode_fin is not None and periode_fin <= fin_periode:
+                    occupations[(immeuble_id, periode_fin.replace(day=1))].sorties += 1
+
+        for cle, appartements in occupes.items():
+            occupations[cle].nb_appartements_occupes = len(appartements)
+
+        return occupations
+
+    @staticmethod
+    def completer(debut, fin):
+        """
+        Calcule les mois de la période absents de la matérialisation
+
+        Seuls les mois écoulés et le mois courant sont matérialisés : le
+        passage à un nouveau mois, ou un nouvel immeuble, ne demande pas de
+        reconstruction. Appelé par la commande `occupation`, à planifier en
+        début de mois ; les lectures (taux, tableau de bord) n'écrivent pas.
+
+        Returns:
+            int: Nombre de cellules enregistrées
+        """
+        fin = min(fin, date.today().replace(day=1))
+        nb_immeubles = Immeuble.objects.count()
+        if debut > fin or not nb_immeubles:
+            return 0
+
+        presents = dict(
+            OccupationMensuelle.objects.filter(mois__gte=debut, mois__lte=fin)
+            .values('mois').annotate(nombre=Count('id')).values_list('mois', 'nombre')
+        )
+        manquants = {mois for mois in iterer_mois(debut, fin) if presents.get(mois, 0) < nb_immeubles}
+        if not manquants:
+            return 0
+
+        occupations = [
+            occupation
+            for (immeuble_id, mois), occupation in OccupationManager.calculer(min(manquants), max(manquants)).items()
+            if mois in manquants
+        ]
+        OccupationManager.enregistrer(occupations)
+        return len(occupations)
+
+    @staticmethod
+    def taux(debut, fin, immeubles=None):
+        """
+        Taux d'occupation de chaque immeuble sur les mois de debut à fin inclus
+
+        Rapport des jours-appartements occupés aux jours-appartements
+        disponibles, lu dans la matérialisation en une requête groupée. Pure
+        lecture, utilisable sur la réplique : les mois sont matérialisés par
+        les signaux et par la commande `occupation` (voir completer).
+
+        Returns:
+            dict: {immeuble_id: Decimal (%)}, immeubles sans appartement exclus
+        """
+        debut, fin = debut.replace(day=1), fin.replace(day=1)
+        occupations = OccupationMensuelle.objects.filter(mois__gte=debut, mois__lte=fin)
+        if immeubles is not None:
+            occupations = occupations.filter(immeuble_id__in=immeubles)
+
+        return {
+            immeuble_id: (Decimal(occupes) * 100 / disponibles).quantize(Decimal('0.01'))
+            for immeuble_id, occupes, disponibles in occupations.values('immeuble').annotate(
+                occupes=Sum('jours_occupes'),
+                disponibles=Sum('jours_disponibles'),
+            ).values_list('immeuble', 'occupes', 'disponibles')
+            if disponibles
+        }
+
+    @staticmethod
+    def taux_global(debut, fin):
+        """Taux d'occupation de l'ensemble du parc sur les mois de debut à fin inclus (%)"""
+        debut, fin = debut.replace(day=1), fin.replace(day=1)
+        totaux = OccupationMensuelle.objects.filter(mois__gte=debut, mois__lte=fin).aggregate(
+            occupes=Sum('jours_occupes'),
+            disponibles=Sum('jours_disponibles'),
+        )
+        if not totaux['disponibles']:
+            return Decimal('0')
+        return (Decimal(totaux['occupes']) * 100 / totaux['disponibles']).quantize(Decimal('0.01'))
+
+    @staticmethod
+    def reconstruire(debut=None, fin=None):
+        """
+        Recalcule toute l'occupation de la période
+
+        Par défaut, du premier contrat jusqu'au mois courant.
+
+        Returns:
+            int: Nombre de cellules enregistrées
+        """
+        if debut is None:
+            debut = Contrats.objects.aggregate(d=Min('date_debut'))['d']
+            if debut is None:
+                return 0
+        if fin is None:
+            fin = date.today()
+
+        return OccupationManager.remplacer(debut.replace(day=1), fin.replace(day=1))
+
@@ -0,0 +1,27 @@
+# immeuble/signals.py
+from contrats.models import Contrats
+from paiements.signals import cellules_contrat
+from src.agregats import suivre
+from .models import Appartement, OccupationMensuelle
+from .occupation import OccupationManager
+
+
+# =============================================================================
+# MAINTENANCE INCRÉMENTALE DE L'OCCUPATION MENSUELLE
+# =============================================================================
+# Même principe que paiements/signals.py : les cellules (immeuble, mois)
+# touchées, avant et après modification, sont recalculées au commit.
+
+def cellules_appartement(appartement):
+    # Le parc de l'immeuble change : tous ses mois déjà matérialisés
+    mois = OccupationMensuelle.objects.filter(immeuble_id=appartement.immeuble_id).values_list('mois', flat=True)
+    return {(appartement.immeuble_id, m) for m in mois}
+
+
+# Seules les périodes des contrats déterminent l'occupation
+suivre(
+    Contrats, OccupationManager, cellules_contrat,
+    champs=['appartement_id', 'actif', 'date_debut', 'date_fin', 'date_fin_effective'],
+)
+# Seuls une création, une suppression ou un changement d'immeuble modifient le parc
+suivre(Appartement, OccupationManager, cellules_appartement, champs=['immeuble_id'])
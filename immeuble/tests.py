@@ -1,3 +1,151 @@
+# immeuble/tests.py
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from contrats.models import Contrats
+from paiements.models import StatistiqueMensuelle
+from .models import Immeuble, Appartement, OccupationMensuelle
+from .occupation import OccupationManager, fusionner, complement
+from src.testing import BudgetRequetesMixin, portefeuille
+
+
+class OccupationTestCase(TestCase):
+    """Occupation et vacances déduites des dates des contrats"""
+
+    def setUp(self):
+        self.immeuble = Immeuble.objects.create(
+            nom="Résidence Les Tilleuls", adresse="1 rue des Tilleuls", ville="Lyon", code_postal="69001"
+        )
+        self.app1 = Appartement.objects.create(immeuble=self.immeuble, numero="A1", etage=0)
+        self.app2 = Appartement.objects.create(immeuble=self.immeuble, numero="A2", etage=1)
+
+        # A1 : deux baux successifs sans interruption ; A2 : dix jours en février
+        self.creer_contrat(self.app1, date(2025, 1, 1), date_fin=date(2027, 12, 31), date_fin_effective=date(2025, 3, 15), actif=False)
+        self.creer_contrat(self.app1, date(2025, 3, 16))
+        self.creer_contrat(self.app2, date(2025, 2, 10), date_fin=date(2025, 2, 20), actif=False)
+
+    def creer_contrat(self, appartement, date_debut, **kwargs):
+        return Contrats.objects.create(
+            appartement=appartement,
+            date_debut=date_debut,
+            loyer_mensuel=Decimal('600.00'),
+            charges_mensuelles=Decimal('50.00'),
+            **kwargs
+        )
+
+    def test_fusion_et_complement(self):
+        """Les périodes contiguës ou chevauchantes sont fusionnées, les trous sont les vacances"""
+        periodes = fusionner([
+            (date(2025, 5, 1), None),
+            (date(2025, 1, 1), date(2025, 2, 28)),
+            (date(2025, 3, 1), date(2025, 3, 31)),
+            (date(2025, 2, 1), date(2025, 2, 10)),
+        ])
+        self.assertEqual(periodes, [(date(2025, 1, 1), date(2025, 3, 31)), (date(2025, 5, 1), None)])
+        self.assertEqual(
+            complement(periodes, date(2024, 12, 1), date(2025, 12, 31)),
+            [(date(2024, 12, 1), date(2024, 12, 31)), (date(2025, 4, 1), date(2025, 4, 30))]
+        )
+
+    def test_calcul_mensuel(self):
+        """Jours-appartements occupés par mois, entrées et sorties"""
+        occupations = OccupationManager.calculer(date(2025, 1, 1), date(2025, 3, 1))
+        janvier, fevrier, mars = (occupations[(self.immeuble.pk, date(2025, m, 1))] for m in (1, 2, 3))
+
+        self.assertEqual((janvier.jours_disponibles, janvier.jours_occupes), (62, 31))
+        self.assertEqual((fevrier.jours_disponibles, fevrier.jours_occupes), (56, 28 + 11))
+        self.assertEqual((mars.jours_disponibles, mars.jours_occupes), (62, 31))
+        self.assertEqual(fevrier.nb_appartements_occupes, 2)
+        self.assertEqual(mars.nb_appartements_occupes, 1)
+
+        # Le changement de bail de mars n'est pas une vacance
+        self.assertEqual((janvier.entrees, janvier.sorties), (1, 0))
+        self.assertEqual((fevrier.entrees, fevrier.sorties), (1, 1))
+        self.assertEqual((mars.entrees, mars.sorties), (0, 0))
+
+    def test_vacances(self):
+        vacances = OccupationManager.vacances(date(2025, 1, 1), date(2025, 6, 30))
+        self.assertEqual(vacances[self.app1.pk], [])
+        self.assertEqual(vacances[self.app2.pk], [
+            (date(2025, 1, 1), date(2025, 2, 9)), (date(2025, 2, 21), date(2025, 6, 30))
+        ])
+
+    def test_taux_tous_immeubles(self):
+        """Les mois manquants sont matérialisés, puis le taux est lu en une requête"""
+        autre = Immeuble.objects.create(nom="Le Parc", adresse="2 allée du Parc", ville="Lyon", code_postal="69002")
+        Appartement.objects.create(immeuble=autre, numero="B1", etage=0)
+
+        self.assertEqual(OccupationManager.completer(date(2025, 1, 1), date(2025, 3, 1)), 6)
+        self.assertEqual(OccupationManager.completer(date(2025, 1, 1), date(2025, 3, 1)), 0)
+
+        with self.assertNumQueries(1):
+            taux = OccupationManager.taux(date(2025, 1, 1), date(2025, 3, 1))
+        self.assertEqual(taux, {self.immeuble.pk: Decimal('56.11'), autre.pk: Decimal('0.00')})
+        self.assertEqual(OccupationManager.taux_global(date(2025, 1, 1), date(2025, 3, 1)), Decimal('37.41'))
+
+    def test_mise_a_jour_incrementale(self):
+        """La fin d'un contrat recalcule les mois concernés au commit"""
+        OccupationManager.reconstruire(date(2025, 1, 1), date(2025, 6, 1))
+        contrat = Contrats.objects.get(appartement=self.app1, actif=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            contrat.date_fin_effective = date(2025, 4, 30)
+            contrat.actif = False
+            contrat.save()
+
+        mai = OccupationMensuelle.objects.get(immeuble=self.immeuble, mois=date(2025, 5, 1))
+        self.assertEqual(mai.jours_occupes, 0)
+        # La même écriture a invalidé les statistiques financières (un seul suivi du contrat)
+        self.assertTrue(StatistiqueMensuelle.objects.filter(immeuble=self.immeuble, mois=date(2025, 5, 1)).exists())
+        self.assertEqual(OccupationMensuelle.objects.get(immeuble=self.immeuble, mois=date(2025, 4, 1)).sorties, 1)
+
+        # Un nouvel appartement change le parc de tous les mois matérialisés
+        with self.captureOnCommitCallbacks(execute=True):
+            Appartement.objects.create(immeuble=self.immeuble, numero="A3", etage=2)
+        self.assertEqual(OccupationMensuelle.objects.get(pk=mai.pk).jours_disponibles, 93)
+
+    def test_tableau_de_bord(self):
+        """Les appartements loués sont ceux des contrats en cours, pas le drapeau loue"""
+        self.client.force_login(get_user_model().objects.create_user(email='gestion@exemple.fr'))
+        with CaptureQueriesContext(connection) as requetes:
+            reponse = self.client.get(reverse('dashboard'))
+        # Vue lue sur la réplique : aucune matérialisation pendant la requête
+        self.assertFalse(any(
+            'occupationmensuelle' in requete['sql'] and not requete['sql'].startswith('SELECT')
+            for requete in requetes.captured_queries
+        ))
+        self.assertFalse(OccupationMensuelle.objects.exists())
+        self.assertEqual(reponse.context['appartements_loues'], 1)
+        self.assertEqual(reponse.context['taux_occupation'], 50.0)
+
+
+class BudgetRequetesTestCase(BudgetRequetesMixin, TestCase):
+    """Nombre de requêtes des listes et détails (N+1)"""
+
+    def test_liste_immeubles(self):
+        self.assertRequetesConstantes(
+            reverse('immeuble:list_immeuble'),
+            lambda n: portefeuille(immeubles=n)
+        )
+
+    def test_detail_immeuble(self):
+        def peupler(n):
+            portefeuille(appartements=n)
+            return Immeuble.objects.get()
+
+        self.assertRequetesConstantes(
+            lambda immeuble: reverse('immeuble:immeuble_detail', args=[immeuble.pk]),
+            peupler
+        )
 
-# Create your tests here.
+    def test_liste_appartements(self):
+        self.assertRequetesConstantes(
+            reverse('immeuble:appartement_list'),
+            lambda n: portefeuille(proprietaires=3, appartements=n)
+        )
@@ -0,0 +1,50 @@
+# paiements/management/commands/prevoir_tresorerie.py
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from immeuble.models import Immeuble
+from paiements.previsions import PrevisionManager, MOIS_MIN, MOIS_MAX
+
+
+def mois_argument(valeur):
+    """Mois au format AAAA-MM"""
+    return datetime.strptime(valeur, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = "Prévision de trésorerie mensuelle (loyers, charges, dépenses récurrentes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', type=mois_argument, help="Premier mois (AAAA-MM, défaut : mois courant)")
+        parser.add_argument('--mois', type=int, default=12, help=f"Horizon en mois ({MOIS_MIN} à {MOIS_MAX}, défaut : 12)")
+        parser.add_argument('--taux-irl', type=Decimal, help="Revalorisation annuelle des loyers, ex. 0.035 (défaut : dernier IRL)")
+        parser.add_argument('--immeuble', type=int, help="Détail d'un immeuble (identifiant)")
+
+    def handle(self, *args, **options):
+        try:
+            prevision = PrevisionManager.prevoir(options['debut'], options['mois'], options['taux_irl'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        flux = prevision['total']
+        if options['immeuble']:
+            immeuble = Immeuble.objects.filter(pk=options['immeuble']).first()
+            if immeuble is None:
+                raise CommandError(f"Immeuble {options['immeuble']} introuvable")
+            self.stdout.write(self.style.MIGRATE_HEADING(str(immeuble)))
+            vide = [Decimal('0')] * len(prevision['mois'])
+            flux = prevision['immeubles'].get(immeuble.pk, {'loyers': vide, 'charges': vide, 'depenses': vide})
+
+        self.stdout.write(f"Revalorisation IRL : {prevision['taux_irl'] * 100:.2f} % par an")
+        self.stdout.write(f"  {'Mois':<10}{'loyers':>14}{'charges':>12}{'dépenses':>14}{'solde':>14}")
+        cumul = Decimal('0')
+        for rang, mois in enumerate(prevision['mois']):
+            loyers, charges, depenses = flux['loyers'][rang], flux['charges'][rang], flux['depenses'][rang]
+            solde = loyers + charges - depenses
+            cumul += solde
+            self.stdout.write(f"  {mois:%m/%Y}   {loyers:>14}{charges:>12}{depenses:>14}{solde:>14}")
+
+        self.stdout.write(self.style.SUCCESS(f"Solde cumulé sur {len(prevision['mois'])} mois : {cumul} €"))
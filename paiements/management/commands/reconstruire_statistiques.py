@@ -0,0 +1,24 @@
+# paiements/management/commands/reconstruire_statistiques.py
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from paiements.statistiques import StatistiqueManager
+
+
+def mois_argument(valeur):
+    """Mois au format AAAA-MM"""
+    return datetime.strptime(valeur, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques mensuelles par immeuble (reprise d'historique)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', type=mois_argument, help="Premier mois (AAAA-MM, défaut : données les plus anciennes)")
+        parser.add_argument('--fin', type=mois_argument, help="Dernier mois (AAAA-MM, défaut : mois courant)")
+
+    def handle(self, *args, **options):
+        nombre = StatistiqueManager.reconstruire(options['debut'], options['fin'])
+        self.stdout.write(self.style.SUCCESS(f'{nombre} statistique(s) mensuelle(s) recalculée(s)'))
@@ -0,0 +1,46 @@
+# paiements/management/commands/regulariser_charges.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from immeuble.models import Immeuble
+from paiements.regularisation import RegularisationManager
+
+
+class Command(BaseCommand):
+    help = "Calcule la régularisation annuelle des charges de chaque contrat"
+
+    def add_arguments(self, parser):
+        parser.add_argument('annee', type=int, help="Année à régulariser")
+        parser.add_argument('--immeuble', type=int, help="ID de l'immeuble (défaut : tous)")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche le décompte sans l'enregistrer")
+
+    def handle(self, *args, **options):
+        immeubles = Immeuble.objects.all()
+        if options['immeuble']:
+            immeubles = immeubles.filter(id=options['immeuble'])
+            if not immeubles.exists():
+                raise CommandError(f"Immeuble #{options['immeuble']} introuvable")
+
+        for immeuble in immeubles:
+            resultat = RegularisationManager.regulariser_immeuble(
+                immeuble,
+                options['annee'],
+                enregistrer=not options['dry_run'],
+            )
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{immeuble.nom} - {options['annee']}"))
+            for decompte in resultat['decomptes']:
+                self.stdout.write(
+                    f"  Contrat #{decompte.contrat_id} ({decompte.jours_occupation} j) : "
+                    f"provisions {decompte.provisions_versees}€, "
+                    f"charges {decompte.charges_reelles}€, solde {decompte.solde}€"
+                )
+            self.stdout.write(
+                f"  Total : provisions {resultat['total_provisions']}€, "
+                f"charges {resultat['total_charges']}€, solde {resultat['total_solde']}€"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('\nSimulation : aucun décompte enregistré'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nRégularisation terminée'))
@@ -0,0 +1,45 @@
+# paiements/management/commands/relancer_impayes.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from paiements.relances import RelanceManager
+
+
+class Command(BaseCommand):
+    help = "Détecte les impayés et envoie le rappel de niveau suivant (à lancer chaque jour)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            default=None,
+            help="Date de référence (AAAA-MM-JJ, défaut : aujourd'hui)"
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les rappels sans les créer")
+        parser.add_argument('--sans-lettres', action='store_true', help="Ne génère pas les lettres PDF")
+        parser.add_argument('--workers', type=int, default=None, help="Processus pour générer les lettres")
+
+    def handle(self, *args, **options):
+        resultat = RelanceManager.relancer(
+            aujourd_hui=options['date'],
+            dry_run=options['dry_run'],
+            avec_lettres=not options['sans_lettres'],
+            workers=options['workers'],
+        )
+
+        for rappel in resultat['rappels']:
+            self.stdout.write(
+                f"✓ Contrat #{rappel.contrat_id} : {rappel.get_type_rappel_display()} - "
+                f"{rappel.montant_du}€ dû, {rappel.penalites}€ de pénalités"
+            )
+
+        self.stdout.write(
+            f"\n{len(resultat['impayes'])} contrat(s) en impayé, "
+            f"{len(resultat['rappels'])} rappel(s), {resultat['regles']} rappel(s) soldé(s)"
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulation : aucun rappel enregistré'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Relances terminées'))
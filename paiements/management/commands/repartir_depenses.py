@@ -0,0 +1,41 @@
+# paiements/management/commands/repartir_depenses.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from immeuble.models import Immeuble
+from paiements.repartition import RepartitionManager, MODES_REPARTITION
+
+
+class Command(BaseCommand):
+    help = "Répartit les dépenses répartissables d'un immeuble pour une année"
+
+    def add_arguments(self, parser):
+        parser.add_argument('annee', type=int, help="Année des dépenses")
+        parser.add_argument('--immeuble', type=int, help="ID de l'immeuble (défaut : tous)")
+        parser.add_argument('--mode', choices=MODES_REPARTITION[:3], default='surface')
+        parser.add_argument('--force', action='store_true', help="Recalcule les dépenses déjà réparties")
+
+    def handle(self, *args, **options):
+        immeubles = Immeuble.objects.all()
+        if options['immeuble']:
+            immeubles = immeubles.filter(id=options['immeuble'])
+            if not immeubles.exists():
+                raise CommandError(f"Immeuble #{options['immeuble']} introuvable")
+
+        for immeuble in immeubles:
+            resultat = RepartitionManager.repartir_annee(
+                immeuble,
+                options['annee'],
+                mode=options['mode'],
+                force=options['force'],
+            )
+            self.stdout.write(
+                f"{immeuble.nom} : {resultat['success']} dépense(s) répartie(s), "
+                f"{len(resultat['repartitions'])} ligne(s) créée(s)"
+            )
+            for erreur in resultat['erreurs_detail']:
+                self.stdout.write(
+                    self.style.ERROR(f"✗ {erreur['depense'].designation} : {erreur['erreur']}")
+                )
+
+        self.stdout.write(self.style.SUCCESS('\nRépartition terminée'))
@@ -0,0 +1,161 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:01
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0001_initial'),
+        ('immeuble', '0002_appartement_surface_tantiemes'),
+        ('paiements', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TypeDepense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('categorie', models.CharField(choices=[('entretien', 'Entretien et réparations'), ('charges', "Charges d'immeuble"), ('travaux', 'Travaux et rénovations'), ('assurance', 'Assurances'), ('taxe', 'Taxes et impôts'), ('honoraires', 'Honoraires professionnels'), ('fourniture', 'Fournitures et équipements'), ('autre', 'Autre')], default='charges', max_length=50)),
+                ('recurrent', models.BooleanField(default=False, verbose_name='Dépense récurrente')),
+                ('deductible_fiscalement', models.BooleanField(default=True, verbose_name='Déductible fiscalement')),
+                ('actif', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Type de dépense',
+                'verbose_name_plural': 'Types de dépenses',
+                'ordering': ['categorie', 'nom'],
+            },
+        ),
+        migrations.AddField(
+            model_name='paiementlocataire',
+            name='loyer_attendu',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Loyer payé'),
+        ),
+        migrations.CreateModel(
+            name='DepenseProprietaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('designation', models.CharField(max_length=200, verbose_name='Désignation')),
+                ('description', models.TextField(blank=True, verbose_name='Description détaillée')),
+                ('montant_ht', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Montant HT')),
+                ('tva', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='TVA')),
+                ('montant_ttc', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Montant TTC')),
+                ('date_depense', models.DateField(help_text='Date de la facture ou du service', verbose_name='Date de la dépense')),
+                ('date_paiement', models.DateField(blank=True, null=True, verbose_name='Date de paiement')),
+                ('date_echeance', models.DateField(blank=True, null=True, verbose_name="Date d'échéance")),
+                ('fournisseur', models.CharField(max_length=200, verbose_name='Fournisseur/Prestataire')),
+                ('fournisseur_siret', models.CharField(blank=True, max_length=14, verbose_name='SIRET du fournisseur')),
+                ('numero_facture', models.CharField(blank=True, max_length=50, verbose_name='Numéro de facture')),
+                ('mode_paiement', models.CharField(choices=[('virement', 'Virement'), ('cheque', 'Chèque'), ('carte', 'Carte bancaire'), ('prelevement', 'Prélèvement'), ('especes', 'Espèces')], default='virement', max_length=50)),
+                ('reference_paiement', models.CharField(blank=True, max_length=100, verbose_name='Référence de paiement')),
+                ('statut', models.CharField(choices=[('a_payer', 'À payer'), ('payee', 'Payée'), ('en_attente', 'En attente de validation'), ('annulee', 'Annulée')], default='a_payer', max_length=20)),
+                ('repartissable', models.BooleanField(default=False, help_text='Cette charge peut être répartie entre les locataires', verbose_name='Répartissable sur locataires')),
+                ('repartie', models.BooleanField(default=False, verbose_name='Déjà répartie')),
+                ('deductible_impots', models.BooleanField(default=True, verbose_name='Déductible des impôts')),
+                ('facture', models.FileField(blank=True, null=True, upload_to='depenses/factures/%Y/%m/', verbose_name='Facture')),
+                ('justificatif', models.FileField(blank=True, null=True, upload_to='depenses/justificatifs/%Y/%m/', verbose_name='Justificatif')),
+                ('notes', models.TextField(blank=True)),
+                ('appartement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='depenses', to='immeuble.appartement', verbose_name='Appartement')),
+                ('immeuble', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='depenses', to='immeuble.immeuble', verbose_name='Immeuble')),
+                ('type_depense', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='depenses', to='paiements.typedepense')),
+            ],
+            options={
+                'verbose_name': 'Dépense propriétaire',
+                'verbose_name_plural': 'Dépenses propriétaires',
+                'ordering': ['-date_depense'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RappelPaiement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('type_rappel', models.CharField(choices=[('premier', 'Premier rappel'), ('deuxieme', 'Deuxième rappel'), ('mise_demeure', 'Mise en demeure'), ('contentieux', 'Contentieux')], default='premier', max_length=20)),
+                ('date_envoi', models.DateField(verbose_name="Date d'envoi du rappel")),
+                ('date_limite_reponse', models.DateField(blank=True, null=True, verbose_name='Date limite de réponse')),
+                ('montant_du', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Montant dû')),
+                ('penalites', models.DecimalField(decimal_places=2, default=0, max_digits=8, verbose_name='Pénalités de retard')),
+                ('statut', models.CharField(choices=[('envoye', 'Envoyé'), ('regle', 'Réglé'), ('sans_reponse', 'Sans réponse'), ('contentieux', 'En contentieux')], default='envoye', max_length=20)),
+                ('mode_envoi', models.CharField(choices=[('email', 'Email'), ('courrier', 'Courrier simple'), ('recommande', 'Courrier recommandé'), ('huissier', 'Par huissier')], default='email', max_length=20)),
+                ('document', models.FileField(blank=True, null=True, upload_to='rappels/%Y/%m/', verbose_name='Document de rappel')),
+                ('notes', models.TextField(blank=True)),
+                ('contrat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rappels', to='contrats.contrats')),
+                ('paiement_locataire', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rappels', to='paiements.paiementlocataire')),
+            ],
+            options={
+                'verbose_name': 'Rappel de paiement',
+                'verbose_name_plural': 'Rappels de paiement',
+                'ordering': ['-date_envoi'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RapportFinancier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('periode_debut', models.DateField(verbose_name='Début de période')),
+                ('periode_fin', models.DateField(verbose_name='Fin de période')),
+                ('type_rapport', models.CharField(choices=[('mensuel', 'Mensuel'), ('trimestriel', 'Trimestriel'), ('annuel', 'Annuel'), ('personnalise', 'Personnalisé')], default='mensuel', max_length=20)),
+                ('total_loyers_percus', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_charges_percues', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_depenses', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('resultat_net', models.DecimalField(decimal_places=2, default=0, help_text='Revenus - Dépenses', max_digits=10)),
+                ('taux_occupation', models.DecimalField(decimal_places=2, default=0, help_text="Pourcentage d'occupation", max_digits=5)),
+                ('total_impayes', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('fichier_rapport', models.FileField(blank=True, null=True, upload_to='rapports/%Y/%m/')),
+                ('notes', models.TextField(blank=True)),
+                ('immeuble', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rapports_financiers', to='immeuble.immeuble')),
+            ],
+            options={
+                'verbose_name': 'Rapport financier',
+                'verbose_name_plural': 'Rapports financiers',
+                'ordering': ['-periode_debut'],
+                'unique_together': {('periode_debut', 'periode_fin', 'immeuble')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RepartitionDepense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('mode_repartition', models.CharField(choices=[('surface', 'Par surface'), ('tantieme', 'Par tantièmes'), ('forfait', 'Forfait'), ('personnalise', 'Personnalisé')], default='surface', max_length=20)),
+                ('base_calcul', models.DecimalField(blank=True, decimal_places=4, help_text='Surface, tantièmes, ou autre base de calcul', max_digits=10, null=True)),
+                ('coefficient', models.DecimalField(blank=True, decimal_places=4, help_text='Coefficient appliqué pour le calcul', max_digits=8, null=True)),
+                ('facturee_locataire', models.BooleanField(default=False, verbose_name='Facturée au locataire')),
+                ('date_facturation', models.DateField(blank=True, null=True, verbose_name='Date de facturation')),
+                ('notes', models.TextField(blank=True)),
+                ('appartement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repartitions_charges', to='immeuble.appartement')),
+                ('depense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repartitions', to='paiements.depenseproprietaire')),
+            ],
+            options={
+                'verbose_name': 'Répartition de dépense',
+                'verbose_name_plural': 'Répartitions de dépenses',
+                'ordering': ['depense', 'appartement'],
+                'unique_together': {('depense', 'appartement')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='depenseproprietaire',
+            index=models.Index(fields=['date_depense'], name='paiements_d_date_de_485862_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='depenseproprietaire',
+            index=models.Index(fields=['statut'], name='paiements_d_statut_57d0ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='depenseproprietaire',
+            index=models.Index(fields=['immeuble', 'date_depense'], name='paiements_d_immeubl_8eaef5_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0001_initial'),
+        ('paiements', '0003_depenses_rappels_rapports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegularisationCharges',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année régularisée')),
+                ('periode_debut', models.DateField(verbose_name="Début d'occupation")),
+                ('periode_fin', models.DateField(verbose_name="Fin d'occupation")),
+                ('jours_occupation', models.PositiveSmallIntegerField(verbose_name="Jours d'occupation")),
+                ('provisions_versees', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Provisions sur charges versées')),
+                ('charges_reelles', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Charges réelles imputées')),
+                ('solde', models.DecimalField(decimal_places=2, default=0, help_text='Positif : complément dû par le locataire, négatif : trop-perçu à rembourser', max_digits=10, verbose_name='Solde')),
+                ('statut', models.CharField(choices=[('calculee', 'Calculée'), ('facturee', 'Facturée au locataire'), ('reglee', 'Réglée')], default='calculee', max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('contrat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regularisations', to='contrats.contrats')),
+            ],
+            options={
+                'verbose_name': 'Régularisation des charges',
+                'verbose_name_plural': 'Régularisations des charges',
+                'ordering': ['-annee', 'contrat'],
+                'unique_together': {('contrat', 'annee')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('immeuble', '0002_appartement_surface_tantiemes'),
+        ('paiements', '0004_regularisationcharges'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField(help_text='Premier jour du mois', verbose_name='Mois')),
+                ('loyers_percus', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('charges_percues', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('depenses', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('impayes', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('nb_appartements', models.PositiveIntegerField(default=0)),
+                ('nb_appartements_occupes', models.PositiveIntegerField(default=0)),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+                ('immeuble', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques_mensuelles', to='immeuble.immeuble')),
+            ],
+            options={
+                'verbose_name': 'Statistique mensuelle',
+                'verbose_name_plural': 'Statistiques mensuelles',
+                'ordering': ['-mois', 'immeuble'],
+                'unique_together': {('immeuble', 'mois')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0002_revision_irl'),
+        ('paiements', '0005_statistiquemensuelle'),
+        ('quittances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paiementlocataire',
+            index=models.Index(fields=['contrat', '-mois', '-id'], name='paiement_contrat_dernier_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rappelpaiement',
+            index=models.Index(condition=models.Q(('statut__in', ['envoye', 'sans_reponse', 'contentieux'])), fields=['contrat', '-date_envoi', '-id'], name='rappel_ouvert_contrat_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0003_index_filtres_frequents'),
+        ('immeuble', '0002_appartement_surface_tantiemes'),
+        ('paiements', '0006_index_dernier_paiement_rappels_ouverts'),
+        ('quittances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='depenseproprietaire',
+            index=models.Index(condition=models.Q(('repartissable', True)), fields=['appartement', 'date_depense'], name='depense_repartissable_appt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paiementlocataire',
+            index=models.Index(fields=['created_at'], name='paiements_p_created_2d45a9_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:14
+
+from django.db import migrations, models
+
+# Les cellules existantes n'ont pas de reste dû : relancer
+# « manage.py reconstruire_statistiques » après la migration.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0007_index_filtres_frequents'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='statistiquemensuelle',
+            name='impayes',
+        ),
+        migrations.AddField(
+            model_name='statistiquemensuelle',
+            name='derniere_echeance',
+            field=models.DateField(blank=True, help_text='Dernière échéance du mois portant un reste dû', null=True),
+        ),
+        migrations.AddField(
+            model_name='statistiquemensuelle',
+            name='reste_du',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0008_statistique_reste_du'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='statistiquemensuelle',
+            name='nb_appartements',
+        ),
+        migrations.RemoveField(
+            model_name='statistiquemensuelle',
+            name='nb_appartements_occupes',
+        ),
+    ]
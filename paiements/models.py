@@ -4,14 +4,14 @@ from django.core.validators import MinValueValidator
 from decimal import Decimal
 from datetime import date
 
-from accounts.models import TimeStampedModel
+from accounts.models import EtatInitialMixin, TimeStampedModel
 from contrats.models import Contrats
 
 # =============================================================================
 # MODÈLES POUR LES PAIEMENTS DES LOCATAIRES
 # =============================================================================
 
-class PaiementLocataire(TimeStampedModel):
+class PaiementLocataire(EtatInitialMixin, TimeStampedModel):
     """Paiements des loyers par les locataires"""
 
     contrat = models.ForeignKey(
@@ -130,6 +130,10 @@ class PaiementLocataire(TimeStampedModel):
             models.Index(fields=['mois', 'contrat']),
             models.Index(fields=['date_paiement']),
             models.Index(fields=['statut']),
+            # Dernier paiement par contrat (src.db.derniers_par)
+            models.Index(fields=['contrat', '-mois', '-id'], name='paiement_contrat_dernier_idx'),
+            # Activité récente du tableau de bord
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -232,7 +236,7 @@ class TypeDepense(models.Model):
         return f"{self.nom} ({self.get_categorie_display()})"
 
 
-class DepenseProprietaire(TimeStampedModel):
+class DepenseProprietaire(EtatInitialMixin, TimeStampedModel):
     """Dépenses et charges payées par le propriétaire"""
 
     # Immeuble concerné (peut être null pour dépenses globales)
@@ -396,6 +400,12 @@ class DepenseProprietaire(TimeStampedModel):
             models.Index(fields=['date_depense']),
             models.Index(fields=['statut']),
             models.Index(fields=['immeuble', 'date_depense']),
+            # Dépenses à répartir entre les appartements (repartition.py)
+            models.Index(
+                fields=['appartement', 'date_depense'],
+                condition=models.Q(repartissable=True),
+                name='depense_repartissable_appt_idx'
+            ),
         ]
 
     def __str__(self):
@@ -507,6 +517,79 @@ class RepartitionDepense(TimeStampedModel):
         return f"{self.depense.designation} - {self.appartement} : {self.montant}€"
 
 
+# =============================================================================
+# MODÈLE POUR LA RÉGULARISATION ANNUELLE DES CHARGES
+# =============================================================================
+
+class RegularisationCharges(TimeStampedModel):
+    """Décompte annuel de régularisation des charges d'un contrat"""
+
+    contrat = models.ForeignKey(
+        'contrats.Contrats',
+        on_delete=models.CASCADE,
+        related_name='regularisations'
+    )
+
+    annee = models.PositiveSmallIntegerField(verbose_name="Année régularisée")
+
+    # Période d'occupation retenue dans l'année
+    periode_debut = models.DateField(verbose_name="Début d'occupation")
+    periode_fin = models.DateField(verbose_name="Fin d'occupation")
+    jours_occupation = models.PositiveSmallIntegerField(verbose_name="Jours d'occupation")
+
+    # Montants
+    provisions_versees = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name="Provisions sur charges versées"
+    )
+    charges_reelles = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name="Charges réelles imputées"
+    )
+    solde = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name="Solde",
+        help_text="Positif : complément dû par le locataire, négatif : trop-perçu à rembourser"
+    )
+
+    # Statut
+    statut = models.CharField(
+        max_length=20,
+        choices=[
+            ('calculee', 'Calculée'),
+            ('facturee', 'Facturée au locataire'),
+            ('reglee', 'Réglée'),
+        ],
+        default='calculee'
+    )
+
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-annee', 'contrat']
+        unique_together = ['contrat', 'annee']
+        verbose_name = "Régularisation des charges"
+        verbose_name_plural = "Régularisations des charges"
+
+    def __str__(self):
+        return f"Régularisation {self.annee} - {self.contrat} : {self.solde}€"
+
+    @property
+    def sens(self):
+        """Sens de l'écriture d'équilibrage"""
+        if self.solde > 0:
+            return 'a_payer'
+        if self.solde < 0:
+            return 'a_rembourser'
+        return 'equilibre'
+
+
 # =============================================================================
 # MODÈLE POUR LES RAPPELS DE PAIEMENT
 # =============================================================================
@@ -601,9 +684,21 @@ class RappelPaiement(TimeStampedModel):
         ordering = ['-date_envoi']
         verbose_name = "Rappel de paiement"
         verbose_name_plural = "Rappels de paiement"
+        indexes = [
+            # Index partiel : seuls les rappels en cours (relances.STATUTS_OUVERTS)
+            # sont recherchés par contrat lors de la détection des impayés
+            models.Index(
+                fields=['contrat', '-date_envoi', '-id'],
+                condition=models.Q(statut__in=['envoye', 'sans_reponse', 'contentieux']),
+                name='rappel_ouvert_contrat_idx'
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.get_type_rappel_display()} - {self.contrat.locataire.nom_complet} - {self.date_envoi}"
+        # ✅ CORRECTION : utiliser get_locataire_principal()
+        locataire = self.contrat.get_locataire_principal()
+        nom = locataire.nom_complet if locataire else "Sans locataire"
+        return f"{self.get_type_rappel_display()} - {nom} - {self.date_envoi}"
 
     @property
     def total_du(self):
@@ -615,6 +710,45 @@ class RappelPaiement(TimeStampedModel):
 # MODÈLE POUR LES STATISTIQUES ET RAPPORTS
 # =============================================================================
 
+class StatistiqueMensuelle(models.Model):
+    """Agrégats financiers d'un immeuble pour un mois (maintenus par paiements/statistiques.py)"""
+
+    immeuble = models.ForeignKey(
+        'immeuble.Immeuble',
+        on_delete=models.CASCADE,
+        related_name='statistiques_mensuelles'
+    )
+    mois = models.DateField(verbose_name="Mois", help_text="Premier jour du mois")
+
+    # Revenus
+    loyers_percus = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    charges_percues = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    # Dépenses
+    depenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    # Reste dû sur les échéances du mois (attendu moins payé, par contrat), échues ou non :
+    # la part impayée se déduit à la lecture (voir StatistiqueManager.impayes)
+    reste_du = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    derniere_echeance = models.DateField(
+        null=True, blank=True,
+        help_text="Dernière échéance du mois portant un reste dû"
+    )
+
+    # L'occupation n'est pas dupliquée ici : voir immeuble.OccupationMensuelle
+
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-mois', 'immeuble']
+        unique_together = ['immeuble', 'mois']
+        verbose_name = "Statistique mensuelle"
+        verbose_name_plural = "Statistiques mensuelles"
+
+    def __str__(self):
+        return f"{self.immeuble} - {self.mois.strftime('%m/%Y')}"
+
+
 class RapportFinancier(TimeStampedModel):
     """Rapports financiers périodiques"""
 
@@ -0,0 +1,221 @@
+# paiements/previsions.py
+import hashlib
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+
+from contrats.models import Contrats, IndiceIRL
+from .models import DepenseProprietaire, TypeDepense
+from .statistiques import ajouter_mois
+
+
+# Délai de préavis du locataire (bail vide) : fin d'occupation après la date du préavis
+DELAI_PREAVIS_MOIS = 3
+
+# Horizon de prévision accepté
+MOIS_MIN, MOIS_MAX = 1, 36
+
+COMPOSANTES = ['loyers', 'charges', 'depenses']
+
+
+def index_mois(jour):
+    """Rang absolu du mois de `jour` (arithmétique des dates en entiers)"""
+    return jour.year * 12 + jour.month - 1
+
+
+def arrondi(montant):
+    return montant.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+class PrevisionManager:
+    """
+    Prévision de trésorerie mensuelle : loyers et charges des contrats actifs, dépenses récurrentes
+
+    Toutes les dates sont ramenées à des rangs de mois entiers. Chaque
+    contrat n'ajoute que quelques variations à un tableau de différences
+    par immeuble (début, révisions IRL, fin) ; une somme cumulée donne
+    ensuite les montants de chaque mois. Le coût est proportionnel au
+    nombre de contrats plus le nombre de mois, en une passe sur le parc.
+    """
+
+    @staticmethod
+    def taux_irl_annuel():
+        """Variation sur un an du dernier IRL publié (0 sans historique)"""
+        dernier = IndiceIRL.objects.order_by('-annee', '-trimestre').first()
+        if dernier is None:
+            return Decimal('0')
+        precedent = IndiceIRL.objects.filter(annee=dernier.annee - 1, trimestre=dernier.trimestre).first()
+        if precedent is None or not precedent.valeur:
+            return Decimal('0')
+        return dernier.valeur / precedent.valeur - 1
+
+    @staticmethod
+    def dernier_mois(contrat):
+        """Rang du dernier mois facturé : fin effective, fin prévue ou fin du préavis (None = sans terme)"""
+        fins = []
+        fin = contrat['date_fin_effective'] or contrat['date_fin']
+        if fin:
+            fins.append(index_mois(fin))
+        if contrat['preavis_donne'] and contrat['date_preavis']:
+            fins.append(index_mois(contrat['date_preavis']) + DELAI_PREAVIS_MOIS)
+        return min(fins) if fins else None
+
+    @staticmethod
+    def calculer(debut, nombre_mois=12, taux_irl=None):
+        """
+        Projette les flux de trésorerie de chaque immeuble, mois par mois
+
+        Un contrat rapporte chaque mois de son début à sa fin (la fin prévue
+        n'est pas reconduite). Le loyer est revalorisé à chaque date de
+        révision annuelle du taux IRL. Les dépenses des types récurrents
+        des douze derniers mois se répètent au même mois ; les dépenses
+        déjà saisies pour la période sont reprises telles quelles et
+        remplacent la répétition du même type, immeuble et mois.
+
+        Args:
+            debut: Premier mois de la prévision
+            nombre_mois: Horizon (1 à 36 mois)
+            taux_irl: Revalorisation annuelle (défaut : variation du dernier IRL)
+
+        Returns:
+            dict: 'mois' (premiers jours), 'immeubles' {immeuble_id: {composante: [montants]}},
+            'total' {composante: [montants]}, 'solde' [montants], 'taux_irl'
+        """
+        if not MOIS_MIN <= nombre_mois <= MOIS_MAX:
+            raise ValueError(f"Horizon de prévision entre {MOIS_MIN} et {MOIS_MAX} mois")
+        if taux_irl is None:
+            taux_irl = PrevisionManager.taux_irl_annuel()
+
+        debut = debut.replace(day=1)
+        origine = index_mois(debut)
+        fin_periode = ajouter_mois(debut, nombre_mois)
+        # Tableaux de différences : une case de plus pour les fins de contrat
+        differences = {}
+
+        def tableau(immeuble_id, composante):
+            par_composante = differences.setdefault(immeuble_id, {})
+            if composante not in par_composante:
+                par_composante[composante] = [Decimal('0')] * (nombre_mois + 1)
+            return par_composante[composante]
+
+        # Loyers et charges des contrats actifs
+        for contrat in Contrats.objects.filter(actif=True, date_debut__lt=fin_periode).values(
+            'appartement__immeuble', 'date_debut', 'date_fin', 'date_fin_effective', 'preavis_donne',
+            'date_preavis', 'date_revision', 'loyer_mensuel', 'charges_mensuelles'
+        ):
+            fin = PrevisionManager.dernier_mois(contrat)
+            premier = max(index_mois(contrat['date_debut']) - origine, 0)
+            dernier = nombre_mois - 1 if fin is None else min(fin - origine, nombre_mois - 1)
+            if dernier < premier:
+                continue
+
+            immeuble_id = contrat['appartement__immeuble']
+            charges = contrat['charges_mensuelles'] or Decimal('0')
+            tableau(immeuble_id, 'charges')[premier] += charges
+            tableau(immeuble_id, 'charges')[dernier + 1] -= charges
+
+            loyer = contrat['loyer_mensuel'] or Decimal('0')
+            loyers = tableau(immeuble_id, 'loyers')
+            loyers[premier] += loyer
+            if contrat['date_revision'] and loyer and taux_irl:
+                # Révisions annuelles : chaque échéance ajoute l'écart avec le loyer précédent
+                revision = index_mois(contrat['date_revision']) - origine
+                while revision <= dernier:
+                    nouveau_loyer = arrondi(loyer * (1 + taux_irl))
+                    loyers[max(revision, premier)] += nouveau_loyer - loyer
+                    loyer = nouveau_loyer
+                    revision += 12
+            loyers[dernier + 1] -= loyer
+
+        # Dépenses déjà saisies sur la période
+        saisies = set()
+        for depense in DepenseProprietaire.objects.annotate(
+            immeuble_effectif=Coalesce('immeuble', 'appartement__immeuble')
+        ).filter(
+            immeuble_effectif__isnull=False,
+            date_depense__gte=debut,
+            date_depense__lt=fin_periode
+        ).exclude(statut='annulee').values('immeuble_effectif', 'type_depense', 'date_depense', 'montant_ttc'):
+            rang = index_mois(depense['date_depense']) - origine
+            depenses = tableau(depense['immeuble_effectif'], 'depenses')
+            depenses[rang] += depense['montant_ttc']
+            depenses[rang + 1] -= depense['montant_ttc']
+            saisies.add((depense['immeuble_effectif'], depense['type_depense'], rang))
+
+        # Dépenses récurrentes des douze derniers mois, répétées d'année en année
+        for depense in DepenseProprietaire.objects.annotate(
+            immeuble_effectif=Coalesce('immeuble', 'appartement__immeuble')
+        ).filter(
+            immeuble_effectif__isnull=False,
+            type_depense__recurrent=True,
+            type_depense__actif=True,
+            date_depense__gte=ajouter_mois(debut, -12),
+            date_depense__lt=debut
+        ).exclude(statut='annulee').values('immeuble_effectif', 'type_depense', 'date_depense', 'montant_ttc'):
+            depenses = tableau(depense['immeuble_effectif'], 'depenses')
+            for rang in range(index_mois(depense['date_depense']) - origine + 12, nombre_mois, 12):
+                if (depense['immeuble_effectif'], depense['type_depense'], rang) not in saisies:
+                    depenses[rang] += depense['montant_ttc']
+                    depenses[rang + 1] -= depense['montant_ttc']
+
+        # Sommes cumulées : montant de chaque mois
+        immeubles = {
+            immeuble_id: {
+                composante: list(accumulate(par_composante.get(composante, [Decimal('0')] * (nombre_mois + 1))))[:nombre_mois]
+                for composante in COMPOSANTES
+            }
+            for immeuble_id, par_composante in differences.items()
+        }
+        total = {
+            composante: [sum(montants, Decimal('0')) for montants in zip(
+                *(flux[composante] for flux in immeubles.values())
+            )] or [Decimal('0')] * nombre_mois
+            for composante in COMPOSANTES
+        }
+
+        return {
+            'mois': [ajouter_mois(debut, rang) for rang in range(nombre_mois)],
+            'immeubles': immeubles,
+            'total': total,
+            'solde': [
+                loyers + charges - depenses
+                for loyers, charges, depenses in zip(total['loyers'], total['charges'], total['depenses'])
+            ],
+            'taux_irl': taux_irl,
+        }
+
+    @staticmethod
+    def empreinte():
+        """
+        État des données sources : change à chaque création, modification
+        ou suppression de contrat, de dépense, de type de dépense ou d'indice
+        """
+        contrats = Contrats.objects.aggregate(nombre=Count('id'), maj=Max('updated_at'))
+        depenses = DepenseProprietaire.objects.aggregate(nombre=Count('id'), maj=Max('updated_at'))
+        types = list(TypeDepense.objects.filter(recurrent=True, actif=True).order_by('id').values_list('id', flat=True))
+        indices = IndiceIRL.objects.aggregate(nombre=Count('id'), dernier=Max('date_publication'))
+        etat = (contrats['nombre'], contrats['maj'], depenses['nombre'], depenses['maj'], types, indices['nombre'], indices['dernier'])
+        return hashlib.sha1(repr(etat).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def prevoir(debut=None, nombre_mois=12, taux_irl=None):
+        """
+        Prévision mise en cache tant que les données sources n'ont pas changé
+
+        La clé de cache contient l'empreinte des données : une modification,
+        y compris par bulk_update (les révisions IRL renseignent updated_at),
+        rend l'ancienne entrée inaccessible sans invalidation explicite ;
+        elle expire après PREVISIONS_CACHE_DUREE secondes.
+        """
+        debut = (debut or date.today()).replace(day=1)
+        cle = f"previsions:{debut}:{nombre_mois}:{taux_irl}:{PrevisionManager.empreinte()}"
+        prevision = cache.get(cle)
+        if prevision is None:
+            prevision = PrevisionManager.calculer(debut, nombre_mois, taux_irl)
+            cache.set(cle, prevision, settings.PREVISIONS_CACHE_DUREE)
+        return prevision
@@ -0,0 +1,171 @@
+# paiements/rappel_pdf.py
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib import colors
+from io import BytesIO
+
+
+MOIS_FR = [
+    '', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+    'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'
+]
+
+# Corps de la lettre selon le niveau de relance
+TEXTES_RAPPEL = {
+    'premier': (
+        "Sauf erreur ou omission de notre part, nous n'avons pas reçu le règlement "
+        "des sommes détaillées ci-dessous. Il s'agit probablement d'un oubli : nous vous "
+        "remercions de bien vouloir régulariser la situation avant le {date_limite}."
+    ),
+    'deuxieme': (
+        "Malgré notre précédent rappel, les sommes détaillées ci-dessous restent impayées. "
+        "Nous vous demandons de procéder à leur règlement avant le {date_limite}."
+    ),
+    'mise_demeure': (
+        "Par la présente, nous vous mettons en demeure de régler les sommes détaillées "
+        "ci-dessous avant le {date_limite}. À défaut, nous nous verrons contraints d'engager "
+        "une procédure de recouvrement et de mettre en œuvre la clause résolutoire du bail."
+    ),
+    'contentieux': (
+        "Nos relances étant restées sans effet, le dossier est transmis pour recouvrement "
+        "contentieux. Les sommes détaillées ci-dessous restent exigibles, augmentées des frais "
+        "de procédure."
+    ),
+}
+
+
+def generer_lettre(donnees):
+    """
+    Point d'entrée utilisable par un pool de processus
+
+    Les données sont un dictionnaire simple (pas d'instance de modèle) afin de
+    pouvoir être transmises à un autre processus sans accès à la base.
+    """
+    return RappelPDFGenerator(donnees).generate_pdf()
+
+
+class RappelPDFGenerator:
+    """Générateur de PDF pour les lettres de rappel de paiement"""
+
+    def __init__(self, donnees):
+        self.donnees = donnees
+        self.styles = getSampleStyleSheet()
+        self.styles.add(ParagraphStyle(
+            name='CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=14,
+            textColor=colors.HexColor('#2c3e50'),
+            spaceAfter=10,
+            fontName='Helvetica-Bold'
+        ))
+        self.styles.add(ParagraphStyle(
+            name='CustomNormal',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            spaceAfter=6,
+            leading=13,
+            fontName='Helvetica'
+        ))
+
+    def generate_pdf(self):
+        """Génère le PDF de la lettre de rappel"""
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            topMargin=1.5 * cm,
+            bottomMargin=1.5 * cm,
+            leftMargin=2 * cm,
+            rightMargin=2 * cm
+        )
+
+        story = []
+        story.extend(self._create_header())
+        story.append(Spacer(1, 30))
+        story.append(Paragraph(self.donnees['titre'].upper(), self.styles['CustomTitle']))
+        story.append(Spacer(1, 10))
+        story.extend(self._create_body())
+        story.append(Spacer(1, 15))
+        story.extend(self._create_amounts_table())
+        story.append(Spacer(1, 30))
+        story.append(Paragraph(
+            f"Fait à {self.donnees['ville']}, le {self.donnees['date_envoi'].strftime('%d/%m/%Y')}",
+            self.styles['CustomNormal']
+        ))
+
+        doc.build(story)
+
+        pdf_content = buffer.getvalue()
+        buffer.close()
+
+        return pdf_content
+
+    def _create_header(self):
+        """Expéditeur à gauche, destinataire(s) à droite"""
+        proprietaire = self.donnees.get('proprietaire')
+        if proprietaire:
+            owner_text = (
+                f"<b>{proprietaire['nom']}</b><br/>"
+                f"Tél: {proprietaire['telephone']}<br/>"
+                f"{proprietaire['email']}"
+            )
+        else:
+            owner_text = "<b>PROPRIÉTAIRE</b>"
+
+        locataires = self.donnees['locataires'] or ["Locataire"]
+        tenant_text = "<br/>".join(f"<b>{nom}</b>" for nom in locataires)
+        tenant_text += (
+            f"<br/>{self.donnees['adresse']}<br/>"
+            f"Appartement {self.donnees['appartement']}<br/>"
+            f"{self.donnees['code_postal']} {self.donnees['ville']}"
+        )
+
+        header_table = Table(
+            [[Paragraph(owner_text, self.styles['CustomNormal']),
+              Paragraph(tenant_text, self.styles['CustomNormal'])]],
+            colWidths=[9 * cm, 8 * cm]
+        )
+        header_table.setStyle(TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]))
+        return [header_table]
+
+    def _create_body(self):
+        """Texte de la lettre selon le niveau de relance"""
+        texte = TEXTES_RAPPEL[self.donnees['type_rappel']].format(
+            date_limite=self.donnees['date_limite'].strftime('%d/%m/%Y')
+            if self.donnees.get('date_limite') else "dès que possible"
+        )
+        return [
+            Paragraph("Madame, Monsieur,", self.styles['CustomNormal']),
+            Paragraph(texte, self.styles['CustomNormal']),
+        ]
+
+    def _create_amounts_table(self):
+        """Détail des échéances impayées"""
+        data = [["Échéance", "Montant attendu", "Montant réglé", "Reste dû"]]
+        for ligne in self.donnees['echeances']:
+            data.append([
+                f"{MOIS_FR[ligne['mois'].month]} {ligne['mois'].year}",
+                f"{float(ligne['attendu']):.2f} €",
+                f"{float(ligne['paye']):.2f} €",
+                f"{float(ligne['du']):.2f} €",
+            ])
+        if self.donnees['penalites']:
+            data.append(["Pénalités de retard", "", "", f"{float(self.donnees['penalites']):.2f} €"])
+        data.append(["TOTAL DÛ", "", "", f"{float(self.donnees['total']):.2f} €"])
+
+        table = Table(data, colWidths=[5 * cm, 4 * cm, 4 * cm, 4 * cm])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ecf0f1')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7')),
+        ]))
+        return [table]
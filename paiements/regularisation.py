@@ -0,0 +1,184 @@
+# paiements/regularisation.py
+from decimal import Decimal
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Q, Sum, Min, Max, Count
+
+from contrats.models import Contrats, ContratLocataire
+from .models import PaiementLocataire, RepartitionDepense, RegularisationCharges
+from .repartition import RepartitionManager
+
+
+class RegularisationManager:
+    """Régularisation annuelle des charges, calculée pour tous les contrats d'un immeuble"""
+
+    @staticmethod
+    def calculer_occupation(contrat, presences, debut, fin):
+        """
+        Période d'occupation d'un contrat bornée à [debut, fin]
+
+        L'entrée est la première date d'entrée d'un locataire sur le bail (à
+        défaut la date de début du contrat). La sortie est la date de fin
+        effective, sinon la dernière sortie si tous les locataires sont partis,
+        sinon la date de fin prévue.
+
+        Args:
+            contrat: Instance Contrats
+            presences: dict agrégé {'entree', 'sortie', 'presents'} ou None
+            debut, fin: bornes de l'année
+
+        Returns:
+            tuple: (date_debut, date_fin) ou None si aucune occupation
+        """
+        entree = contrat.date_debut
+        sortie = contrat.date_fin_effective
+
+        if presences:
+            entree = presences['entree'] or entree
+            if not sortie and presences['presents'] == 0 and presences['sortie']:
+                sortie = presences['sortie']
+
+        sortie = sortie or contrat.date_fin
+
+        occupation_debut = max(entree, debut)
+        occupation_fin = min(sortie, fin) if sortie else fin
+
+        if occupation_fin < occupation_debut:
+            return None
+        return occupation_debut, occupation_fin
+
+    @staticmethod
+    def regulariser_immeuble(immeuble, annee, enregistrer=True):
+        """
+        Calcule la régularisation des charges de tous les contrats d'un immeuble
+
+        Les charges réelles de chaque appartement (RepartitionDepense) sont
+        réparties entre ses contrats au prorata des jours d'occupation, la part
+        des jours vacants restant au propriétaire. Elles sont comparées aux
+        provisions effectivement encaissées (PaiementLocataire.charges).
+
+        Le nombre de requêtes est constant quel que soit le nombre de contrats.
+
+        Args:
+            immeuble: Instance Immeuble
+            annee: Année à régulariser
+            enregistrer: Enregistre les décomptes (False pour une simulation)
+
+        Returns:
+            dict: Décomptes calculés et contrats ignorés
+        """
+        debut = date(annee, 1, 1)
+        fin = date(annee, 12, 31)
+        jours_annee = (fin - debut).days + 1
+
+        contrats = list(
+            Contrats.objects.filter(
+                appartement__immeuble=immeuble,
+                date_debut__lte=fin
+            ).filter(
+                Q(date_fin_effective__isnull=True) | Q(date_fin_effective__gte=debut)
+            ).select_related('appartement')
+        )
+        contrat_ids = [c.id for c in contrats]
+
+        presences = {
+            p['contrat']: p
+            for p in ContratLocataire.objects.filter(
+                contrat_id__in=contrat_ids
+            ).values('contrat').annotate(
+                entree=Min('date_entree'),
+                sortie=Max('date_sortie'),
+                presents=Count('id', filter=Q(date_sortie__isnull=True))
+            )
+        }
+
+        provisions = dict(
+            PaiementLocataire.objects.filter(
+                contrat_id__in=contrat_ids,
+                mois__year=annee,
+                valide=True
+            ).values('contrat').annotate(total=Sum('charges')).values_list('contrat', 'total')
+        )
+
+        charges_appartements = dict(
+            RepartitionDepense.objects.filter(
+                appartement__immeuble=immeuble,
+                depense__date_depense__year=annee
+            ).exclude(
+                depense__statut='annulee'
+            ).values('appartement').annotate(total=Sum('montant')).values_list('appartement', 'total')
+        )
+
+        # Occupation de chaque contrat, regroupée par appartement
+        occupations = {}
+        par_appartement = {}
+        for contrat in contrats:
+            periode = RegularisationManager.calculer_occupation(
+                contrat, presences.get(contrat.id), debut, fin
+            )
+            if periode:
+                occupations[contrat.id] = periode
+                par_appartement.setdefault(contrat.appartement_id, []).append(contrat)
+
+        decomptes = []
+        for appartement_id, contrats_appartement in par_appartement.items():
+            jours = {
+                c.id: (occupations[c.id][1] - occupations[c.id][0]).days + 1
+                for c in contrats_appartement
+            }
+
+            # Les jours vacants forment une part à la charge du propriétaire
+            bases = dict(jours)
+            bases['vacance'] = max(0, jours_annee - sum(jours.values()))
+
+            # Un total négatif (régularisation fournisseur, correction) est réparti
+            # de la même façon : un trop-perçu s'ajoute au solde des locataires
+            charges = charges_appartements.get(appartement_id) or Decimal('0')
+            if charges != 0:
+                parts = RepartitionManager.calculer_parts(charges, bases)
+            else:
+                parts = {}
+
+            for contrat in contrats_appartement:
+                provisions_versees = provisions.get(contrat.id) or Decimal('0')
+                charges_reelles = parts.get(contrat.id, Decimal('0'))
+                decomptes.append(RegularisationCharges(
+                    contrat=contrat,
+                    annee=annee,
+                    periode_debut=occupations[contrat.id][0],
+                    periode_fin=occupations[contrat.id][1],
+                    jours_occupation=jours[contrat.id],
+                    provisions_versees=provisions_versees,
+                    charges_reelles=charges_reelles,
+                    solde=charges_reelles - provisions_versees,
+                ))
+
+        ignores = [c for c in contrats if c.id not in occupations]
+
+        if enregistrer:
+            with transaction.atomic():
+                # Les décomptes déjà facturés ou réglés ne sont jamais recalculés
+                figes = set(
+                    RegularisationCharges.objects.filter(
+                        contrat_id__in=contrat_ids,
+                        annee=annee
+                    ).exclude(statut='calculee').values_list('contrat_id', flat=True)
+                )
+                RegularisationCharges.objects.filter(
+                    contrat_id__in=contrat_ids,
+                    annee=annee,
+                    statut='calculee'
+                ).delete()
+                decomptes = [d for d in decomptes if d.contrat_id not in figes]
+                RegularisationCharges.objects.bulk_create(decomptes, batch_size=1000)
+
+        return {
+            'immeuble': immeuble,
+            'annee': annee,
+            'decomptes': decomptes,
+            'contrats_ignores': ignores,
+            'total_provisions': sum((d.provisions_versees for d in decomptes), Decimal('0')),
+            'total_charges': sum((d.charges_reelles for d in decomptes), Decimal('0')),
+            'total_solde': sum((d.solde for d in decomptes), Decimal('0')),
+        }
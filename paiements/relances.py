@@ -0,0 +1,332 @@
+# paiements/relances.py
+import calendar
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Min, F
+from django.utils import timezone
+
+from contrats.models import Contrats, ContratLocataire, historique_loyers, loyer_en_vigueur
+from .models import PaiementLocataire, RappelPaiement
+from .rappel_pdf import generer_lettre
+
+
+# Ordre d'escalade des relances
+NIVEAUX_RAPPEL = ['premier', 'deuxieme', 'mise_demeure', 'contentieux']
+
+# Statuts d'un rappel encore en cours (soldé automatiquement si le contrat est à jour)
+STATUTS_OUVERTS = ['envoye', 'sans_reponse', 'contentieux']
+
+# Valeurs par défaut, surchargeables par settings.RELANCES
+CONFIGURATION_RELANCES = {
+    # Premier rappel : jours après l'échéance impayée la plus ancienne.
+    # Niveaux suivants : jours après le rappel précédent.
+    'DELAIS': {
+        'premier': 10,
+        'deuxieme': 15,
+        'mise_demeure': 15,
+        'contentieux': 30,
+    },
+    'DELAI_REPONSE': 8,
+    'TAUX_PENALITES': '0.00',
+    'MOIS_ANALYSES': 12,
+    'MODES_ENVOI': {
+        'premier': 'email',
+        'deuxieme': 'courrier',
+        'mise_demeure': 'recommande',
+        'contentieux': 'huissier',
+    },
+    'WORKERS': None,
+}
+
+
+def get_configuration():
+    """Configuration des relances (valeurs par défaut + settings.RELANCES)"""
+    configuration = dict(CONFIGURATION_RELANCES)
+    configuration.update(getattr(settings, 'RELANCES', {}))
+    return configuration
+
+
+def premier_jour_mois_precedent(jour, nombre):
+    """Premier jour du mois situé `nombre` mois avant celui de `jour`"""
+    index = jour.year * 12 + jour.month - 1 - nombre
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def iterer_mois(debut, fin):
+    """Premiers jours des mois de debut à fin inclus"""
+    mois = debut.replace(day=1)
+    while mois <= fin:
+        yield mois
+        mois = (mois + timedelta(days=32)).replace(day=1)
+
+
+def date_echeance(mois, jour_echeance):
+    """Date d'échéance d'un mois (bornée au dernier jour du mois)"""
+    dernier_jour = calendar.monthrange(mois.year, mois.month)[1]
+    return mois.replace(day=min(jour_echeance, dernier_jour))
+
+
+def rendre_lettres(donnees, workers=None):
+    """
+    Génère les PDF des lettres, en parallèle sur plusieurs processus
+
+    Args:
+        donnees: Liste de dictionnaires (voir RappelPDFGenerator)
+        workers: Nombre de processus (1 = séquentiel)
+
+    Returns:
+        list: Contenus PDF, dans l'ordre des données
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(donnees) <= 1:
+        return [generer_lettre(d) for d in donnees]
+
+    chunksize = max(1, len(donnees) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(generer_lettre, donnees, chunksize=chunksize))
+
+
+class RelanceManager:
+    """Détection des impayés et escalade des rappels de paiement"""
+
+    @staticmethod
+    def detecter_impayes(aujourd_hui=None, contrats=None):
+        """
+        Détecte les impayés de tous les contrats actifs en trois requêtes
+
+        Une échéance est impayée si la somme des paiements (non rejetés) du
+        mois est inférieure au loyer charges comprises en vigueur à cette
+        échéance (historique des révisions IRL) et que sa date d'échéance
+        est dépassée. Seuls les MOIS_ANALYSES derniers mois sont examinés.
+
+        Args:
+            aujourd_hui: Date de référence (défaut : aujourd'hui)
+            contrats: QuerySet de contrats à examiner (défaut : contrats actifs)
+
+        Returns:
+            list: Un dictionnaire par contrat en impayé
+        """
+        aujourd_hui = aujourd_hui or date.today()
+        configuration = get_configuration()
+        debut_fenetre = premier_jour_mois_precedent(aujourd_hui, configuration['MOIS_ANALYSES'] - 1)
+
+        dernier_rappel = RappelPaiement.objects.filter(
+            contrat=OuterRef('pk'),
+            statut__in=STATUTS_OUVERTS
+        ).order_by('-date_envoi', '-id')
+
+        if contrats is None:
+            contrats = Contrats.objects.filter(actif=True)
+
+        contrats = contrats.filter(
+            date_debut__lte=aujourd_hui,
+            loyer_mensuel__isnull=False
+        ).annotate(
+            dernier_type=Subquery(dernier_rappel.values('type_rappel')[:1]),
+            dernier_envoi=Subquery(dernier_rappel.values('date_envoi')[:1]),
+        ).select_related('appartement__immeuble', 'appartement__proprietaire')
+
+        paiements = {
+            (p['contrat'], p['mois']): p
+            for p in PaiementLocataire.objects.filter(
+                contrat__in=contrats.values('pk'),
+                mois__gte=debut_fenetre,
+                mois__lte=aujourd_hui
+            ).exclude(
+                statut='rejete'
+            ).values('contrat', 'mois').annotate(
+                total=Sum(F('loyer') + F('charges') + F('autres')),
+                paiement_id=Min('id')
+            )
+        }
+
+        revisions = historique_loyers(contrats.values('pk'))
+
+        impayes = []
+        for contrat in contrats:
+            fin = min(aujourd_hui, contrat.date_fin_effective or aujourd_hui)
+
+            echeances = []
+            for mois in iterer_mois(max(debut_fenetre, contrat.date_debut), fin):
+                echeance = max(date_echeance(mois, contrat.jour_echeance), contrat.date_debut)
+                if echeance >= aujourd_hui:
+                    continue
+
+                attendu = loyer_en_vigueur(
+                    contrat.loyer_mensuel, revisions.get(contrat.id, []), echeance
+                ) + (contrat.charges_mensuelles or 0)
+                paiement = paiements.get((contrat.id, mois))
+                paye = paiement['total'] if paiement else Decimal('0')
+                if paye < attendu:
+                    echeances.append({
+                        'mois': mois,
+                        'echeance': echeance,
+                        'attendu': attendu,
+                        'paye': paye,
+                        'du': attendu - paye,
+                        'paiement_id': paiement['paiement_id'] if paiement else None,
+                    })
+
+            if echeances:
+                impayes.append({
+                    'contrat': contrat,
+                    'echeances': echeances,
+                    'montant_du': sum(e['du'] for e in echeances),
+                    'jours_retard': (aujourd_hui - echeances[0]['echeance']).days,
+                    'dernier_type': contrat.dernier_type,
+                    'dernier_envoi': contrat.dernier_envoi,
+                })
+
+        return impayes
+
+    @staticmethod
+    def niveau_suivant(impaye, aujourd_hui, configuration):
+        """
+        Niveau de rappel à envoyer, ou None si aucun rappel n'est encore dû
+
+        Returns:
+            str: 'premier', 'deuxieme', 'mise_demeure', 'contentieux' ou None
+        """
+        delais = configuration['DELAIS']
+
+        if impaye['dernier_type'] is None:
+            if impaye['jours_retard'] >= delais['premier']:
+                return 'premier'
+            return None
+
+        index = NIVEAUX_RAPPEL.index(impaye['dernier_type'])
+        if index + 1 >= len(NIVEAUX_RAPPEL):
+            return None
+
+        suivant = NIVEAUX_RAPPEL[index + 1]
+        if (aujourd_hui - impaye['dernier_envoi']).days >= delais[suivant]:
+            return suivant
+        return None
+
+    @staticmethod
+    def calculer_penalites(echeances, aujourd_hui, configuration):
+        """
+        Intérêts de retard au taux annuel configuré
+
+        Chaque échéance impayée porte intérêt depuis sa propre date
+        d'échéance ; le total est arrondi au centime.
+        """
+        taux = Decimal(str(configuration['TAUX_PENALITES']))
+        return sum(
+            (e['du'] * taux * (aujourd_hui - e['echeance']).days / 365 for e in echeances),
+            Decimal('0')
+        ).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def get_donnees_lettres(rappels, impayes_par_contrat):
+        """Prépare les données (sans instance de modèle) des lettres de rappel"""
+        locataires = {}
+        for relation in ContratLocataire.objects.filter(
+            contrat_id__in=[r.contrat_id for r in rappels],
+            date_sortie__isnull=True
+        ).select_related('locataire').order_by('contrat_id', 'ordre'):
+            locataires.setdefault(relation.contrat_id, []).append(relation.locataire.nom_complet)
+
+        donnees = []
+        for rappel in rappels:
+            appartement = rappel.contrat.appartement
+            proprietaire = appartement.proprietaire
+            donnees.append({
+                'type_rappel': rappel.type_rappel,
+                'titre': rappel.get_type_rappel_display(),
+                'date_envoi': rappel.date_envoi,
+                'date_limite': rappel.date_limite_reponse,
+                'proprietaire': {
+                    'nom': proprietaire.nom_complet,
+                    'telephone': proprietaire.telephone,
+                    'email': proprietaire.email,
+                } if proprietaire else None,
+                'locataires': locataires.get(rappel.contrat_id, []),
+                'adresse': appartement.immeuble.adresse,
+                'code_postal': appartement.immeuble.code_postal,
+                'ville': appartement.immeuble.ville,
+                'appartement': appartement.numero,
+                'echeances': impayes_par_contrat[rappel.contrat_id]['echeances'],
+                'penalites': rappel.penalites,
+                'total': rappel.total_du,
+            })
+        return donnees
+
+    @staticmethod
+    def relancer(aujourd_hui=None, dry_run=False, avec_lettres=True, workers=None):
+        """
+        Exécute la campagne de relance quotidienne
+
+        Les rappels dus sont créés par bulk_create, les rappels en cours des
+        contrats redevenus à jour passent au statut « Réglé », puis les lettres
+        sont générées en parallèle et rattachées aux rappels.
+
+        Args:
+            aujourd_hui: Date de référence (défaut : aujourd'hui)
+            dry_run: Calcule les rappels sans rien enregistrer
+            avec_lettres: Génère les lettres PDF
+            workers: Nombre de processus pour les lettres (défaut : settings ou nb de CPU)
+
+        Returns:
+            dict: Rappels créés, nombre de rappels réglés et impayés détectés
+        """
+        aujourd_hui = aujourd_hui or date.today()
+        configuration = get_configuration()
+        impayes = RelanceManager.detecter_impayes(aujourd_hui)
+        impayes_par_contrat = {i['contrat'].id: i for i in impayes}
+
+        rappels = []
+        for impaye in impayes:
+            niveau = RelanceManager.niveau_suivant(impaye, aujourd_hui, configuration)
+            if not niveau:
+                continue
+
+            rappels.append(RappelPaiement(
+                contrat=impaye['contrat'],
+                paiement_locataire_id=impaye['echeances'][0]['paiement_id'],
+                type_rappel=niveau,
+                date_envoi=aujourd_hui,
+                date_limite_reponse=aujourd_hui + timedelta(days=configuration['DELAI_REPONSE']),
+                montant_du=impaye['montant_du'],
+                penalites=RelanceManager.calculer_penalites(impaye['echeances'], aujourd_hui, configuration),
+                statut='contentieux' if niveau == 'contentieux' else 'envoye',
+                mode_envoi=configuration['MODES_ENVOI'][niveau],
+            ))
+
+        regles = 0
+        if not dry_run:
+            with transaction.atomic():
+                regles = RappelPaiement.objects.filter(
+                    statut__in=STATUTS_OUVERTS,
+                    contrat__actif=True
+                ).exclude(
+                    contrat_id__in=list(impayes_par_contrat)
+                ).update(statut='regle', updated_at=timezone.now())
+
+                RappelPaiement.objects.bulk_create(rappels, batch_size=1000)
+
+            if avec_lettres and rappels:
+                donnees = RelanceManager.get_donnees_lettres(rappels, impayes_par_contrat)
+                contenus = rendre_lettres(donnees, workers or configuration['WORKERS'])
+
+                for rappel, contenu in zip(rappels, contenus):
+                    rappel.document.save(
+                        f"rappel_{rappel.type_rappel}_{rappel.contrat_id}_{aujourd_hui:%Y%m%d}.pdf",
+                        ContentFile(contenu),
+                        save=False
+                    )
+                RappelPaiement.objects.bulk_update(rappels, ['document'], batch_size=1000)
+
+        return {
+            'date': aujourd_hui,
+            'impayes': impayes,
+            'rappels': rappels,
+            'regles': regles,
+            'dry_run': dry_run,
+        }
@@ -0,0 +1,229 @@
+# paiements/repartition.py
+from decimal import Decimal
+from fractions import Fraction
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from immeuble.models import Appartement
+from .models import DepenseProprietaire, RepartitionDepense
+
+
+MODES_REPARTITION = ('surface', 'tantieme', 'forfait', 'personnalise')
+
+
+class RepartitionManager:
+    """Moteur de répartition des dépenses répartissables entre appartements"""
+
+    @staticmethod
+    def calculer_parts(montant, bases):
+        """
+        Répartit un montant proportionnellement à des bases (méthode du plus fort reste)
+
+        Le calcul est fait en centimes entiers : chaque part reçoit d'abord sa
+        partie entière, puis les centimes restants sont attribués aux plus forts
+        restes. La somme des parts est donc exactement égale au montant.
+
+        Args:
+            montant: Decimal à répartir (2 décimales)
+            bases: dict {cle: Decimal} des bases de calcul (> 0)
+
+        Returns:
+            dict: {cle: Decimal} parts arrondies au centime
+        """
+        bases = {cle: Fraction(base) for cle, base in bases.items() if base and base > 0}
+        if not bases:
+            raise ValueError("Aucune base de répartition positive")
+
+        total_bases = sum(bases.values())
+        centimes = int(Decimal(montant).quantize(Decimal('0.01')) * 100)
+
+        parts = {}
+        restes = []
+        for cle, base in bases.items():
+            exact = centimes * base / total_bases
+            entier = exact.numerator // exact.denominator
+            parts[cle] = entier
+            restes.append((exact - entier, cle))
+
+        # Attribution des centimes restants aux plus forts restes
+        # (à reste égal, l'ordre des clés départage de façon stable)
+        a_distribuer = centimes - sum(parts.values())
+        ordre = {cle: i for i, cle in enumerate(bases)}
+        restes.sort(key=lambda r: (-r[0], ordre[r[1]]))
+        for _, cle in restes[:a_distribuer]:
+            parts[cle] += 1
+
+        return {cle: Decimal(part) / 100 for cle, part in parts.items()}
+
+    @staticmethod
+    def get_bases(appartements, mode, bases=None):
+        """
+        Détermine la base de calcul de chaque appartement selon le mode
+
+        En modes surface et tantième, un appartement sans base renseignée
+        est une erreur : l'ignorer ferait payer sa part aux autres.
+
+        Args:
+            appartements: liste d'instances Appartement
+            mode: 'surface', 'tantieme', 'forfait' ou 'personnalise'
+            bases: dict {appartement_id: Decimal} pour le mode personnalisé
+
+        Returns:
+            dict: {appartement_id: Decimal}
+        """
+        if mode not in MODES_REPARTITION:
+            raise ValueError(f"Mode de répartition inconnu : {mode}")
+
+        if mode in ('surface', 'tantieme'):
+            attribut = 'surface' if mode == 'surface' else 'tantiemes'
+            manquants = [a.numero for a in appartements if not getattr(a, attribut)]
+            if manquants:
+                libelle = 'Surface' if mode == 'surface' else 'Tantièmes'
+                raise ValueError(f"{libelle} non renseigné(s) : appartement(s) {', '.join(manquants)}")
+            return {a.id: Decimal(getattr(a, attribut)) for a in appartements}
+        if mode == 'forfait':
+            return {a.id: Decimal('1') for a in appartements}
+
+        if bases is None:
+            raise ValueError("Le mode personnalisé nécessite des bases de calcul")
+        return {a.id: Decimal(bases[a.id]) for a in appartements if bases.get(a.id)}
+
+    @staticmethod
+    def construire_repartitions(depense, appartements, mode, bases=None):
+        """
+        Calcule (sans les enregistrer) les répartitions d'une dépense
+
+        Une dépense rattachée à un appartement lui est imputée en totalité ;
+        sinon elle est répartie entre les appartements de l'immeuble. Les
+        parts nulles sont omises (montant_ttc et RepartitionDepense.montant
+        sont strictement positifs).
+
+        Returns:
+            list: instances RepartitionDepense non sauvegardées
+        """
+        if depense.appartement_id:
+            appartements = [a for a in appartements if a.id == depense.appartement_id]
+            bases_calcul = {depense.appartement_id: Decimal('1')}
+        else:
+            bases_calcul = RepartitionManager.get_bases(appartements, mode, bases)
+
+        parts = RepartitionManager.calculer_parts(depense.montant_ttc, bases_calcul)
+        total_bases = sum(bases_calcul.values())
+
+        return [
+            RepartitionDepense(
+                depense=depense,
+                appartement_id=appartement_id,
+                montant=montant,
+                mode_repartition=mode,
+                base_calcul=bases_calcul[appartement_id],
+                coefficient=(bases_calcul[appartement_id] / total_bases).quantize(Decimal('0.0001')),
+            )
+            for appartement_id, montant in parts.items()
+            if montant > 0
+        ]
+
+    @staticmethod
+    def repartir_depenses(depenses, mode='surface', bases=None):
+        """
+        Répartit un ensemble de dépenses en une seule passe
+
+        Les appartements concernés sont chargés en une requête, les anciennes
+        répartitions sont supprimées puis recréées par bulk_create, le tout
+        dans une seule transaction.
+
+        Args:
+            depenses: QuerySet ou liste de DepenseProprietaire
+            mode: mode de répartition (voir MODES_REPARTITION)
+            bases: dict {appartement_id: Decimal} pour le mode personnalisé
+
+        Returns:
+            dict: Résultat avec répartitions créées et erreurs
+        """
+        depenses = list(depenses)
+        immeuble_ids = {d.immeuble_id for d in depenses if d.immeuble_id}
+        appartement_ids = {d.appartement_id for d in depenses if d.appartement_id}
+
+        appartements_par_immeuble = {}
+        for appartement in Appartement.objects.filter(
+            Q(immeuble_id__in=immeuble_ids) | Q(id__in=appartement_ids)
+        ).order_by('immeuble_id', 'numero', 'id'):
+            appartements_par_immeuble.setdefault(appartement.immeuble_id, []).append(appartement)
+        appartements_par_id = {
+            a.id: a for liste in appartements_par_immeuble.values() for a in liste
+        }
+
+        repartitions = []
+        depenses_reparties = []
+        erreurs = []
+
+        for depense in depenses:
+            if not depense.repartissable:
+                erreurs.append({'depense': depense, 'erreur': 'Dépense non répartissable'})
+                continue
+
+            if depense.appartement_id:
+                appartements = [appartements_par_id[depense.appartement_id]]
+            elif depense.immeuble_id:
+                appartements = appartements_par_immeuble.get(depense.immeuble_id, [])
+            else:
+                erreurs.append({'depense': depense, 'erreur': 'Aucun immeuble ni appartement'})
+                continue
+
+            try:
+                repartitions.extend(
+                    RepartitionManager.construire_repartitions(depense, appartements, mode, bases)
+                )
+                depenses_reparties.append(depense)
+            except ValueError as e:
+                erreurs.append({'depense': depense, 'erreur': str(e)})
+
+        with transaction.atomic():
+            RepartitionDepense.objects.filter(depense__in=depenses_reparties).delete()
+            RepartitionDepense.objects.bulk_create(repartitions, batch_size=1000)
+            DepenseProprietaire.objects.filter(
+                id__in=[d.id for d in depenses_reparties]
+            ).update(repartie=True, updated_at=timezone.now())
+
+        for depense in depenses_reparties:
+            depense.repartie = True
+
+        return {
+            'success': len(depenses_reparties),
+            'errors': len(erreurs),
+            'repartitions': repartitions,
+            'erreurs_detail': erreurs,
+        }
+
+    @staticmethod
+    def repartir_depense(depense, mode='surface', bases=None):
+        """Répartit une seule dépense (voir repartir_depenses)"""
+        return RepartitionManager.repartir_depenses([depense], mode=mode, bases=bases)
+
+    @staticmethod
+    def repartir_annee(immeuble, annee, mode='surface', bases=None, force=False):
+        """
+        Répartit toutes les dépenses répartissables d'un immeuble pour une année
+
+        Args:
+            immeuble: Instance Immeuble
+            annee: Année des dépenses (date_depense)
+            mode: mode de répartition
+            bases: dict {appartement_id: Decimal} pour le mode personnalisé
+            force: Recalcule aussi les dépenses déjà réparties
+
+        Returns:
+            dict: Résultat de repartir_depenses
+        """
+        depenses = DepenseProprietaire.objects.filter(
+            Q(immeuble=immeuble) | Q(appartement__immeuble=immeuble),
+            repartissable=True,
+            date_depense__year=annee,
+        ).exclude(statut='annulee')
+
+        if not force:
+            depenses = depenses.filter(repartie=False)
+
+        return RepartitionManager.repartir_depenses(depenses, mode=mode, bases=bases)
@@ -0,0 +1,53 @@
+# paiements/signals.py
+from datetime import date
+
+from contrats.models import Contrats, RevisionLoyer
+from src.agregats import suivre
+from .models import PaiementLocataire, DepenseProprietaire
+from .relances import iterer_mois
+from .statistiques import StatistiqueManager
+
+
+# =============================================================================
+# MAINTENANCE INCRÉMENTALE DES STATISTIQUES MENSUELLES
+# =============================================================================
+# Chaque modification invalide les cellules (immeuble, mois) concernées,
+# avant et après modification ; elles sont recalculées au commit
+# (voir src/agregats.py).
+
+def cellules_paiement(paiement):
+    return {(paiement.contrat.appartement.immeuble_id, paiement.mois.replace(day=1))}
+
+
+def cellules_depense(depense):
+    immeuble_id = depense.immeuble_id
+    if not immeuble_id and depense.appartement_id:
+        immeuble_id = depense.appartement.immeuble_id
+    return {(immeuble_id, depense.date_depense.replace(day=1))}
+
+
+def cellules_contrat(contrat):
+    """Mois couverts par le contrat, jusqu'au mois courant (partagé avec l'occupation)"""
+    fin = contrat.date_fin_effective or contrat.date_fin or date.today()
+    fin = min(fin, date.today())
+    immeuble_id = contrat.appartement.immeuble_id
+    return {(immeuble_id, mois) for mois in iterer_mois(contrat.date_debut, fin)}
+
+
+def cellules_revision(revision):
+    """Mois du contrat à partir de la révision (les précédents gardent l'ancien loyer)"""
+    debut = revision.date_revision.replace(day=1)
+    return {(immeuble_id, mois) for immeuble_id, mois in cellules_contrat(revision.contrat) if mois >= debut}
+
+
+# Champs des contrats lus par StatistiqueManager.calculer : une autre
+# modification (notes, documents...) ne recalcule rien
+CHAMPS_CONTRAT_STATISTIQUE = [
+    'appartement_id', 'actif', 'date_debut', 'date_fin', 'date_fin_effective',
+    'loyer_mensuel', 'charges_mensuelles', 'jour_echeance',
+]
+
+suivre(PaiementLocataire, StatistiqueManager, cellules_paiement)
+suivre(DepenseProprietaire, StatistiqueManager, cellules_depense)
+suivre(Contrats, StatistiqueManager, cellules_contrat, champs=CHAMPS_CONTRAT_STATISTIQUE)
+suivre(RevisionLoyer, StatistiqueManager, cellules_revision)
@@ -0,0 +1,269 @@
+# paiements/statistiques.py
+import calendar
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum, Count, Min, Max, Q
+from django.db.models.functions import Coalesce, TruncMonth
+
+from contrats.models import Contrats, historique_loyers, loyer_en_vigueur
+from immeuble.models import Immeuble, OccupationMensuelle
+from src.agregats import AgregatMensuel
+from .models import PaiementLocataire, DepenseProprietaire, StatistiqueMensuelle, RapportFinancier
+from .relances import iterer_mois, date_echeance
+
+
+# Nombre de mois couverts par chaque type de rapport
+DUREES_RAPPORT = {
+    'mensuel': 1,
+    'trimestriel': 3,
+    'annuel': 12,
+}
+
+CHAMPS_STATISTIQUE = [
+    'loyers_percus', 'charges_percues', 'depenses', 'reste_du', 'derniere_echeance', 'date_calcul',
+]
+
+
+def ajouter_mois(mois, nombre):
+    """Premier jour du mois situé `nombre` mois après `mois`"""
+    index = mois.year * 12 + mois.month - 1 + nombre
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def fin_de_mois(mois):
+    """Dernier jour du mois"""
+    return mois.replace(day=calendar.monthrange(mois.year, mois.month)[1])
+
+
+class StatistiqueManager(AgregatMensuel):
+    """Agrégats mensuels par immeuble et rapports financiers calculés à partir de ceux-ci"""
+
+    modele = StatistiqueMensuelle
+    champs = CHAMPS_STATISTIQUE
+
+    @staticmethod
+    def calculer(debut, fin, immeubles=None, aujourd_hui=None):
+        """
+        Calcule les statistiques de chaque (immeuble, mois) de la période
+
+        Le calcul est ensembliste : une requête par source (paiements,
+        dépenses, contrats, révisions) quel que soit le nombre d'immeubles et de mois.
+        L'occupation n'en fait pas partie : elle est matérialisée par
+        OccupationManager (OccupationMensuelle), seule source des taux.
+
+        Le montant attendu d'un mois est le loyer en vigueur à son échéance
+        (historique des révisions IRL) : une révision ne modifie pas les
+        mois qui la précèdent. Le reste dû ne dépend pas de la date du
+        calcul : une cellule reste juste tant que ses sources ne changent pas. Les impayés à une date
+        (échéances passées seulement) sont donnés par l'attribut `impayes`
+        des cellules calculées, qui n'est pas enregistré.
+
+        Args:
+            debut, fin: Premiers jours du premier et du dernier mois
+            immeubles: Liste d'identifiants d'immeubles (défaut : tous)
+            aujourd_hui: Date des impayés (défaut : aujourd'hui)
+
+        Returns:
+            dict: {(immeuble_id, mois): StatistiqueMensuelle non sauvegardée}
+        """
+        if immeubles is None:
+            immeubles = list(Immeuble.objects.values_list('id', flat=True))
+        fin_periode = fin_de_mois(fin)
+        aujourd_hui = aujourd_hui or date.today()
+
+        statistiques = {
+            (immeuble_id, mois): StatistiqueMensuelle(immeuble_id=immeuble_id, mois=mois)
+            for immeuble_id in immeubles
+            for mois in iterer_mois(debut, fin)
+        }
+
+        for statistique in statistiques.values():
+            statistique.impayes = Decimal('0')
+
+        # Paiements validés, par contrat et par mois
+        payes = {}
+        for ligne in PaiementLocataire.objects.filter(
+            contrat__appartement__immeuble_id__in=immeubles,
+            mois__gte=debut,
+            mois__lte=fin_periode,
+            valide=True
+        ).values('contrat', 'contrat__appartement__immeuble', 'mois').annotate(
+            loyers=Sum('loyer'),
+            charges=Sum('charges'),
+            autres=Sum('autres')
+        ):
+            statistique = statistiques.get((ligne['contrat__appartement__immeuble'], ligne['mois'].replace(day=1)))
+            if statistique:
+                statistique.loyers_percus += ligne['loyers']
+                statistique.charges_percues += ligne['charges']
+            cle = (ligne['contrat'], ligne['mois'].replace(day=1))
+            payes[cle] = payes.get(cle, Decimal('0')) + ligne['loyers'] + ligne['charges'] + ligne['autres']
+
+        # Dépenses (rattachées à l'immeuble ou à l'un de ses appartements)
+        for ligne in DepenseProprietaire.objects.annotate(
+            immeuble_effectif=Coalesce('immeuble', 'appartement__immeuble'),
+            mois_depense=TruncMonth('date_depense')
+        ).filter(
+            immeuble_effectif__in=immeubles,
+            date_depense__gte=debut,
+            date_depense__lte=fin_periode
+        ).exclude(statut='annulee').values('immeuble_effectif', 'mois_depense').annotate(
+            total=Sum('montant_ttc')
+        ):
+            statistique = statistiques.get((ligne['immeuble_effectif'], ligne['mois_depense']))
+            if statistique:
+                statistique.depenses += ligne['total']
+
+        # Reste dû, à partir des périodes des contrats et du loyer en vigueur chaque mois
+        contrats = Contrats.objects.filter(
+            appartement__immeuble_id__in=immeubles,
+            date_debut__lte=fin_periode
+        )
+        revisions = historique_loyers(contrats.values('pk'))
+        for contrat in contrats.values(
+            'id', 'actif', 'appartement__immeuble', 'date_debut', 'date_fin',
+            'date_fin_effective', 'loyer_mensuel', 'charges_mensuelles', 'jour_echeance'
+        ):
+            fin_contrat = contrat['date_fin_effective'] or contrat['date_fin']
+            if fin_contrat is None and not contrat['actif']:
+                continue
+
+            for mois in iterer_mois(max(debut, contrat['date_debut']), min(fin_periode, fin_contrat or fin_periode)):
+                cle = (contrat['appartement__immeuble'], mois)
+                echeance = max(date_echeance(mois, contrat['jour_echeance']), contrat['date_debut'])
+                attendu = (
+                    loyer_en_vigueur(contrat['loyer_mensuel'] or 0, revisions.get(contrat['id'], []), echeance)
+                    + (contrat['charges_mensuelles'] or 0)
+                )
+
+                manque = attendu - payes.get((contrat['id'], mois), Decimal('0'))
+                if manque > 0:
+                    statistique = statistiques[cle]
+                    statistique.reste_du += manque
+                    if statistique.derniere_echeance is None or echeance > statistique.derniere_echeance:
+                        statistique.derniere_echeance = echeance
+                    if echeance < aujourd_hui:
+                        statistique.impayes += manque
+
+        return statistiques
+
+    @staticmethod
+    def impayes(statistiques, aujourd_hui=None):
+        """
+        Impayés (échéances passées non réglées) d'un ensemble de cellules
+
+        Une cellule dont la dernière échéance est passée compte pour tout
+        son reste dû : le montant suit la date de lecture, sans recalcul
+        des cellules. Les rares cellules dont une échéance est encore à
+        venir (mois courant) sont recalculées à la volée, sans écriture.
+
+        Args:
+            statistiques: QuerySet de StatistiqueMensuelle
+            aujourd_hui: Date de lecture (défaut : aujourd'hui)
+
+        Returns:
+            Decimal: Montant des impayés
+        """
+        aujourd_hui = aujourd_hui or date.today()
+        totaux = statistiques.aggregate(
+            echus=Sum('reste_du', filter=Q(derniere_echeance__lt=aujourd_hui)),
+            en_cours=Count('id', filter=Q(derniere_echeance__gte=aujourd_hui)),
+        )
+        impayes = totaux['echus'] or Decimal('0')
+
+        if totaux['en_cours']:
+            cellules = set(statistiques.filter(derniere_echeance__gte=aujourd_hui).values_list('immeuble', 'mois'))
+            mois = [m for _, m in cellules]
+            calculees = StatistiqueManager.calculer(
+                min(mois), max(mois), immeubles=list({i for i, _ in cellules}), aujourd_hui=aujourd_hui
+            )
+            impayes += sum((calculees[cle].impayes for cle in cellules), Decimal('0'))
+
+        return impayes
+
+    @staticmethod
+    def reconstruire(debut=None, fin=None):
+        """
+        Recalcule toutes les statistiques de la période (reprise d'historique)
+
+        Par défaut, du premier mois présent dans les données jusqu'au mois courant.
+
+        Returns:
+            int: Nombre de cellules enregistrées
+        """
+        if debut is None:
+            bornes = [
+                Contrats.objects.aggregate(d=Min('date_debut'))['d'],
+                PaiementLocataire.objects.aggregate(d=Min('mois'))['d'],
+                DepenseProprietaire.objects.aggregate(d=Min('date_depense'))['d'],
+            ]
+            bornes = [b for b in bornes if b]
+            if not bornes:
+                return 0
+            debut = min(bornes)
+        if fin is None:
+            fin = max(
+                date.today(),
+                PaiementLocataire.objects.aggregate(d=Max('mois'))['d'] or date.today()
+            )
+
+        return StatistiqueManager.remplacer(debut.replace(day=1), fin.replace(day=1))
+
+    @staticmethod
+    def generer_rapport(periode_debut, type_rapport='mensuel', immeuble=None):
+        """
+        Calcule un RapportFinancier à partir des statistiques et de l'occupation mensuelles
+
+        Args:
+            periode_debut: Date du premier mois de la période
+            type_rapport: 'mensuel', 'trimestriel' ou 'annuel'
+            immeuble: Instance Immeuble (None = tous les immeubles)
+
+        Returns:
+            RapportFinancier: Rapport créé ou mis à jour
+        """
+        periode_debut = periode_debut.replace(day=1)
+        dernier_mois = ajouter_mois(periode_debut, DUREES_RAPPORT[type_rapport] - 1)
+
+        statistiques = StatistiqueMensuelle.objects.filter(
+            mois__gte=periode_debut,
+            mois__lte=dernier_mois
+        )
+        if immeuble:
+            statistiques = statistiques.filter(immeuble=immeuble)
+
+        totaux = statistiques.aggregate(
+            loyers=Sum('loyers_percus'),
+            charges=Sum('charges_percues'),
+            depenses=Sum('depenses'),
+        )
+        loyers = totaux['loyers'] or Decimal('0')
+        charges = totaux['charges'] or Decimal('0')
+        depenses = totaux['depenses'] or Decimal('0')
+
+        # Taux d'occupation lu dans l'occupation matérialisée (jours occupés / jours disponibles)
+        occupations = OccupationMensuelle.objects.filter(mois__gte=periode_debut, mois__lte=dernier_mois)
+        if immeuble:
+            occupations = occupations.filter(immeuble=immeuble)
+        jours = occupations.aggregate(occupes=Sum('jours_occupes'), disponibles=Sum('jours_disponibles'))
+        if jours['disponibles']:
+            taux_occupation = (Decimal(jours['occupes']) * 100 / jours['disponibles']).quantize(Decimal('0.01'))
+        else:
+            taux_occupation = Decimal('0')
+
+        rapport, _ = RapportFinancier.objects.update_or_create(
+            periode_debut=periode_debut,
+            periode_fin=fin_de_mois(dernier_mois),
+            immeuble=immeuble,
+            defaults={
+                'type_rapport': type_rapport,
+                'total_loyers_percus': loyers,
+                'total_charges_percues': charges,
+                'total_depenses': depenses,
+                'resultat_net': loyers + charges - depenses,
+                'taux_occupation': taux_occupation,
+                'total_impayes': StatistiqueManager.impayes(statistiques),
+            }
+        )
+        return rapport
@@ -1,3 +1,771 @@
-from django.test import TestCase
+# paiements/tests.py
 
-# Create your tests here.
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from decimal import Decimal
+from datetime import date
+
+from .models import (
+    RapportFinancier, TypeDepense, DepenseProprietaire, RepartitionDepense,
+    PaiementLocataire, RegularisationCharges, RappelPaiement, StatistiqueMensuelle
+)
+from .repartition import RepartitionManager
+from .regularisation import RegularisationManager
+from .relances import RelanceManager
+from .statistiques import StatistiqueManager, ajouter_mois
+from .previsions import PrevisionManager
+from contrats.models import Contrats
+from immeuble.models import Immeuble, Appartement
+from immeuble.occupation import OccupationManager
+from persons.models import Locataires
+from src.db import derniers_par
+from src.testing import BudgetRequetesMixin, portefeuille
+
+
+class RepartitionCalculTestCase(TestCase):
+    """Tests du calcul des parts (plus fort reste)"""
+
+    def test_parts_somme_exacte(self):
+        """La somme des parts est égale au montant"""
+        parts = RepartitionManager.calculer_parts(
+            Decimal('100.00'),
+            {1: Decimal('1'), 2: Decimal('1'), 3: Decimal('1')}
+        )
+        self.assertEqual(sum(parts.values()), Decimal('100.00'))
+        self.assertEqual(sorted(parts.values()), [Decimal('33.33'), Decimal('33.33'), Decimal('33.34')])
+
+    def test_parts_plus_fort_reste(self):
+        """Les centimes restants vont aux plus forts restes"""
+        parts = RepartitionManager.calculer_parts(
+            Decimal('10.00'),
+            {1: Decimal('45.5'), 2: Decimal('30'), 3: Decimal('24.5')}
+        )
+        # 4.55 / 3.00 / 2.45 : aucun reste
+        self.assertEqual(parts, {1: Decimal('4.55'), 2: Decimal('3.00'), 3: Decimal('2.45')})
+
+        parts = RepartitionManager.calculer_parts(
+            Decimal('0.05'),
+            {1: Decimal('2'), 2: Decimal('1'), 3: Decimal('1')}
+        )
+        self.assertEqual(parts, {1: Decimal('0.03'), 2: Decimal('0.01'), 3: Decimal('0.01')})
+
+    def test_parts_sans_base(self):
+        """Une répartition sans base positive est refusée"""
+        with self.assertRaises(ValueError):
+            RepartitionManager.calculer_parts(Decimal('10.00'), {1: Decimal('0')})
+
+
+class RepartitionManagerTestCase(TestCase):
+    """Tests du moteur de répartition des dépenses"""
+
+    def setUp(self):
+        self.immeuble = Immeuble.objects.create(
+            nom="Résidence Les Tilleuls",
+            adresse="1 rue des Tilleuls",
+            ville="Lyon",
+            code_postal="69001"
+        )
+        self.app1 = Appartement.objects.create(
+            immeuble=self.immeuble, numero="A1", etage=0,
+            surface=Decimal('45.00'), tantiemes=300
+        )
+        self.app2 = Appartement.objects.create(
+            immeuble=self.immeuble, numero="A2", etage=1,
+            surface=Decimal('62.50'), tantiemes=450
+        )
+        self.app3 = Appartement.objects.create(
+            immeuble=self.immeuble, numero="A3", etage=2,
+            surface=Decimal('30.00'), tantiemes=250
+        )
+        self.type_depense = TypeDepense.objects.create(nom="Eau froide")
+
+    def creer_depense(self, montant, **kwargs):
+        kwargs.setdefault('immeuble', self.immeuble)
+        kwargs.setdefault('date_depense', date(2025, 3, 1))
+        return DepenseProprietaire.objects.create(
+            type_depense=self.type_depense,
+            designation="Facture",
+            montant_ht=montant,
+            montant_ttc=montant,
+            fournisseur="Eau du Grand Lyon",
+            repartissable=True,
+            **kwargs
+        )
+
+    def test_repartition_surface(self):
+        """La répartition par surface couvre exactement le TTC"""
+        depense = self.creer_depense(Decimal('1000.00'))
+
+        resultat = RepartitionManager.repartir_depense(depense, mode='surface')
+
+        self.assertEqual(resultat['success'], 1)
+        repartitions = RepartitionDepense.objects.filter(depense=depense)
+        self.assertEqual(repartitions.count(), 3)
+        self.assertEqual(sum(r.montant for r in repartitions), Decimal('1000.00'))
+        self.assertEqual(repartitions.get(appartement=self.app2).montant, Decimal('454.55'))
+        depense.refresh_from_db()
+        self.assertTrue(depense.repartie)
+
+    def test_repartition_tantiemes(self):
+        """La répartition par tantièmes utilise les tantièmes"""
+        depense = self.creer_depense(Decimal('100.00'))
+
+        RepartitionManager.repartir_depense(depense, mode='tantieme')
+
+        montants = dict(
+            RepartitionDepense.objects.filter(depense=depense).values_list('appartement_id', 'montant')
+        )
+        self.assertEqual(montants, {
+            self.app1.id: Decimal('30.00'),
+            self.app2.id: Decimal('45.00'),
+            self.app3.id: Decimal('25.00'),
+        })
+
+    def test_base_manquante(self):
+        """Un appartement sans surface bloque la répartition au lieu d'être ignoré"""
+        Appartement.objects.filter(pk=self.app3.pk).update(surface=None)
+        depense = self.creer_depense(Decimal('1000.00'))
+
+        resultat = RepartitionManager.repartir_depense(depense, mode='surface')
+
+        self.assertEqual(resultat['success'], 0)
+        self.assertIn('A3', resultat['erreurs_detail'][0]['erreur'])
+        self.assertFalse(RepartitionDepense.objects.filter(depense=depense).exists())
+
+    def test_depense_appartement(self):
+        """Une dépense d'appartement lui est imputée en totalité"""
+        depense = self.creer_depense(Decimal('80.00'), immeuble=None, appartement=self.app3)
+
+        RepartitionManager.repartir_depense(depense, mode='surface')
+
+        repartition = RepartitionDepense.objects.get(depense=depense)
+        self.assertEqual(repartition.appartement, self.app3)
+        self.assertEqual(repartition.montant, Decimal('80.00'))
+
+    def test_depense_non_repartissable(self):
+        """Une dépense non répartissable est ignorée"""
+        depense = self.creer_depense(Decimal('50.00'))
+        depense.repartissable = False
+
+        resultat = RepartitionManager.repartir_depense(depense)
+
+        self.assertEqual(resultat['errors'], 1)
+        self.assertFalse(RepartitionDepense.objects.exists())
+
+    def test_repartir_annee(self):
+        """Toute une année est répartie en une passe"""
+        for mois in range(1, 13):
+            self.creer_depense(Decimal('99.99'), date_depense=date(2025, mois, 1))
+        self.creer_depense(Decimal('99.99'), date_depense=date(2024, 12, 1))
+
+        # Dépenses, appartements, suppression, insertion, mise à jour (+ savepoint)
+        with self.assertNumQueries(7):
+            resultat = RepartitionManager.repartir_annee(self.immeuble, 2025, mode='forfait')
+
+        self.assertEqual(resultat['success'], 12)
+        self.assertEqual(RepartitionDepense.objects.count(), 36)
+        for depense in DepenseProprietaire.objects.filter(date_depense__year=2025):
+            self.assertEqual(
+                sum(r.montant for r in depense.repartitions.all()),
+                Decimal('99.99')
+            )
+
+        # Les dépenses déjà réparties ne sont pas recalculées
+        resultat = RepartitionManager.repartir_annee(self.immeuble, 2025, mode='forfait')
+        self.assertEqual(resultat['success'], 0)
+
+
+class RegularisationManagerTestCase(TestCase):
+    """Tests de la régularisation annuelle des charges"""
+
+    def setUp(self):
+        self.immeuble = Immeuble.objects.create(
+            nom="Résidence Les Platanes",
+            adresse="2 rue des Platanes",
+            ville="Lyon",
+            code_postal="69002"
+        )
+        self.app1 = Appartement.objects.create(immeuble=self.immeuble, numero="B1", etage=0)
+        self.app2 = Appartement.objects.create(immeuble=self.immeuble, numero="B2", etage=1)
+        type_depense = TypeDepense.objects.create(nom="Chauffage collectif")
+
+        # Charges réelles 2025 : 1200€ pour B1, 730€ pour B2
+        for appartement, montant in ((self.app1, Decimal('1200.00')), (self.app2, Decimal('730.00'))):
+            depense = DepenseProprietaire.objects.create(
+                appartement=appartement,
+                type_depense=type_depense,
+                designation="Chauffage",
+                montant_ht=montant,
+                montant_ttc=montant,
+                date_depense=date(2025, 6, 30),
+                fournisseur="Engie",
+                repartissable=True
+            )
+            RepartitionManager.repartir_depense(depense)
+
+        # B1 occupé toute l'année
+        self.contrat_annee = self.creer_contrat(self.app1, date(2024, 1, 1), "annee")
+        # B2 : départ le 30/06, arrivée le 01/10 (vacance de juillet à septembre)
+        self.contrat_sortant = self.creer_contrat(
+            self.app2, date(2023, 1, 1), "sortant", date_fin_effective=date(2025, 6, 30)
+        )
+        self.contrat_entrant = self.creer_contrat(self.app2, date(2025, 10, 1), "entrant")
+
+        for mois in range(1, 13):
+            self.creer_paiement(self.contrat_annee, mois, Decimal('80.00'))
+        for mois in range(1, 7):
+            self.creer_paiement(self.contrat_sortant, mois, Decimal('50.00'))
+        for mois in range(10, 13):
+            self.creer_paiement(self.contrat_entrant, mois, Decimal('50.00'))
+
+    def creer_contrat(self, appartement, date_debut, nom, **kwargs):
+        contrat = Contrats.objects.create(
+            appartement=appartement,
+            date_debut=date_debut,
+            loyer_mensuel=Decimal('600.00'),
+            charges_mensuelles=Decimal('50.00'),
+            **kwargs
+        )
+        locataire = Locataires.objects.create(
+            nom=nom, prenom="Test", email=f"{nom}@example.com", telephone="0600000000"
+        )
+        contrat.ajouter_locataire(locataire, principal=True)
+        return contrat
+
+    def creer_paiement(self, contrat, mois, charges):
+        PaiementLocataire.objects.create(
+            contrat=contrat,
+            mois=date(2025, mois, 1),
+            loyer=Decimal('600.00'),
+            charges=charges,
+            date_paiement=date(2025, mois, 3)
+        )
+
+    def test_regularisation_immeuble(self):
+        """Chaque contrat reçoit sa part de charges au prorata de son occupation"""
+        resultat = RegularisationManager.regulariser_immeuble(self.immeuble, 2025)
+
+        decomptes = {d.contrat_id: d for d in RegularisationCharges.objects.all()}
+        self.assertEqual(len(decomptes), 3)
+
+        annee = decomptes[self.contrat_annee.id]
+        self.assertEqual(annee.jours_occupation, 365)
+        self.assertEqual(annee.provisions_versees, Decimal('960.00'))
+        self.assertEqual(annee.charges_reelles, Decimal('1200.00'))
+        self.assertEqual(annee.solde, Decimal('240.00'))
+
+        # 730€ pour 365 jours : 2€ par jour d'occupation
+        sortant = decomptes[self.contrat_sortant.id]
+        self.assertEqual(sortant.periode_fin, date(2025, 6, 30))
+        self.assertEqual(sortant.jours_occupation, 181)
+        self.assertEqual(sortant.charges_reelles, Decimal('362.00'))
+        self.assertEqual(sortant.solde, Decimal('62.00'))
+
+        entrant = decomptes[self.contrat_entrant.id]
+        self.assertEqual(entrant.periode_debut, date(2025, 10, 1))
+        self.assertEqual(entrant.charges_reelles, Decimal('184.00'))
+        self.assertEqual(entrant.solde, Decimal('34.00'))
+
+        self.assertEqual(resultat['total_solde'], Decimal('336.00'))
+
+    def test_charges_nettes_negatives(self):
+        """Des charges nettes négatives sont réparties, pas ignorées"""
+        RepartitionDepense.objects.filter(appartement=self.app2).update(montant=Decimal('-730.00'))
+
+        RegularisationManager.regulariser_immeuble(self.immeuble, 2025)
+
+        sortant = RegularisationCharges.objects.get(contrat=self.contrat_sortant)
+        self.assertEqual(sortant.charges_reelles, Decimal('-362.00'))
+        self.assertEqual(sortant.solde, Decimal('-662.00'))
+        self.assertEqual(sortant.sens, 'a_rembourser')
+
+    def test_nombre_requetes_constant(self):
+        """Le nombre de requêtes ne dépend pas du nombre de contrats"""
+        with self.assertNumQueries(4):
+            RegularisationManager.regulariser_immeuble(self.immeuble, 2025, enregistrer=False)
+
+        for numero in range(3, 8):
+            appartement = Appartement.objects.create(immeuble=self.immeuble, numero=f"B{numero}", etage=2)
+            contrat = self.creer_contrat(appartement, date(2025, 1, 1), f"loc{numero}")
+            self.creer_paiement(contrat, 1, Decimal('50.00'))
+
+        with self.assertNumQueries(4):
+            RegularisationManager.regulariser_immeuble(self.immeuble, 2025, enregistrer=False)
+
+    def test_decompte_facture_non_recalcule(self):
+        """Un décompte déjà facturé n'est pas écrasé"""
+        RegularisationManager.regulariser_immeuble(self.immeuble, 2025)
+        RegularisationCharges.objects.filter(contrat=self.contrat_annee).update(
+            statut='facturee', solde=Decimal('1.00')
+        )
+
+        RegularisationManager.regulariser_immeuble(self.immeuble, 2025)
+
+        self.assertEqual(RegularisationCharges.objects.count(), 3)
+        self.assertEqual(
+            RegularisationCharges.objects.get(contrat=self.contrat_annee).solde,
+            Decimal('1.00')
+        )
+
+
+class RelanceManagerTestCase(TestCase):
+    """Tests de la détection des impayés et de l'escalade des rappels"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        immeuble = Immeuble.objects.create(
+            nom="Résidence Les Érables",
+            adresse="3 rue des Érables",
+            ville="Lille",
+            code_postal="59000"
+        )
+        self.appartement = Appartement.objects.create(immeuble=immeuble, numero="E1", etage=1)
+        self.contrat = self.creer_contrat("Durand")
+
+        # Janvier payé, février impayé, mars partiellement payé
+        self.creer_paiement(self.contrat, 1, Decimal('600.00'), Decimal('50.00'))
+        self.creer_paiement(self.contrat, 3, Decimal('300.00'))
+
+    def creer_contrat(self, nom):
+        contrat = Contrats.objects.create(
+            appartement=self.appartement,
+            date_debut=date(2025, 1, 1),
+            loyer_mensuel=Decimal('600.00'),
+            charges_mensuelles=Decimal('50.00'),
+            jour_echeance=5
+        )
+        locataire = Locataires.objects.create(
+            nom=nom, prenom="Test", email=f"{nom}@example.com", telephone="0600000000"
+        )
+        contrat.ajouter_locataire(locataire, principal=True)
+        return contrat
+
+    def creer_paiement(self, contrat, mois, loyer, charges=Decimal('0')):
+        return PaiementLocataire.objects.create(
+            contrat=contrat,
+            mois=date(2025, mois, 1),
+            loyer=loyer,
+            charges=charges,
+            date_paiement=date(2025, mois, 3)
+        )
+
+    def test_detecter_impayes(self):
+        """Les échéances échues et non couvertes sont détectées"""
+        # Contrats, paiements et révisions de loyer
+        with self.assertNumQueries(3):
+            impayes = RelanceManager.detecter_impayes(date(2025, 3, 20))
+
+        self.assertEqual(len(impayes), 1)
+        impaye = impayes[0]
+        self.assertEqual([e['mois'] for e in impaye['echeances']], [date(2025, 2, 1), date(2025, 3, 1)])
+        self.assertEqual(impaye['montant_du'], Decimal('1000.00'))
+        self.assertEqual(impaye['jours_retard'], 43)
+
+    def test_echeance_non_echue(self):
+        """Une échéance du jour n'est pas encore un impayé"""
+        impayes = RelanceManager.detecter_impayes(date(2025, 2, 5))
+        self.assertEqual(impayes, [])
+
+    def test_escalade(self):
+        """Chaque contrat passe au niveau suivant après le délai configuré"""
+        resultat = RelanceManager.relancer(date(2025, 3, 20), workers=1)
+
+        self.assertEqual(len(resultat['rappels']), 1)
+        rappel = RappelPaiement.objects.get()
+        self.assertEqual(rappel.type_rappel, 'premier')
+        self.assertEqual(rappel.montant_du, Decimal('1000.00'))
+        self.assertTrue(rappel.document.name.endswith('.pdf'))
+        with rappel.document.open('rb') as f:
+            self.assertTrue(f.read(4) == b'%PDF')
+
+        # Délai du niveau suivant non écoulé
+        resultat = RelanceManager.relancer(date(2025, 3, 25), workers=1)
+        self.assertEqual(len(resultat['rappels']), 0)
+
+        resultat = RelanceManager.relancer(date(2025, 4, 4), workers=1, avec_lettres=False)
+        self.assertEqual(resultat['rappels'][0].type_rappel, 'deuxieme')
+
+        RelanceManager.relancer(date(2025, 4, 19), workers=1, avec_lettres=False)
+        RelanceManager.relancer(date(2025, 5, 19), workers=1, avec_lettres=False)
+        resultat = RelanceManager.relancer(date(2025, 7, 1), workers=1, avec_lettres=False)
+
+        self.assertEqual(resultat['rappels'], [])
+        self.assertEqual(
+            list(RappelPaiement.objects.order_by('date_envoi').values_list('type_rappel', flat=True)),
+            ['premier', 'deuxieme', 'mise_demeure', 'contentieux']
+        )
+
+    @override_settings(RELANCES={'TAUX_PENALITES': '0.10'})
+    def test_penalites(self):
+        """Les pénalités sont calculées au taux annuel configuré"""
+        resultat = RelanceManager.relancer(date(2025, 3, 20), avec_lettres=False)
+
+        # Chaque échéance depuis sa date : 650€ × 10 % × 43 / 365 + 350€ × 10 % × 15 / 365
+        self.assertEqual(resultat['rappels'][0].penalites, Decimal('9.10'))
+
+    def test_loyer_revise(self):
+        """Les mois antérieurs à une révision sont dus à l'ancien loyer"""
+        from contrats.models import IndiceIRL, RevisionLoyer
+
+        self.creer_paiement(self.contrat, 2, Decimal('600.00'), Decimal('50.00'))
+        PaiementLocataire.objects.filter(contrat=self.contrat, mois=date(2025, 3, 1)).update(
+            loyer=Decimal('600.00'), charges=Decimal('50.00')
+        )
+        RevisionLoyer.objects.create(
+            contrat=self.contrat,
+            date_revision=date(2025, 4, 1),
+            ancien_loyer=Decimal('600.00'),
+            nouveau_loyer=Decimal('610.00'),
+            ancien_indice=Decimal('140.00'),
+            nouvel_indice=IndiceIRL.objects.create(
+                annee=2025, trimestre=1, valeur=Decimal('142.33'), date_publication=date(2025, 3, 15)
+            ),
+        )
+        Contrats.objects.filter(pk=self.contrat.pk).update(loyer_mensuel=Decimal('610.00'))
+
+        # Janvier à mars réglés à 650€ : à jour
+        self.assertEqual(RelanceManager.detecter_impayes(date(2025, 4, 3)), [])
+
+        # Avril réglé à l'ancien montant : 10€ dus
+        self.creer_paiement(self.contrat, 4, Decimal('600.00'), Decimal('50.00'))
+        impaye, = RelanceManager.detecter_impayes(date(2025, 4, 20))
+        self.assertEqual(impaye['montant_du'], Decimal('10.00'))
+        self.assertEqual([e['mois'] for e in impaye['echeances']], [date(2025, 4, 1)])
+
+    def test_rappels_soldes(self):
+        """Les rappels en cours sont soldés quand le contrat est à jour"""
+        RelanceManager.relancer(date(2025, 3, 20), avec_lettres=False)
+
+        self.creer_paiement(self.contrat, 2, Decimal('600.00'), Decimal('50.00'))
+        PaiementLocataire.objects.filter(contrat=self.contrat, mois=date(2025, 3, 1)).update(
+            loyer=Decimal('600.00'), charges=Decimal('50.00')
+        )
+
+        resultat = RelanceManager.relancer(date(2025, 3, 25), avec_lettres=False)
+
+        self.assertEqual(resultat['regles'], 1)
+        self.assertEqual(RappelPaiement.objects.get().statut, 'regle')
+
+    def test_dry_run(self):
+        """La simulation ne crée aucun rappel"""
+        resultat = RelanceManager.relancer(date(2025, 3, 20), dry_run=True)
+
+        self.assertEqual(len(resultat['rappels']), 1)
+        self.assertFalse(RappelPaiement.objects.exists())
+
+    def test_rappel_str(self):
+        """Le libellé du rappel utilise le locataire principal"""
+        RelanceManager.relancer(date(2025, 3, 20), avec_lettres=False)
+
+        self.assertEqual(str(RappelPaiement.objects.get()), "Premier rappel - Test Durand - 2025-03-20")
+
+    def test_derniers_paiements(self):
+        """Le dernier paiement de chaque contrat est obtenu en une requête"""
+        autre = self.creer_contrat("Martin")
+        self.creer_paiement(autre, 2, Decimal('600.00'))
+
+        with self.assertNumQueries(1):
+            derniers = {
+                p.contrat_id: p.mois
+                for p in derniers_par(PaiementLocataire.objects.all(), 'contrat', '-mois', '-id')
+            }
+
+        self.assertEqual(derniers, {self.contrat.id: date(2025, 3, 1), autre.id: date(2025, 2, 1)})
+
+
+class StatistiqueManagerTestCase(TestCase):
+    """Tests des statistiques mensuelles et des rapports financiers"""
+
+    def setUp(self):
+        self.immeuble = Immeuble.objects.create(
+            nom="Résidence Les Saules",
+            adresse="4 rue des Saules",
+            ville="Rennes",
+            code_postal="35000"
+        )
+        self.app1 = Appartement.objects.create(immeuble=self.immeuble, numero="S1", etage=0)
+        Appartement.objects.create(immeuble=self.immeuble, numero="S2", etage=1)
+        self.contrat = Contrats.objects.create(
+            appartement=self.app1,
+            date_debut=date(2025, 1, 1),
+            loyer_mensuel=Decimal('600.00'),
+            charges_mensuelles=Decimal('50.00')
+        )
+        for mois in (1, 2):
+            PaiementLocataire.objects.create(
+                contrat=self.contrat,
+                mois=date(2025, mois, 1),
+                loyer=Decimal('600.00'),
+                charges=Decimal('50.00'),
+                date_paiement=date(2025, mois, 2)
+            )
+        DepenseProprietaire.objects.create(
+            appartement=self.app1,
+            type_depense=TypeDepense.objects.create(nom="Plomberie"),
+            designation="Fuite",
+            montant_ht=Decimal('200.00'),
+            montant_ttc=Decimal('200.00'),
+            date_depense=date(2025, 3, 12),
+            fournisseur="Plombier"
+        )
+
+    def get_statistique(self, mois):
+        return StatistiqueMensuelle.objects.get(immeuble=self.immeuble, mois=date(2025, mois, 1))
+
+    def test_reconstruire(self):
+        """La reconstruction produit une ligne par immeuble et par mois"""
+        nombre = StatistiqueManager.reconstruire(date(2025, 1, 1), date(2025, 3, 1))
+
+        self.assertEqual(nombre, 3)
+        janvier = self.get_statistique(1)
+        self.assertEqual(janvier.loyers_percus, Decimal('600.00'))
+        self.assertEqual(janvier.charges_percues, Decimal('50.00'))
+        mars = self.get_statistique(3)
+        self.assertEqual(mars.depenses, Decimal('200.00'))
+        self.assertEqual(mars.reste_du, Decimal('650.00'))
+        self.assertEqual(mars.derniere_echeance, date(2025, 3, 5))
+
+    def test_rapport_trimestriel(self):
+        """Un rapport trimestriel somme trois mois de statistiques"""
+        StatistiqueManager.reconstruire(date(2025, 1, 1), date(2025, 3, 1))
+        OccupationManager.reconstruire(date(2025, 1, 1), date(2025, 3, 1))
+
+        # Deux agrégats sur les statistiques, un sur l'occupation, puis update_or_create
+        # (lecture, écriture, savepoints)
+        with self.assertNumQueries(9):
+            rapport = StatistiqueManager.generer_rapport(date(2025, 1, 1), 'trimestriel')
+
+        self.assertEqual(rapport.periode_fin, date(2025, 3, 31))
+        self.assertIsNone(rapport.immeuble)
+        self.assertEqual(rapport.total_loyers_percus, Decimal('1200.00'))
+        self.assertEqual(rapport.total_charges_percues, Decimal('100.00'))
+        self.assertEqual(rapport.total_depenses, Decimal('200.00'))
+        self.assertEqual(rapport.resultat_net, Decimal('1100.00'))
+        self.assertEqual(rapport.taux_occupation, Decimal('50.00'))
+        self.assertEqual(rapport.total_impayes, Decimal('650.00'))
+
+        # Un second calcul met à jour le même rapport
+        StatistiqueManager.generer_rapport(date(2025, 1, 1), 'trimestriel')
+        self.assertEqual(RapportFinancier.objects.count(), 1)
+
+    def test_impayes_a_la_lecture(self):
+        """Les impayés suivent la date de lecture, sans recalcul des cellules"""
+        app2 = Appartement.objects.get(numero="S2")
+        Contrats.objects.create(
+            appartement=app2,
+            date_debut=date(2025, 3, 1),
+            loyer_mensuel=Decimal('500.00'),
+            jour_echeance=20
+        )
+        StatistiqueManager.reconstruire(date(2025, 1, 1), date(2025, 3, 1))
+        mars = StatistiqueMensuelle.objects.filter(mois=date(2025, 3, 1))
+
+        self.assertEqual(StatistiqueManager.impayes(mars, date(2025, 3, 1)), Decimal('0'))
+        # Le 10 mars, seule l'échéance du 5 est passée : le mois est recalculé sans écriture
+        with CaptureQueriesContext(connection) as requetes:
+            self.assertEqual(StatistiqueManager.impayes(mars, date(2025, 3, 10)), Decimal('650.00'))
+        self.assertFalse(any(
+            requete['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) for requete in requetes.captured_queries
+        ))
+        # En avril, les deux échéances sont passées : lecture du seul reste dû enregistré
+        with self.assertNumQueries(1):
+            self.assertEqual(StatistiqueManager.impayes(mars, date(2025, 4, 1)), Decimal('1150.00'))
+
+    def test_etat_precedent_sans_requete(self):
+        """L'état précédent vient des valeurs lues (from_db) : aucune lecture au save()"""
+        paiement = PaiementLocataire.objects.select_related('contrat__appartement').get(mois=date(2025, 1, 1))
+        paiement.mois = date(2025, 3, 1)
+        with CaptureQueriesContext(connection) as requetes, self.captureOnCommitCallbacks() as rappels:
+            paiement.save()
+        self.assertFalse(any(requete['sql'].startswith('SELECT') for requete in requetes.captured_queries))
+
+        for rappel in rappels:
+            rappel()
+        self.assertEqual(self.get_statistique(1).loyers_percus, Decimal('0.00'))
+        self.assertEqual(self.get_statistique(3).loyers_percus, Decimal('600.00'))
+
+    def test_contrat_champs_suivis(self):
+        """Seuls les champs lus par le calcul invalident les statistiques du contrat"""
+        contrat = Contrats.objects.select_related('appartement').get(pk=self.contrat.pk)
+        contrat.notes = "Relancé par téléphone"
+        with self.captureOnCommitCallbacks() as rappels:
+            contrat.save()
+        self.assertEqual(rappels, [])
+
+        contrat.charges_mensuelles = Decimal('60.00')
+        with self.captureOnCommitCallbacks() as rappels:
+            contrat.save()
+        self.assertTrue(rappels)
+
+    def test_mise_a_jour_incrementale(self):
+        """Un paiement met à jour la cellule de son mois au commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            paiement = PaiementLocataire.objects.create(
+                contrat=self.contrat,
+                mois=date(2025, 3, 1),
+                loyer=Decimal('600.00'),
+                charges=Decimal('50.00'),
+                date_paiement=date(2025, 3, 2)
+            )
+
+        mars = self.get_statistique(3)
+        self.assertEqual(mars.loyers_percus, Decimal('600.00'))
+        self.assertEqual(mars.reste_du, Decimal('0.00'))
+        self.assertIsNone(mars.derniere_echeance)
+        self.assertEqual(mars.depenses, Decimal('200.00'))
+
+        # Changement de mois : l'ancienne et la nouvelle cellule sont recalculées
+        with self.captureOnCommitCallbacks(execute=True):
+            paiement.mois = date(2025, 4, 1)
+            paiement.save()
+
+        self.assertEqual(self.get_statistique(3).loyers_percus, Decimal('0.00'))
+        self.assertEqual(self.get_statistique(4).loyers_percus, Decimal('600.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            paiement.delete()
+
+        self.assertEqual(self.get_statistique(4).loyers_percus, Decimal('0.00'))
+
+
+class PrevisionManagerTestCase(TestCase):
+    """Tests de la prévision de trésorerie"""
+
+    def setUp(self):
+        cache.clear()
+        self.immeuble = Immeuble.objects.create(
+            nom="Résidence Les Platanes", adresse="3 rue des Platanes", ville="Lyon", code_postal="69003"
+        )
+        app1 = Appartement.objects.create(immeuble=self.immeuble, numero="P1", etage=0)
+        app2 = Appartement.objects.create(immeuble=self.immeuble, numero="P2", etage=1)
+
+        # P1 : révision IRL en mars ; P2 : préavis donné en février (fin en mai)
+        self.contrat = Contrats.objects.create(
+            appartement=app1, date_debut=date(2024, 1, 1), date_revision=date(2026, 3, 15),
+            loyer_mensuel=Decimal('600.00'), charges_mensuelles=Decimal('50.00')
+        )
+        Contrats.objects.create(
+            appartement=app2, date_debut=date(2025, 6, 1), preavis_donne=True, date_preavis=date(2026, 2, 10),
+            loyer_mensuel=Decimal('500.00'), charges_mensuelles=Decimal('40.00')
+        )
+        Contrats.objects.create(
+            appartement=app2, date_debut=date(2020, 1, 1), date_fin=date(2025, 5, 31), actif=False,
+            loyer_mensuel=Decimal('450.00'), charges_mensuelles=Decimal('40.00')
+        )
+
+        assurance = TypeDepense.objects.create(nom="Assurance immeuble", categorie='assurance', recurrent=True)
+        travaux = TypeDepense.objects.create(nom="Ravalement", categorie='travaux')
+        self.creer_depense(assurance, date(2025, 4, 10), Decimal('300.00'))
+        self.creer_depense(assurance, date(2025, 9, 10), Decimal('120.00'))
+        self.creer_depense(travaux, date(2025, 5, 10), Decimal('5000.00'))
+        self.creer_depense(travaux, date(2026, 6, 5), Decimal('1000.00'))
+        # Échéance de septembre déjà connue : remplace la répétition
+        self.creer_depense(assurance, date(2026, 9, 12), Decimal('130.00'))
+
+    def creer_depense(self, type_depense, date_depense, montant):
+        return DepenseProprietaire.objects.create(
+            immeuble=self.immeuble,
+            type_depense=type_depense,
+            designation=type_depense.nom,
+            montant_ht=montant,
+            montant_ttc=montant,
+            date_depense=date_depense,
+            fournisseur="Fournisseur",
+        )
+
+    def test_projection(self):
+        prevision = PrevisionManager.calculer(date(2026, 1, 1), 12, taux_irl=Decimal('0.10'))
+        total = prevision['total']
+
+        self.assertEqual(prevision['mois'][0], date(2026, 1, 1))
+        self.assertEqual(total['loyers'][:7], [
+            Decimal('1100.00'), Decimal('1100.00'), Decimal('1160.00'), Decimal('1160.00'),
+            Decimal('1160.00'), Decimal('660.00'), Decimal('660.00'),
+        ])
+        self.assertEqual(total['charges'][4], Decimal('90.00'))
+        self.assertEqual(total['charges'][5], Decimal('50.00'))
+
+        depenses = total['depenses']
+        self.assertEqual(depenses[3], Decimal('300.00'))
+        self.assertEqual(depenses[4], Decimal('0.00'))
+        self.assertEqual(depenses[5], Decimal('1000.00'))
+        self.assertEqual(depenses[8], Decimal('130.00'))
+        self.assertEqual(prevision['solde'][5], Decimal('660.00') + Decimal('50.00') - Decimal('1000.00'))
+        self.assertEqual(prevision['immeubles'][self.immeuble.pk]['loyers'], total['loyers'])
+
+        # Deuxième révision annuelle sur un horizon de trois ans
+        prevision = PrevisionManager.calculer(date(2026, 1, 1), 36, taux_irl=Decimal('0.10'))
+        self.assertEqual(prevision['total']['loyers'][14], Decimal('726.00'))
+        self.assertEqual(prevision['total']['depenses'][15], Decimal('300.00'))
+
+        with self.assertRaises(ValueError):
+            PrevisionManager.calculer(date(2026, 1, 1), 48)
+
+    def test_cache(self):
+        """La prévision est servie par le cache jusqu'à la modification d'une donnée source"""
+        prevision = PrevisionManager.prevoir(date(2026, 1, 1), 12, taux_irl=Decimal('0.10'))
+        with self.assertNumQueries(4):
+            self.assertEqual(PrevisionManager.prevoir(date(2026, 1, 1), 12, taux_irl=Decimal('0.10')), prevision)
+
+        self.contrat.loyer_mensuel = Decimal('700.00')
+        self.contrat.save()
+        prevision = PrevisionManager.prevoir(date(2026, 1, 1), 12, taux_irl=Decimal('0.10'))
+        self.assertEqual(prevision['total']['loyers'][0], Decimal('1200.00'))
+
+    @override_settings(PREVISIONS_CACHE_DUREE=120)
+    def test_cache_expiration(self):
+        """Les entrées du cache expirent : les empreintes périmées ne s'accumulent pas"""
+        with mock.patch('paiements.previsions.cache.set') as mise_en_cache:
+            PrevisionManager.prevoir(date(2026, 1, 1), 12)
+
+        self.assertEqual(mise_en_cache.call_args.args[2], 120)
+
+
+class BudgetRequetesTestCase(BudgetRequetesMixin, TestCase):
+    """Nombre de requêtes des listes et détails (N+1)"""
+
+    def test_liste_paiements(self):
+        self.assertRequetesConstantes(
+            reverse('paiements:paiement_list'),
+            lambda n: portefeuille(appartements=n)
+        )
+
+    def test_liste_contrats_paiements(self):
+        self.assertRequetesConstantes(
+            reverse('paiements:paiements_contrats_list'),
+            lambda n: portefeuille(appartements=n)
+        )
+
+    def test_paiements_contrat(self):
+        def peupler(n):
+            # Historique de n paiements sur un même bail
+            portefeuille()
+            contrat = Contrats.objects.order_by('pk').first()
+            PaiementLocataire.objects.bulk_create([
+                PaiementLocataire(
+                    contrat=contrat,
+                    mois=ajouter_mois(date(2010, 1, 1), i),
+                    loyer=contrat.loyer_mensuel,
+                    charges=contrat.charges_mensuelles,
+                    date_paiement=ajouter_mois(date(2010, 1, 5), i),
+                )
+                for i in range(n)
+            ])
+            return contrat
+
+        self.assertRequetesConstantes(
+            lambda contrat: reverse('paiements:paiements_locataires_list', args=[contrat.pk]),
+            peupler
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='locataires',
+            index=models.Index(fields=['nom', 'prenom'], name='persons_loc_nom_a5a5d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locataires',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['nom', 'prenom'], name='locataire_actif_nom_idx'),
+        ),
+    ]
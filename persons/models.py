@@ -45,6 +45,11 @@ class Locataires(TimeStampedModel):
         ordering = ['nom', 'prenom']
         verbose_name = "Locataire"
         verbose_name_plural = "Locataires"
+        indexes = [
+            # Ordre par défaut, pour la liste complète et pour les locataires actifs
+            models.Index(fields=['nom', 'prenom']),
+            models.Index(fields=['nom', 'prenom'], condition=models.Q(actif=True), name='locataire_actif_nom_idx'),
+        ]
 
     def get_contrats_actifs(self):
         """Retourne les contrats actifs du locataire"""
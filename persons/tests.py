@@ -1,3 +1,43 @@
+# persons/tests.py
+
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Locataires
+from contrats.models import Contrats, ContratLocataire
+from src.testing import BudgetRequetesMixin, portefeuille
+
+
+class BudgetRequetesTestCase(BudgetRequetesMixin, TestCase):
+    """Nombre de requêtes des listes et détails (N+1)"""
+
+    def test_liste_proprietaires(self):
+        self.assertRequetesConstantes(
+            reverse('persons:proprietaires_list'),
+            lambda n: portefeuille(proprietaires=n, appartements=n)
+        )
+
+    def test_liste_locataires(self):
+        self.assertRequetesConstantes(
+            reverse('persons:locataires_list'),
+            lambda n: portefeuille(appartements=n)
+        )
+
+    def test_detail_locataire(self):
+        def peupler(n):
+            # Un locataire présent dans n baux (actifs et terminés)
+            portefeuille(appartements=n)
+            locataire = Locataires.objects.create(nom="Garant", prenom="Test", email="garant@exemple.fr")
+            ContratLocataire.objects.bulk_create([
+                ContratLocataire(
+                    contrat=contrat, locataire=locataire, ordre=9,
+                    role='cotitulaire', date_entree=contrat.date_debut
+                )
+                for contrat in Contrats.objects.all()
+            ])
+            return locataire
 
-# Create your tests here.
+        self.assertRequetesConstantes(
+            lambda locataire: reverse('persons:locataire_detail', args=[locataire.pk]),
+            peupler
+        )
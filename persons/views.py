@@ -28,6 +28,9 @@ class Proprietaires_ListView(ListView):
     template_name = 'persons/proprietaires_list.html'
     context_object_name = 'proprietaires'
 
+    def get_queryset(self):
+        return Proprietaires.objects.annotate(nb_appartements=Count('appartement'))
+
 
 class Proprietaires_CreateView(CreateView):
     model = Proprietaires
@@ -63,7 +66,11 @@ class Locataires_ListView(ListView):
 
     def get_queryset(self):
 
-        qs = Locataires.objects.all()
+        # Nombre de contrats calculé en base plutôt que par locataire dans le template
+        qs = Locataires.objects.annotate(
+            nb_contrats=Count('contrats', distinct=True),
+            nb_contrats_actifs=Count('contrats', filter=Q(contrats__actif=True), distinct=True)
+        )
 
 
         search = self.request.GET.get('search')
@@ -0,0 +1,121 @@
+# portail/acces.py
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max, Q
+from django.shortcuts import redirect
+from django.urls import reverse
+
+from contrats.models import ContratLocataire
+from paiements.models import PaiementLocataire
+from persons.models import Locataires
+from quittances.models import Quittance
+
+
+# Clé de session du locataire connecté (indépendante de l'authentification du personnel)
+SESSION_LOCATAIRE = '_portail_locataire_id'
+
+SEL_TELECHARGEMENT = 'portail.telechargement'
+
+
+def connecter(request, acces):
+    """Ouvre la session portail d'un locataire (nouvelle clé de session : pas de fixation)"""
+    request.session.cycle_key()
+    request.session[SESSION_LOCATAIRE] = acces.locataire_id
+
+
+def deconnecter(request):
+    request.session.pop(SESSION_LOCATAIRE, None)
+
+
+def locataire_requis(vue):
+    """Réserve une vue au locataire connecté, disponible dans request.locataire"""
+    @wraps(vue)
+    def enveloppe(request, *args, **kwargs):
+        locataire_id = request.session.get(SESSION_LOCATAIRE)
+        locataire = Locataires.objects.filter(
+            pk=locataire_id, actif=True, acces_portail__actif=True
+        ).first() if locataire_id else None
+        if locataire is None:
+            return redirect(f"{reverse('portail:connexion')}?next={request.path}")
+        request.locataire = locataire
+        return vue(request, *args, **kwargs)
+    return enveloppe
+
+
+def filtre_periodes(locataire):
+    """
+    Mois couverts par les baux du locataire : de son entrée à sa sortie
+    de chaque contrat (un colocataire ne voit ni les mois d'avant son
+    arrivée ni ceux d'après son départ)
+    """
+    filtre = Q(pk__in=[])
+    for contrat_id, entree, sortie in ContratLocataire.objects.filter(locataire=locataire).values_list(
+        'contrat', 'date_entree', 'date_sortie'
+    ):
+        periode = Q(contrat_id=contrat_id)
+        if entree:
+            periode &= Q(mois__gte=entree.replace(day=1))
+        if sortie:
+            periode &= Q(mois__lte=sortie)
+        filtre |= periode
+    return filtre
+
+
+def quittances_du_locataire(locataire):
+    return Quittance.objects.filter(filtre_periodes(locataire))
+
+
+def paiements_du_locataire(locataire):
+    return PaiementLocataire.objects.filter(filtre_periodes(locataire), valide=True)
+
+
+def version_donnees(locataire, *elements):
+    """
+    Empreinte des quittances et paiements d'un locataire, base des ETag
+    des pages du portail : deux requêtes d'agrégat, sans rendu
+    """
+    quittances = quittances_du_locataire(locataire).aggregate(nombre=Count('id'), maj=Max('updated_at'))
+    paiements = paiements_du_locataire(locataire).aggregate(nombre=Count('id'), maj=Max('updated_at'))
+    etat = (locataire.pk, quittances['nombre'], quittances['maj'], paiements['nombre'], paiements['maj']) + elements
+    return hashlib.sha1(repr(etat).encode()).hexdigest()[:20]
+
+
+def expiration_liens(maintenant=None):
+    """
+    Échéance commune des liens émis dans la période en cours
+
+    Arrondie à la période PORTAIL_LIEN_DUREE suivante : les liens restent
+    identiques pendant une période (cache du navigateur, ETag des listes)
+    et valables entre une et deux périodes.
+    """
+    duree = settings.PORTAIL_LIEN_DUREE
+    return (math.floor((maintenant or time.time()) / duree) + 2) * duree
+
+
+def lien_telechargement(quittance, locataire, expiration=None):
+    """URL signée et temporaire du PDF d'une quittance, utilisable sans session"""
+    jeton = signing.dumps(
+        {'q': quittance.pk, 'l': locataire.pk, 'e': expiration or expiration_liens()},
+        salt=SEL_TELECHARGEMENT,
+        compress=True,
+    )
+    return reverse('portail:telecharger', args=[jeton])
+
+
+def lire_jeton(jeton):
+    """
+    Returns:
+        tuple: (quittance_id, locataire_id), ou None si le jeton est invalide ou expiré
+    """
+    try:
+        donnees = signing.loads(jeton, salt=SEL_TELECHARGEMENT)
+    except signing.BadSignature:
+        return None
+    if donnees.get('e', 0) < time.time():
+        return None
+    return donnees['q'], donnees['l']
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from portail.models import AccesPortail
+
+
+@admin.register(AccesPortail)
+class AccesPortailAdmin(admin.ModelAdmin):
+    list_display = ('locataire', 'actif', 'derniere_connexion', 'created_at')
+    list_filter = ('actif',)
+    search_fields = ('locataire__nom', 'locataire__prenom', 'locataire__email')
+    readonly_fields = ('mot_de_passe', 'derniere_connexion')
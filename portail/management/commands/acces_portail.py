@@ -0,0 +1,40 @@
+# portail/management/commands/acces_portail.py
+
+import secrets
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from persons.models import Locataires
+from portail.models import AccesPortail
+
+
+class Command(BaseCommand):
+    help = "Ouvre (ou réinitialise) l'accès d'un locataire au portail, ou le désactive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Email du locataire")
+        parser.add_argument('--mot-de-passe', help="Mot de passe (défaut : généré et affiché)")
+        parser.add_argument('--desactiver', action='store_true', help="Retire l'accès (les liens déjà émis cessent de fonctionner)")
+
+    def handle(self, *args, **options):
+        locataire = Locataires.objects.filter(email__iexact=options['email']).first()
+        if locataire is None:
+            raise CommandError(f"Aucun locataire avec l'email {options['email']}")
+
+        if options['desactiver']:
+            nombre = AccesPortail.objects.filter(locataire=locataire).update(actif=False, updated_at=timezone.now())
+            if not nombre:
+                raise CommandError(f"{locataire.nom_complet} n'a pas d'accès au portail")
+            self.stdout.write(self.style.SUCCESS(f"Accès de {locataire.nom_complet} désactivé"))
+            return
+
+        mot_de_passe = options['mot_de_passe'] or secrets.token_urlsafe(9)
+        acces = AccesPortail.objects.filter(locataire=locataire).first() or AccesPortail(locataire=locataire)
+        acces.definir_mot_de_passe(mot_de_passe)
+        acces.actif = True
+        acces.save()
+
+        self.stdout.write(self.style.SUCCESS(f"Accès au portail ouvert pour {locataire.nom_complet} ({locataire.email})"))
+        if not options['mot_de_passe']:
+            self.stdout.write(f"Mot de passe : {mot_de_passe}")
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('persons', '0002_index_filtres_frequents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccesPortail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('mot_de_passe', models.CharField(max_length=128, verbose_name='Mot de passe (haché)')),
+                ('actif', models.BooleanField(default=True)),
+                ('derniere_connexion', models.DateTimeField(blank=True, null=True, verbose_name='Dernière connexion')),
+                ('locataire', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='acces_portail', to='persons.locataires')),
+            ],
+            options={
+                'verbose_name': 'Accès au portail',
+                'verbose_name_plural': 'Accès au portail',
+            },
+        ),
+    ]
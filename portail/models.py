@@ -0,0 +1,38 @@
+# portail/models.py
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import models
+
+from accounts.models import TimeStampedModel
+from persons.models import Locataires
+
+
+class AccesPortail(TimeStampedModel):
+    """
+    Accès d'un locataire au portail (identifiant : son email)
+
+    Distinct des comptes CustomUser du personnel : un locataire connecté
+    n'a accès qu'aux vues du portail.
+    """
+
+    locataire = models.OneToOneField(
+        Locataires,
+        on_delete=models.CASCADE,
+        related_name='acces_portail'
+    )
+    mot_de_passe = models.CharField(max_length=128, verbose_name="Mot de passe (haché)")
+    actif = models.BooleanField(default=True)
+    derniere_connexion = models.DateTimeField(null=True, blank=True, verbose_name="Dernière connexion")
+
+    class Meta:
+        verbose_name = "Accès au portail"
+        verbose_name_plural = "Accès au portail"
+
+    def __str__(self):
+        return f"Portail - {self.locataire.nom_complet}"
+
+    def definir_mot_de_passe(self, mot_de_passe):
+        self.mot_de_passe = make_password(mot_de_passe)
+
+    def verifier_mot_de_passe(self, mot_de_passe):
+        return check_password(mot_de_passe, self.mot_de_passe)
@@ -0,0 +1,171 @@
+# portail/tests.py
+
+import shutil
+import tempfile
+import time
+from datetime import date
+from io import StringIO
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from contrats.models import Contrats, ContratLocataire
+from immeuble.models import Immeuble, Appartement
+from paiements.models import PaiementLocataire
+from persons.models import Locataires
+from quittances.models import Quittance
+from quittances.utils import QuittanceManager
+from .acces import expiration_liens, lien_telechargement, lire_jeton
+from .models import AccesPortail
+
+
+class PortailTestCase(TestCase):
+    """Tests du portail locataires"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        immeuble = Immeuble.objects.create(
+            nom="Résidence Les Saules", adresse="4 rue des Saules", ville="Rennes", code_postal="35000"
+        )
+        appartement = Appartement.objects.create(immeuble=immeuble, numero="S1", etage=2)
+        self.contrat = Contrats.objects.create(
+            appartement=appartement,
+            date_debut=date(2025, 1, 1),
+            loyer_mensuel=Decimal('700.00'),
+            charges_mensuelles=Decimal('60.00'),
+        )
+
+        # Camille depuis le début du bail, Louis arrivé en mars
+        self.camille = Locataires.objects.create(
+            nom="Martin", prenom="Camille", email="camille@exemple.fr", telephone="0600000001"
+        )
+        self.louis = Locataires.objects.create(
+            nom="Petit", prenom="Louis", email="louis@exemple.fr", telephone="0600000002"
+        )
+        ContratLocataire.objects.create(contrat=self.contrat, locataire=self.camille, principal=True, ordre=1)
+        ContratLocataire.objects.create(contrat=self.contrat, locataire=self.louis, ordre=2, date_entree=date(2025, 3, 10))
+
+        for locataire in (self.camille, self.louis):
+            acces = AccesPortail(locataire=locataire)
+            acces.definir_mot_de_passe('secret-portail')
+            acces.save()
+
+        self.quittances = [QuittanceManager.generer_quittance(self.contrat, date(2025, mois, 1)) for mois in (1, 2, 3)]
+        PaiementLocataire.objects.create(
+            contrat=self.contrat, mois=date(2025, 1, 1), loyer=Decimal('700.00'),
+            charges=Decimal('60.00'), date_paiement=date(2025, 1, 3)
+        )
+
+    def connecter(self, email='camille@exemple.fr'):
+        return self.client.post(reverse('portail:connexion'), {'email': email, 'mot_de_passe': 'secret-portail'})
+
+    def test_connexion(self):
+        self.assertRedirects(self.client.get(reverse('portail:accueil')), f"{reverse('portail:connexion')}?next=/portail/")
+
+        reponse = self.client.post(reverse('portail:connexion'), {'email': 'camille@exemple.fr', 'mot_de_passe': 'faux'})
+        self.assertContains(reponse, "Email ou mot de passe incorrect")
+
+        self.assertRedirects(self.connecter(), reverse('portail:accueil'))
+        self.assertIsNotNone(AccesPortail.objects.get(locataire=self.camille).derniere_connexion)
+
+        # Une session portail n'ouvre pas les vues du personnel
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_quittances_par_periode_de_bail(self):
+        """Un colocataire ne voit que les mois de sa présence dans le bail"""
+        self.connecter()
+        self.assertEqual(len(self.client.get(reverse('portail:accueil')).context['quittances']), 3)
+
+        self.client.get(reverse('portail:deconnexion'))
+        self.connecter('louis@exemple.fr')
+        reponse = self.client.get(reverse('portail:accueil'))
+        self.assertEqual([q.mois for q in reponse.context['quittances']], [date(2025, 3, 1)])
+        self.assertEqual(list(reponse.context['paiements']), [])
+
+    def test_liste_revalidee_par_etag(self):
+        """La liste est un 304 tant que les données du locataire n'ont pas changé"""
+        self.connecter()
+        reponse = self.client.get(reverse('portail:accueil'))
+        etag = reponse['ETag']
+        self.assertIn('private', reponse['Cache-Control'])
+        self.assertIn('Cookie', reponse['Vary'])
+
+        self.assertEqual(self.client.get(reverse('portail:accueil'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        QuittanceManager.generer_quittance(self.contrat, date(2025, 4, 1))
+        reponse = self.client.get(reverse('portail:accueil'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(len(reponse.context['quittances']), 4)
+
+        reponse = self.client.get(reverse('portail:historique_paiements'))
+        self.assertEqual(reponse['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('01/2025;700.00;60.00', reponse.content.decode())
+
+    def test_telechargement_signe(self):
+        """Le lien signé suffit, sans session ; le PDF est revalidé par ETag et Last-Modified"""
+        quittance = self.quittances[0]
+        lien = lien_telechargement(quittance, self.camille)
+        self.assertEqual(lien, lien_telechargement(quittance, self.camille))
+
+        # Même avec un cookie de session, le téléchargement ne lit pas la session
+        self.connecter()
+        with CaptureQueriesContext(connection) as requetes:
+            reponse = self.client.get(lien)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(b''.join(reponse.streaming_content)[:4], b'%PDF')
+        self.assertFalse(any('django_session' in requete['sql'] for requete in requetes.captured_queries))
+
+        # Un GET (préchargement possible) ne vaut pas remise de la quittance
+        quittance.refresh_from_db()
+        self.assertFalse(quittance.envoyee)
+
+        self.assertEqual(self.client.get(lien, HTTP_IF_NONE_MATCH=reponse['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(lien, HTTP_IF_MODIFIED_SINCE=reponse['Last-Modified']).status_code, 304)
+
+        # Jeton altéré, expiré, ou accès retiré : 404
+        self.assertEqual(self.client.get(lien[:-3] + 'abc/').status_code, 404)
+        jeton = lien.rstrip('/').rsplit('/', 1)[-1]
+        with mock.patch('portail.acces.time.time', return_value=time.time() + 3 * 3600):
+            self.assertIsNone(lire_jeton(jeton))
+        Locataires.objects.filter(pk=self.camille.pk).update(actif=False)
+        self.assertEqual(self.client.get(lien).status_code, 404)
+        Locataires.objects.filter(pk=self.camille.pk).update(actif=True)
+        self.assertEqual(self.client.get(lien).status_code, 200)
+        AccesPortail.objects.filter(locataire=self.camille).update(actif=False)
+        self.assertEqual(self.client.get(lien).status_code, 404)
+
+    def test_expiration_commune(self):
+        """Les liens d'une même période sont identiques et valables une à deux périodes"""
+        self.assertEqual(expiration_liens(7200), expiration_liens(10799))
+        self.assertEqual(expiration_liens(7200), 4 * 3600)
+        self.assertTrue(3600 <= expiration_liens(10799) - 10799 <= 7200)
+
+    def test_pdf_genere_au_besoin(self):
+        quittance = self.quittances[2]
+        Quittance.objects.filter(pk=quittance.pk).update(fichier_pdf='')
+        quittance.refresh_from_db()
+
+        reponse = self.client.get(lien_telechargement(quittance, self.louis))
+        self.assertEqual(reponse.status_code, 200)
+        maj = quittance.updated_at
+        quittance.refresh_from_db()
+        self.assertTrue(quittance.fichier_pdf)
+        self.assertGreater(quittance.updated_at, maj)
+
+    def test_desactivation_datee(self):
+        """Le retrait d'accès renseigne updated_at (sauvegarde incrémentale)"""
+        acces = AccesPortail.objects.get(locataire=self.camille)
+        call_command('acces_portail', 'camille@exemple.fr', '--desactiver', stdout=StringIO())
+        desactive = AccesPortail.objects.get(pk=acces.pk)
+        self.assertFalse(desactive.actif)
+        self.assertGreater(desactive.updated_at, acces.updated_at)
@@ -0,0 +1,16 @@
+# portail/urls.py
+
+from django.urls import path
+from . import views
+
+app_name = 'portail'
+
+urlpatterns = [
+    path('', views.accueil_view, name='accueil'),
+    path('connexion/', views.connexion_view, name='connexion'),
+    path('deconnexion/', views.deconnexion_view, name='deconnexion'),
+    path('paiements.csv', views.historique_paiements_view, name='historique_paiements'),
+
+    # Liens signés, sans session
+    path('quittance/<str:jeton>/', views.telecharger_view, name='telecharger'),
+]
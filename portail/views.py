@@ -0,0 +1,168 @@
+# portail/views.py
+import csv
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render, redirect
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, url_has_allowed_host_and_scheme
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_cookie
+
+from quittances.models import Quittance
+from quittances.pdf_generator import QuittancePDFGenerator
+from .acces import (
+    connecter, deconnecter, locataire_requis, quittances_du_locataire, paiements_du_locataire,
+    version_donnees, expiration_liens, lien_telechargement, lire_jeton,
+)
+from .models import AccesPortail
+
+
+def connexion_view(request):
+    """Connexion d'un locataire (email et mot de passe du portail)"""
+    suivant = request.POST.get('next') or request.GET.get('next') or ''
+    if not url_has_allowed_host_and_scheme(suivant, allowed_hosts={request.get_host()}):
+        suivant = ''
+
+    if request.method == 'POST':
+        email = request.POST.get('email', '').strip()
+        mot_de_passe = request.POST.get('mot_de_passe', '')
+        acces = AccesPortail.objects.filter(
+            locataire__email__iexact=email, actif=True, locataire__actif=True
+        ).select_related('locataire').first()
+
+        if acces and acces.verifier_mot_de_passe(mot_de_passe):
+            maintenant = timezone.now()
+            AccesPortail.objects.filter(pk=acces.pk).update(derniere_connexion=maintenant, updated_at=maintenant)
+            connecter(request, acces)
+            return redirect(suivant or 'portail:accueil')
+
+        if acces is None:
+            # Même durée de réponse qu'un mot de passe erroné : pas d'énumération des emails
+            make_password(mot_de_passe)
+        messages.error(request, "Email ou mot de passe incorrect.")
+
+    return render(request, 'portail/connexion.html', {'next': suivant})
+
+
+def deconnexion_view(request):
+    deconnecter(request)
+    return redirect('portail:connexion')
+
+
+def etag_portail(request, *args, **kwargs):
+    # La période des liens signés fait partie de la page : elle entre dans l'ETag
+    return version_donnees(request.locataire, request.path, expiration_liens())
+
+
+@require_GET
+@locataire_requis
+@vary_on_cookie
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etag_portail)
+def accueil_view(request):
+    """
+    Quittances et paiements du locataire connecté
+
+    Page propre à chaque locataire (cache privé) et revalidée à chaque
+    visite : tant que ses quittances et paiements n'ont pas changé, la
+    réponse est un 304 calculé par deux requêtes d'agrégat, sans rendu.
+    """
+    locataire = request.locataire
+    expiration = expiration_liens()
+
+    quittances = list(
+        quittances_du_locataire(locataire)
+        .select_related('contrat__appartement__immeuble')
+        .order_by('-mois', '-pk')
+    )
+    for quittance in quittances:
+        quittance.lien = lien_telechargement(quittance, locataire, expiration)
+
+    paiements = paiements_du_locataire(locataire).order_by('-mois', '-pk')
+
+    return render(request, 'portail/accueil.html', {
+        'locataire': locataire,
+        'quittances': quittances,
+        'paiements': paiements,
+    })
+
+
+@require_GET
+@locataire_requis
+@vary_on_cookie
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etag_portail)
+def historique_paiements_view(request):
+    """Historique des paiements du locataire connecté, au format CSV"""
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="historique_paiements.csv"'
+
+    writer = csv.writer(response, delimiter=';')
+    writer.writerow(['Mois', 'Loyer', 'Charges', 'Autres', 'Total', 'Date de paiement', 'Mode de paiement', 'Référence'])
+    for paiement in paiements_du_locataire(request.locataire).order_by('mois', 'pk'):
+        writer.writerow([
+            paiement.mois.strftime('%m/%Y'),
+            paiement.loyer,
+            paiement.charges,
+            paiement.autres,
+            paiement.total,
+            paiement.date_paiement.strftime('%d/%m/%Y') if paiement.date_paiement else '',
+            paiement.get_mode_paiement_display(),
+            paiement.reference,
+        ])
+    return response
+
+
+@require_GET
+def telecharger_view(request, jeton):
+    """
+    PDF d'une quittance par lien signé
+
+    Le jeton (quittance, locataire, échéance) suffit : aucune session
+    n'est lue. ETag fort et Last-Modified viennent du fichier stocké, un
+    navigateur qui a déjà le PDF reçoit un 304. Un GET peut venir d'un
+    préchargement de lien : il ne marque pas la quittance comme remise.
+    """
+    identifiants = lire_jeton(jeton)
+    if identifiants is None:
+        raise Http404("Lien invalide ou expiré")
+
+    # Une seule requête : la quittance, si le locataire et son accès sont toujours actifs
+    quittance_id, locataire_id = identifiants
+    quittance = Quittance.objects.filter(
+        pk=quittance_id,
+        contrat__contratlocataire__locataire_id=locataire_id,
+        contrat__contratlocataire__locataire__actif=True,
+        contrat__contratlocataire__locataire__acces_portail__actif=True,
+    ).first()
+    if quittance is None:
+        raise Http404("Quittance introuvable")
+
+    if not quittance.fichier_pdf:
+        pdf_content = QuittancePDFGenerator(quittance).generate_pdf()
+        quittance.fichier_pdf.save(f"quittance_{quittance.numero}.pdf", ContentFile(pdf_content), save=False)
+        Quittance.objects.filter(pk=quittance.pk).update(
+            fichier_pdf=quittance.fichier_pdf.name, updated_at=timezone.now()
+        )
+
+    stockage = quittance.fichier_pdf.storage
+    modification = stockage.get_modified_time(quittance.fichier_pdf.name)
+    taille = stockage.size(quittance.fichier_pdf.name)
+    etag = f'"q{quittance.pk}-{taille}-{int(modification.timestamp() * 1_000_000):x}"'
+    derniere_modification = int(modification.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=derniere_modification)
+    if response is None:
+        response = FileResponse(quittance.fichier_pdf.open('rb'), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="quittance_{quittance.numero}.pdf"'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(derniere_modification)
+    patch_cache_control(response, private=True, max_age=settings.PORTAIL_LIEN_DUREE)
+    return response
@@ -0,0 +1,312 @@
+# quittances/envoi.py
+import logging
+import queue
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from contrats.models import ContratLocataire
+from .models import Quittance
+from .pdf_generator import QuittancePDFGenerator
+
+
+logger = logging.getLogger('quittances.envoi')
+
+# Valeurs par défaut, surchargeables par settings.QUITTANCES_ENVOI
+CONFIGURATION_ENVOI = {
+    # Connexions SMTP simultanées, chacune réutilisée pour tous ses messages
+    'WORKERS': 4,
+    # Messages par seconde, tous workers confondus (0 = sans limite)
+    'DEBIT': 10,
+    # Essais par message ; le délai entre deux essais double à chaque fois
+    'TENTATIVES': 3,
+    'DELAI_TENTATIVE': 2.0,
+    # Quittances envoyées marquées en base par lots, au fil de l'envoi
+    'LOT': 50,
+}
+
+
+def get_configuration():
+    """Configuration de l'envoi (valeurs par défaut + settings.QUITTANCES_ENVOI)"""
+    configuration = dict(CONFIGURATION_ENVOI)
+    configuration.update(getattr(settings, 'QUITTANCES_ENVOI', {}))
+    return configuration
+
+
+def erreur_transitoire(erreur):
+    """
+    Vrai si un nouvel essai peut réussir : coupure réseau, serveur
+    déconnecté, réponse 4xx. Les refus définitifs (5xx, destinataires
+    refusés) ne sont pas réessayés.
+    """
+    if isinstance(erreur, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(erreur, smtplib.SMTPResponseException):
+        return 400 <= erreur.smtp_code < 500
+    return isinstance(erreur, (smtplib.SMTPException, OSError))
+
+
+class LimiteurDebit:
+    """
+    Seau à jetons partagé entre les workers
+
+    Chaque envoi prend un jeton ; les jetons se reconstituent au rythme de
+    `par_seconde`. Un worker sans jeton réserve le suivant et attend son
+    tour, hors verrou.
+    """
+
+    def __init__(self, par_seconde, capacite=1):
+        self.par_seconde = par_seconde
+        self.capacite = capacite
+        self.jetons = capacite
+        self.dernier = time.monotonic()
+        self.verrou = threading.Lock()
+
+    def attendre(self):
+        if not self.par_seconde:
+            return
+        with self.verrou:
+            maintenant = time.monotonic()
+            self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier) * self.par_seconde)
+            self.dernier = maintenant
+            self.jetons -= 1
+            attente = -self.jetons / self.par_seconde if self.jetons < 0 else 0
+        if attente:
+            time.sleep(attente)
+
+
+class EnvoiQuittances:
+    """
+    Envoi des quittances par email, avec leur PDF, aux locataires du bail
+
+    Les messages sont préparés dans le thread appelant (base de données,
+    PDF manquants), puis envoyés par `workers` threads qui gardent chacun
+    une connexion SMTP ouverte pour toute la campagne. Le débit global est
+    limité, les erreurs transitoires sont réessayées après un délai
+    croissant.
+
+    Les workers ne touchent pas à la base (une connexion Django par
+    thread) : ils rendent chaque résultat au thread appelant, qui marque
+    les quittances envoyées par lots de `lot` (bulk_update) au fil de
+    l'envoi. Une interruption en cours de campagne ne fait renvoyer, au
+    plus, que le dernier lot.
+
+    Le backend est celui de EMAIL_BACKEND : SMTP en production, locmem
+    pendant les tests.
+    """
+
+    def __init__(self, workers=None, debit=None, tentatives=None, delai_tentative=None, lot=None):
+        configuration = get_configuration()
+        self.workers = workers or configuration['WORKERS']
+        self.tentatives = tentatives or configuration['TENTATIVES']
+        self.delai_tentative = configuration['DELAI_TENTATIVE'] if delai_tentative is None else delai_tentative
+        self.lot = lot or configuration['LOT']
+        self.limiteur = LimiteurDebit(configuration['DEBIT'] if debit is None else debit)
+
+        self.verrou = threading.Lock()
+        self.essais = 0
+
+    def destinataires(self, quittances):
+        """Emails des locataires présents dans le bail le mois de chaque quittance"""
+        par_contrat = {}
+        for relation in ContratLocataire.objects.filter(
+            contrat_id__in={q.contrat_id for q in quittances}
+        ).select_related('locataire').order_by('ordre', 'pk'):
+            par_contrat.setdefault(relation.contrat_id, []).append(relation)
+
+        destinataires = {}
+        for quittance in quittances:
+            destinataires[quittance.pk] = [
+                relation.locataire.email
+                for relation in par_contrat.get(quittance.contrat_id, [])
+                if relation.locataire.email
+                and (not relation.date_entree or relation.date_entree.replace(day=1) <= quittance.mois)
+                and (not relation.date_sortie or relation.date_sortie >= quittance.mois)
+            ]
+        return destinataires
+
+    def preparer(self, quittances, dry_run=False):
+        """
+        Messages à envoyer (sans pièce jointe : le PDF est lu par le worker)
+
+        Les PDF manquants sont générés et enregistrés, sauf en simulation.
+
+        Returns:
+            tuple: ([(quittance, EmailMessage)], [(quittance, raison)] ignorées)
+        """
+        destinataires = self.destinataires(quittances)
+        messages, ignorees, generees = [], [], []
+        maintenant = timezone.now()
+
+        for quittance in quittances:
+            if not destinataires[quittance.pk]:
+                ignorees.append((quittance, "Aucun locataire avec un email"))
+                continue
+
+            if not quittance.fichier_pdf and not dry_run:
+                quittance.fichier_pdf.save(
+                    f"quittance_{quittance.numero}.pdf",
+                    ContentFile(QuittancePDFGenerator(quittance).generate_pdf()),
+                    save=False
+                )
+                quittance.updated_at = maintenant
+                generees.append(quittance)
+
+            contexte = {'quittance': quittance, 'contrat': quittance.contrat}
+            messages.append((quittance, EmailMessage(
+                subject=f"Quittance de loyer - {quittance.mois:%m/%Y}",
+                body=render_to_string('quittances/email_quittance.txt', contexte),
+                to=destinataires[quittance.pk],
+            )))
+
+        if generees:
+            Quittance.objects.bulk_update(generees, ['fichier_pdf', 'updated_at'], batch_size=500)
+        return messages, ignorees
+
+    def envoyer_message(self, connexion, quittance, message):
+        """Envoie un message, avec nouveaux essais ; rouvre la connexion après une erreur"""
+        with quittance.fichier_pdf.open('rb') as fichier:
+            message.attach(f"quittance_{quittance.numero}.pdf", fichier.read(), 'application/pdf')
+
+        for tentative in range(1, self.tentatives + 1):
+            self.limiteur.attendre()
+            with self.verrou:
+                self.essais += 1
+            try:
+                connexion.open()
+                connexion.send_messages([message])
+                return None
+            except Exception as erreur:
+                connexion.close()
+                if not erreur_transitoire(erreur) or tentative == self.tentatives:
+                    return erreur
+                logger.warning("Quittance %s : essai %d échoué (%s)", quittance.numero, tentative, erreur)
+                time.sleep(self.delai_tentative * 2 ** (tentative - 1))
+
+    def travailler(self, file, resultats):
+        """Boucle d'un worker : une connexion SMTP pour tous ses messages"""
+        connexion = get_connection(fail_silently=False)
+        try:
+            while True:
+                try:
+                    quittance, message = file.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    erreur = self.envoyer_message(connexion, quittance, message)
+                except Exception as e:
+                    # PDF illisible... : la quittance échoue, le worker continue
+                    erreur = e
+                if erreur is not None:
+                    logger.error("Quittance %s non envoyée : %s", quittance.numero, erreur)
+                resultats.put((quittance, erreur, timezone.now()))
+        finally:
+            connexion.close()
+
+    def marquer_envoyees(self, quittances):
+        """Enregistre un lot de quittances envoyées (une requête par lot)"""
+        if not quittances:
+            return
+        maintenant = timezone.now()
+        for quittance in quittances:
+            quittance.envoyee = True
+            quittance.mode_envoi = 'email'
+            quittance.updated_at = maintenant
+        Quittance.objects.bulk_update(
+            quittances, ['envoyee', 'mode_envoi', 'date_envoi', 'updated_at'], batch_size=500
+        )
+
+    def envoyer(self, quittances, dry_run=False):
+        """
+        Envoie un ensemble de quittances
+
+        Args:
+            quittances: Quittances (contrat chargé de préférence)
+            dry_run: Prépare les messages sans rien envoyer ni enregistrer
+
+        Returns:
+            dict: Quittances envoyées, échecs (quittance, erreur), ignorées
+            (quittance, raison), nombre d'essais SMTP et durée
+        """
+        debut = time.monotonic()
+        quittances = list(quittances)
+        messages, ignorees = self.preparer(quittances, dry_run=dry_run)
+        envoyees, echecs = [], []
+
+        if not dry_run and messages:
+            file, resultats = queue.Queue(), queue.Queue()
+            for element in messages:
+                file.put(element)
+
+            threads = [
+                threading.Thread(
+                    target=self.travailler, args=(file, resultats), name=f'envoi-quittances-{i}', daemon=True
+                )
+                for i in range(min(self.workers, len(messages)))
+            ]
+            for thread in threads:
+                thread.start()
+
+            # Les résultats sont enregistrés au fil de l'eau, par lots
+            lot = []
+            restants = len(messages)
+            while restants:
+                try:
+                    quittance, erreur, date_envoi = resultats.get(timeout=0.5)
+                except queue.Empty:
+                    if not any(thread.is_alive() for thread in threads):
+                        break
+                    continue
+                restants -= 1
+                if erreur is not None:
+                    echecs.append((quittance, erreur))
+                    continue
+                quittance.date_envoi = date_envoi
+                envoyees.append(quittance)
+                lot.append(quittance)
+                if len(lot) >= self.lot:
+                    self.marquer_envoyees(lot)
+                    lot = []
+            self.marquer_envoyees(lot)
+
+            for thread in threads:
+                thread.join()
+
+            # Workers arrêtés avant la fin (backend injoignable...) : messages non traités
+            traitees = {q.pk for q in envoyees} | {q.pk for q, _ in echecs}
+            echecs.extend(
+                (quittance, RuntimeError("Message non traité")) for quittance, _ in messages
+                if quittance.pk not in traitees
+            )
+
+        return {
+            'messages': [q for q, _ in messages],
+            'envoyees': envoyees,
+            'echecs': echecs,
+            'ignorees': ignorees,
+            'essais': self.essais,
+            'duree': time.monotonic() - debut,
+            'dry_run': dry_run,
+        }
+
+    def envoyer_mois(self, mois, immeubles=None, renvoyer=False, dry_run=False):
+        """
+        Envoie les quittances d'un mois (par défaut, celles pas encore envoyées)
+
+        Args:
+            mois: Premier jour du mois
+            immeubles: Liste d'identifiants d'immeubles (optionnel, sinon tous)
+            renvoyer: Inclut les quittances déjà envoyées
+        """
+        quittances = Quittance.objects.filter(mois=mois).select_related('contrat__appartement__immeuble')
+        if not renvoyer:
+            quittances = quittances.filter(envoyee=False)
+        if immeubles:
+            quittances = quittances.filter(contrat__appartement__immeuble_id__in=immeubles)
+        return self.envoyer(quittances.order_by('pk'), dry_run=dry_run)
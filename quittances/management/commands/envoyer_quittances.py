@@ -0,0 +1,50 @@
+# quittances/management/commands/envoyer_quittances.py
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from quittances.envoi import EnvoiQuittances
+
+
+def mois_argument(valeur):
+    """Mois au format AAAA-MM"""
+    return datetime.strptime(valeur, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = "Envoie par email les quittances d'un mois, avec leur PDF, aux locataires des baux"
+
+    def add_arguments(self, parser):
+        parser.add_argument('mois', type=mois_argument, help="Mois des quittances (AAAA-MM)")
+        parser.add_argument('--immeuble', type=int, action='append', help="Limiter à un immeuble (répétable)")
+        parser.add_argument('--workers', type=int, help="Connexions SMTP simultanées (défaut : configuration)")
+        parser.add_argument('--debit', type=float, help="Messages par seconde au maximum, 0 = sans limite")
+        parser.add_argument('--renvoyer', action='store_true', help="Inclure les quittances déjà envoyées")
+        parser.add_argument('--dry-run', action='store_true', help="Préparer les messages sans rien envoyer")
+
+    def handle(self, *args, **options):
+        envoi = EnvoiQuittances(workers=options['workers'], debit=options['debit'])
+        resultat = envoi.envoyer_mois(
+            options['mois'],
+            immeubles=options['immeuble'],
+            renvoyer=options['renvoyer'],
+            dry_run=options['dry_run'],
+        )
+
+        for quittance, raison in resultat['ignorees']:
+            self.stdout.write(self.style.WARNING(f"  {quittance.numero} ignorée : {raison}"))
+        for quittance, erreur in resultat['echecs']:
+            self.stdout.write(self.style.ERROR(f"  {quittance.numero} en échec : {erreur}"))
+
+        if resultat['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(resultat['messages'])} quittance(s) à envoyer pour {options['mois']:%m/%Y} (simulation)"
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(resultat['envoyees'])} quittance(s) envoyée(s) pour {options['mois']:%m/%Y} "
+            f"en {resultat['duree']:.1f} s ({resultat['essais']} essai(s) SMTP), "
+            f"{len(resultat['echecs'])} échec(s), {len(resultat['ignorees'])} ignorée(s)"
+        ))
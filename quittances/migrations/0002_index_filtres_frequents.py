@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0003_index_filtres_frequents'),
+        ('paiements', '0007_index_filtres_frequents'),
+        ('quittances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quittance',
+            index=models.Index(fields=['-mois', '-date_generation'], name='quittances__mois_cf2b87_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quittance',
+            index=models.Index(condition=models.Q(('envoyee', False)), fields=['contrat', 'mois'], name='quittance_a_envoyer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quittance',
+            index=models.Index(fields=['created_at'], name='quittances__created_b5f37e_idx'),
+        ),
+    ]
@@ -95,6 +95,12 @@ class Quittance(TimeStampedModel):
             models.Index(fields=['mois', 'contrat']),
             models.Index(fields=['numero']),
             models.Index(fields=['envoyee']),
+            # Ordre de la liste (évite le tri de toute la table)
+            models.Index(fields=['-mois', '-date_generation']),
+            # Quittances restant à envoyer, par contrat
+            models.Index(fields=['contrat', 'mois'], condition=models.Q(envoyee=False), name='quittance_a_envoyer_idx'),
+            # Activité récente du tableau de bord
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -23,7 +23,7 @@ class QuittancePDFGenerator:
         # Vérifier si le contrat utilise le nouveau système
         if hasattr(self.contrat, 'locataires') and self.contrat.locataires.exists():
             # Nouveau système : plusieurs locataires via ManyToMany
-            self.locataires = self.contrat.get_tous_locataires()
+            self.locataires = list(self.contrat.get_tous_locataires())
             self.locataire_principal = self.contrat.get_locataire_principal()
         else:
             # Ancien système : un seul locataire via FK
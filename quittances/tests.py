@@ -1,3 +1,245 @@
-from django.test import TestCase
+# quittances/tests.py
 
-# Create your tests here.
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from contrats.models import Contrats, ContratLocataire
+from immeuble.models import Immeuble, Appartement
+from persons.models import Locataires
+from .envoi import EnvoiQuittances, LimiteurDebit
+from .models import Quittance
+from .utils import QuittanceManager
+from src.testing import BudgetRequetesMixin, ajouter_colocataires, portefeuille
+
+
+class BudgetRequetesTestCase(BudgetRequetesMixin, TestCase):
+    """Nombre de requêtes des listes et détails (N+1)"""
+
+    def test_liste_quittances(self):
+        self.assertRequetesConstantes(
+            reverse('quittances:list'),
+            lambda n: portefeuille(appartements=n)
+        )
+
+    def test_detail_quittance(self):
+        def peupler(n):
+            portefeuille()
+            quittance = Quittance.objects.order_by('pk').first()
+            ajouter_colocataires(quittance.contrat, n)
+            return quittance
+
+        self.assertRequetesConstantes(
+            lambda quittance: reverse('quittances:detail', args=[quittance.pk]),
+            peupler
+        )
+
+
+class GestionnaireSMTP(socketserver.StreamRequestHandler):
+    """Dialogue SMTP minimal : EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def repondre(self, ligne):
+        self.wfile.write(f"{ligne}\r\n".encode())
+
+    def handle(self):
+        serveur = self.server
+        with serveur.verrou:
+            serveur.connexions += 1
+        self.repondre('220 localhost ESMTP')
+        destinataires = []
+        while True:
+            ligne = self.rfile.readline()
+            if not ligne:
+                return
+            commande = ligne.decode().strip()
+            verbe = commande[:4].upper()
+            if verbe in ('EHLO', 'HELO'):
+                self.repondre('250 localhost')
+            elif verbe == 'MAIL':
+                destinataires = []
+                self.repondre('250 OK')
+            elif verbe == 'RCPT':
+                adresse = commande.split(':', 1)[1].strip(' <>')
+                if adresse in serveur.refuses:
+                    self.repondre('550 Destinataire inconnu')
+                else:
+                    destinataires.append(adresse)
+                    self.repondre('250 OK')
+            elif verbe == 'DATA':
+                self.repondre('354 Fin par <CRLF>.<CRLF>')
+                contenu = []
+                while (ligne := self.rfile.readline()) not in (b'.\r\n', b''):
+                    contenu.append(ligne)
+                with serveur.verrou:
+                    serveur.essais += 1
+                    if serveur.echecs > 0:
+                        serveur.echecs -= 1
+                        reponse = '451 Réessayez plus tard'
+                    else:
+                        serveur.messages.append((destinataires, b''.join(contenu)))
+                        reponse = '250 OK'
+                self.repondre(reponse)
+            elif verbe in ('RSET', 'NOOP'):
+                self.repondre('250 OK')
+            elif verbe == 'QUIT':
+                self.repondre('221 Au revoir')
+                return
+            else:
+                self.repondre('502 Commande inconnue')
+
+
+class ServeurSMTP(socketserver.ThreadingTCPServer):
+    """Serveur SMTP local pour les tests, qui peut refuser des messages"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, echecs=0, refuses=()):
+        super().__init__(('127.0.0.1', 0), GestionnaireSMTP)
+        self.verrou = threading.Lock()
+        self.echecs = echecs
+        self.refuses = set(refuses)
+        self.messages = []
+        self.connexions = 0
+        self.essais = 0
+
+
+class EnvoiQuittancesTestCase(TestCase):
+    """Envoi groupé des quittances par email"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        immeuble = Immeuble.objects.create(
+            nom="Résidence du Port", adresse="2 quai Duguay-Trouin", ville="Saint-Malo", code_postal="35400"
+        )
+        self.mois = date(2025, 3, 1)
+        self.quittances = []
+        for numero in range(1, 7):
+            appartement = Appartement.objects.create(immeuble=immeuble, numero=f"P{numero}", etage=1)
+            contrat = Contrats.objects.create(
+                appartement=appartement,
+                date_debut=date(2025, 1, 1),
+                loyer_mensuel=Decimal('600.00'),
+                charges_mensuelles=Decimal('40.00'),
+            )
+            locataire = Locataires.objects.create(
+                nom=f"Locataire{numero}", prenom="Alex", email=f"locataire{numero}@exemple.fr",
+                telephone=f"060000000{numero}"
+            )
+            ContratLocataire.objects.create(contrat=contrat, locataire=locataire, principal=True, ordre=1)
+            self.quittances.append(QuittanceManager.generer_quittance(contrat, self.mois))
+
+        # Colocation : Sacha est parti en février, Noé arrive en avril
+        contrat = self.quittances[0].contrat
+        for prenom, entree, sortie in (("Sacha", date(2025, 1, 1), date(2025, 2, 28)), ("Noé", date(2025, 4, 2), None)):
+            locataire = Locataires.objects.create(
+                nom="Colocataire", prenom=prenom, email=f"{prenom.lower()}@exemple.fr", telephone="0611111111"
+            )
+            ContratLocataire.objects.create(contrat=contrat, locataire=locataire, ordre=2, date_entree=entree, date_sortie=sortie)
+
+    def test_envoi_du_mois(self):
+        """Chaque quittance part une fois, PDF joint, aux locataires présents ce mois-là"""
+        Quittance.objects.filter(pk=self.quittances[1].pk).update(fichier_pdf='')
+
+        resultat = EnvoiQuittances(workers=3, debit=0).envoyer_mois(self.mois)
+
+        self.assertEqual(len(resultat['envoyees']), 6)
+        self.assertEqual(resultat['echecs'], [])
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(
+            sorted(tuple(message.to) for message in mail.outbox),
+            sorted((f"locataire{numero}@exemple.fr",) for numero in range(1, 7))
+        )
+        nom, contenu, type_mime = mail.outbox[0].attachments[0]
+        self.assertEqual(type_mime, 'application/pdf')
+        self.assertEqual(contenu[:4], b'%PDF')
+
+        quittances = Quittance.objects.filter(mois=self.mois)
+        self.assertFalse(quittances.filter(envoyee=False).exists())
+        self.assertFalse(quittances.exclude(mode_envoi='email').exists())
+        self.assertFalse(quittances.filter(date_envoi__isnull=True).exists())
+        self.assertTrue(quittances.get(pk=self.quittances[1].pk).fichier_pdf)
+
+        # Déjà envoyées : rien à refaire
+        mail.outbox = []
+        self.assertEqual(EnvoiQuittances(debit=0).envoyer_mois(self.mois)['messages'], [])
+        self.assertEqual(mail.outbox, [])
+
+    def test_simulation(self):
+        """La simulation ne génère ni n'enregistre rien, pas même les PDF manquants"""
+        quittance = self.quittances[1]
+        Quittance.objects.filter(pk=quittance.pk).update(fichier_pdf='')
+        fichier = os.path.join(self.media_root, quittance.fichier_pdf.name)
+        os.remove(fichier)
+
+        resultat = EnvoiQuittances(debit=0).envoyer_mois(self.mois, dry_run=True)
+        self.assertEqual(len(resultat['messages']), 6)
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(Quittance.objects.filter(envoyee=True).exists())
+        self.assertFalse(Quittance.objects.get(pk=quittance.pk).fichier_pdf)
+        self.assertFalse(os.path.exists(fichier))
+
+    def test_enregistrement_par_lots(self):
+        """Les quittances envoyées sont marquées au fil de l'envoi, lot par lot"""
+        envoi = EnvoiQuittances(workers=2, debit=0, lot=2)
+        deja_marquees = []
+        marquer = envoi.marquer_envoyees
+
+        def espion(quittances):
+            if quittances:
+                deja_marquees.append(Quittance.objects.filter(envoyee=True).count())
+            marquer(quittances)
+
+        with mock.patch.object(envoi, 'marquer_envoyees', side_effect=espion):
+            resultat = envoi.envoyer_mois(self.mois)
+
+        self.assertEqual(len(resultat['envoyees']), 6)
+        self.assertEqual(deja_marquees, [0, 2, 4])
+        self.assertEqual(Quittance.objects.filter(envoyee=True, date_envoi__isnull=False).count(), 6)
+
+    def test_smtp_connexions_reutilisees_et_nouveaux_essais(self):
+        """Une connexion par worker ; un refus temporaire est réessayé, un refus définitif non"""
+        serveur = ServeurSMTP(echecs=2, refuses={'locataire6@exemple.fr'})
+        threading.Thread(target=serveur.serve_forever, daemon=True).start()
+        self.addCleanup(serveur.server_close)
+        self.addCleanup(serveur.shutdown)
+
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=serveur.server_address[1], EMAIL_USE_TLS=False,
+        ), self.assertLogs('quittances.envoi') as journal:
+            resultat = EnvoiQuittances(workers=2, debit=0, tentatives=3, delai_tentative=0.01).envoyer_mois(self.mois)
+
+        self.assertEqual(len(resultat['envoyees']), 5)
+        self.assertEqual([q.pk for q, _ in resultat['echecs']], [self.quittances[5].pk])
+        self.assertEqual(len(serveur.messages), 5)
+        # 5 messages acceptés + 2 refus temporaires, le refus définitif n'est essayé qu'une fois
+        self.assertEqual(serveur.essais, 7)
+        self.assertEqual(resultat['essais'], 8)
+        # Deux connexions de départ, rouvertes après chacun des trois échecs
+        self.assertLessEqual(serveur.connexions, 2 + 3)
+        self.assertEqual(sum('non envoyée' in ligne for ligne in journal.output), 1)
+
+        self.assertFalse(Quittance.objects.get(pk=self.quittances[5].pk).envoyee)
+        self.assertEqual(Quittance.objects.filter(envoyee=True, mode_envoi='email').count(), 5)
+
+    def test_limiteur_debit(self):
+        limiteur = LimiteurDebit(50)
+        debut = time.monotonic()
+        for _ in range(11):
+            limiteur.attendre()
+        self.assertGreaterEqual(time.monotonic() - debut, 0.19)
@@ -7,6 +7,8 @@ from .pdf_generator import QuittancePDFGenerator
 from datetime import date
 import calendar
 
+from src.routers import lecture_replica
+
 
 class QuittanceManager:
     """Gestionnaire pour la création et gestion des quittances avec support multi-locataires"""
@@ -225,14 +227,16 @@ class QuittanceManager:
         if annee:
             queryset = queryset.filter(mois__year=annee)
 
-        stats = {
-            'total_quittances': queryset.count(),
-            'quittances_envoyees': queryset.filter(envoyee=True).count(),
-            'montant_total': queryset.aggregate(Sum('total'))['total__sum'] or 0,
-            'par_mois': queryset.values('mois').annotate(
-                nombre=Count('id'),
-                total=Sum('total')
-            ).order_by('-mois')[:12]
-        }
+        # Lectures de reporting : réplique si configurée (évaluées ici, pas au rendu)
+        with lecture_replica():
+            stats = {
+                'total_quittances': queryset.count(),
+                'quittances_envoyees': queryset.filter(envoyee=True).count(),
+                'montant_total': queryset.aggregate(Sum('total'))['total__sum'] or 0,
+                'par_mois': list(queryset.values('mois').annotate(
+                    nombre=Count('id'),
+                    total=Sum('total')
+                ).order_by('-mois')[:12])
+            }
 
         return stats
\ No newline at end of file
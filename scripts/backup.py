@@ -3,16 +3,52 @@
 Script de sauvegarde et restauration de la base de données
 Usage (depuis la RACINE du projet):
   - Backup: python scripts/backup.py --backup
-  - Restore: python scripts/backup.py --restore backup_file.json
+  - Backup incrémental: python scripts/backup.py --backup --incremental
+  - Restore: python scripts/backup.py --restore backup_20240108_153045
+  - Snapshot SQLite: python scripts/backup.py --snapshot [--compresser]
+  - Media: python scripts/backup.py --media
   - List: python scripts/backup.py --list
+
+Format (version 4.0) : un dossier par sauvegarde contenant un fichier
+JSON Lines compressé (gzip) par modèle et un manifest.json (nombre
+d'objets et empreinte SHA-256 de chaque fichier). Tous les modèles des
+applications du projet sont sauvegardés, et restaurés dans l'ordre de leurs
+clés étrangères. Les anciennes sauvegardes en un seul fichier .json restent
+restaurables.
+
+Une sauvegarde incrémentale ne contient que les objets modifiés depuis la
+sauvegarde précédente (updated_at) et les suppressions enregistrées par
+accounts.JournalSuppression ; elle référence sa sauvegarde parente. Les
+tables dérivées (accounts.utils.MODELES_DERIVES), dont les suppressions ne
+sont pas journalisées, y figurent en entier et remplacent celles de la
+sauvegarde parente.
+
+Un snapshot (base SQLite uniquement) est une copie page à page du fichier de
+base, faite avec l'API de sauvegarde de SQLite pendant que l'application
+reste en service ; sa restauration remplace le fichier de base atomiquement.
+
+Les fichiers de MEDIA_ROOT (quittances, contrats, factures, lettres...) sont
+sauvegardés dans un magasin commun backups/objets/ où chaque fichier est
+stocké une seule fois sous son empreinte SHA-256 ; un point de sauvegarde
+media (media_<date>) n'est qu'un index chemin -> empreinte.
 """
 
 import os
 import sys
 import django
+import gzip
+import hashlib
 import json
 import argparse
-from datetime import datetime
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from graphlib import TopologicalSorter, CycleError
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 
 # Ajouter le répertoire racine au PYTHONPATH
@@ -39,86 +75,466 @@ except Exception as e:
     sys.exit(1)
 
 from django.core import serializers
+from django.core.management.color import no_style
 from django.apps import apps
 from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import JournalSuppression
+from accounts.utils import MODELES_DERIVES, get_project_models
+
+
+# Nombre d'objets lus et sérialisés à la fois : la mémoire utilisée ne
+# dépend pas de la taille de la base
+CHUNK_SIZE = 2000
+
+# Compression gzip : 6 offre l'essentiel du gain pour un coût CPU modéré
+COMPRESSION_LEVEL = 6
+
+# Threads de sauvegarde (un flux par modèle)
+WORKERS = 4
+
+MANIFEST = 'manifest.json'
+SUPPRESSIONS = 'suppressions.jsonl.gz'
+FORMAT_VERSION = '4.0'
+
+# Sauvegarde incrémentale : recouvrement avec la précédente, pour ne pas
+# manquer les lignes enregistrées par une transaction encore ouverte
+# pendant la sauvegarde précédente (les doublons sont sans effet)
+MARGE_INCREMENTALE = timedelta(minutes=5)
+
+# Snapshot SQLite : pages copiées par étape, et pause entre deux étapes
+# pour laisser les requêtes de l'application s'exécuter pendant la copie
+SNAPSHOT_PAGES = 1024
+SNAPSHOT_PAUSE = 0.005
+
+# Fichiers media : magasin d'objets adressés par leur contenu (SHA-256)
+OBJETS_MEDIA = 'objets'
+
+# Modèles techniques jamais sauvegardés
+MODELES_EXCLUS = {'accounts.JournalSuppression'}
+
+
+def iterer_lots(iterable, taille):
+    """Découpe un itérable en listes d'au plus `taille` éléments"""
+    iterateur = iter(iterable)
+    while True:
+        lot = list(islice(iterateur, taille))
+        if not lot:
+            return
+        yield lot
+
+
+def lire_lignes(chemin, empreinte=None):
+    """
+    Lit un fichier JSON Lines compressé ligne par ligne
+
+    Si `empreinte` (objet hashlib) est fourni, il est alimenté avec le
+    contenu décompressé au fil de la lecture.
+    """
+    with gzip.open(chemin, 'rb') as f:
+        for ligne in f:
+            if empreinte is not None:
+                empreinte.update(ligne)
+            yield ligne.decode('utf-8')
+
+
+def get_champ_modification(model):
+    """Nom du champ auto_now du modèle (updated_at...), ou None"""
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            return field.name
+    return None
+
+
+def ecrire_fichier(chemin, lots):
+    """
+    Écrit des lots JSON Lines dans un fichier gzip
+
+    Args:
+        lots: Itérable de tuples (nombre de lignes, contenu encodé en UTF-8)
+
+    Returns:
+        dict: Entrée du manifest (fichier, nombre, sha256, taille)
+    """
+    empreinte = hashlib.sha256()
+    count = 0
+    taille = 0
+
+    with gzip.open(chemin, 'wb', compresslevel=COMPRESSION_LEVEL) as f:
+        for nombre, donnees in lots:
+            empreinte.update(donnees)
+            f.write(donnees)
+            count += nombre
+            taille += len(donnees)
+
+    return {
+        'fichier': chemin.name,
+        'count': count,
+        'sha256': empreinte.hexdigest(),
+        'taille': taille,
+    }
+
+
+def get_dependances(model, models):
+    """
+    Modèles dont dépend `model` via ses clés étrangères
+
+    Returns:
+        dict: {modèle cible: True si la clé étrangère est obligatoire}
+    """
+    dependances = {}
+    for field in model._meta.concrete_fields:
+        cible = field.related_model if field.is_relation else None
+        if cible is None or cible is model or cible not in models:
+            continue
+        dependances[cible] = dependances.get(cible, False) or not field.null
+
+    for field in model._meta.many_to_many:
+        if field.remote_field.through._meta.auto_created and field.related_model in models:
+            dependances.setdefault(field.related_model, False)
+
+    return dependances
+
+
+def trier_par_dependances(models):
+    """
+    Trie les modèles pour que chacun vienne après ceux qu'il référence
+
+    Les cycles (ex. Quittance.paiement <-> PaiementLocataire.quittance) sont
+    rompus en ignorant les clés étrangères facultatives qui les composent ;
+    un cycle de clés obligatoires est une erreur.
+    """
+    models = set(models)
+    graphe = {model: get_dependances(model, models) for model in models}
+
+    while True:
+        # Tri stable : à dépendances égales, ordre alphabétique des labels
+        sorter = TopologicalSorter()
+        for model in sorted(models, key=lambda m: m._meta.label):
+            sorter.add(model, *sorted(graphe[model], key=lambda m: m._meta.label))
+        try:
+            return list(sorter.static_order())
+        except CycleError as e:
+            # Chaque nœud du cycle est une dépendance du suivant
+            cycle = e.args[1]
+            rompu = False
+            for dependance, model in zip(cycle, cycle[1:]):
+                if graphe[model].get(dependance) is False:
+                    del graphe[model][dependance]
+                    rompu = True
+                    break
+            if not rompu:
+                labels = ' -> '.join(m._meta.label for m in cycle)
+                raise ValueError(f"Cycle de clés étrangères obligatoires: {labels}")
+
+
+@contextmanager
+def auto_now_desactive(model):
+    """
+    Désactive temporairement auto_now / auto_now_add d'un modèle
+
+    bulk_create appelle pre_save() sur chaque champ : sans cela, les dates
+    created_at / updated_at restaurées seraient remplacées par l'heure courante.
+    """
+    champs = [
+        (f, f.auto_now, f.auto_now_add)
+        for f in model._meta.concrete_fields
+        if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+    ]
+    for champ, _, _ in champs:
+        champ.auto_now = champ.auto_now_add = False
+    try:
+        yield
+    finally:
+        for champ, auto_now, auto_now_add in champs:
+            champ.auto_now = auto_now
+            champ.auto_now_add = auto_now_add
 
 
 class DatabaseManager:
     """Gestionnaire de sauvegarde/restauration de la base de données"""
 
-    def __init__(self):
+    def __init__(self, chunk_size=CHUNK_SIZE, workers=WORKERS):
         # Le dossier backups sera créé à la racine du projet
         self.backup_dir = PROJECT_ROOT / 'backups'
         self.backup_dir.mkdir(exist_ok=True)
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+        # Ordre de restauration (important pour les FK)
+        self.models = trier_par_dependances([
+            model for model in get_project_models()
+            if model._meta.label not in MODELES_EXCLUS
+        ])
+        self.restore_order = [model._meta.label for model in self.models]
+
+    def serialize_model(self, model, depuis=None):
+        """
+        Sérialise les objets d'un modèle en JSON Lines, lot par lot
+
+        Les objets sont lus dans l'ordre des clés primaires avec iterator() :
+        la sérialisation d'un même contenu est toujours identique, ce qui
+        permet de comparer les empreintes après une restauration.
+
+        Args:
+            depuis: Ne retient que les objets modifiés depuis cette date
+                (les modèles sans champ auto_now et les tables dérivées
+                sont toujours complets)
+
+        Yields:
+            tuple: (nombre d'objets du lot, contenu encodé en UTF-8)
+        """
+        objets = model._base_manager.order_by('pk')
+        champ = get_champ_modification(model)
+        if depuis and champ and model._meta.label not in MODELES_DERIVES:
+            objets = objets.filter(**{f'{champ}__gte': depuis})
+
+        for lot in iterer_lots(objets.iterator(chunk_size=self.chunk_size), self.chunk_size):
+            yield len(lot), serializers.serialize('jsonl', lot).encode('utf-8')
+
+    def backup_model(self, model, dossier, depuis=None):
+        """
+        Écrit les objets d'un modèle dans <app.Model>.jsonl.gz
+
+        Chaque lot est sérialisé puis compressé immédiatement.
+
+        Returns:
+            dict: Entrée du manifest (fichier, nombre, sha256, taille)
+        """
+        try:
+            return ecrire_fichier(
+                dossier / f"{model._meta.label}.jsonl.gz",
+                self.serialize_model(model, depuis)
+            )
+        finally:
+            # Appelé depuis un thread : sa connexion ne doit pas rester ouverte
+            connection.close()
+
+    def backup_deletions(self, dossier, depuis):
+        """Écrit les suppressions journalisées depuis `depuis` dans suppressions.jsonl.gz"""
+        suppressions = JournalSuppression.objects.filter(
+            date_suppression__gte=depuis
+        ).order_by('id').values_list('modele', 'objet_id')
+
+        def lots():
+            for lot in iterer_lots(suppressions.iterator(chunk_size=self.chunk_size), self.chunk_size):
+                yield len(lot), ''.join(
+                    json.dumps({'model': modele, 'pk': objet_id}) + '\n'
+                    for modele, objet_id in lot
+                ).encode('utf-8')
+
+        return ecrire_fichier(dossier / SUPPRESSIONS, lots())
+
+    def get_latest_backup(self):
+        """
+        Dernière sauvegarde pouvant servir de base à une sauvegarde incrémentale
+
+        Returns:
+            tuple: (dossier, manifest) ou (None, None)
+        """
+        dernier = (None, None)
+        for dossier in self.backup_dir.iterdir():
+            if not (dossier / MANIFEST).exists():
+                continue
+            manifest = self.read_manifest(dossier)
+            if not manifest.get('high_water_mark'):
+                continue  # Sauvegarde antérieure au format incrémental
+            if dernier[1] is None or manifest['high_water_mark'] > dernier[1]['high_water_mark']:
+                dernier = (dossier, manifest)
+        return dernier
+
+    def checksum_model(self, model):
+        """Nombre d'objets et empreinte SHA-256 du contenu actuel d'un modèle"""
+        empreinte = hashlib.sha256()
+        count = 0
+        for nombre, donnees in self.serialize_model(model):
+            empreinte.update(donnees)
+            count += nombre
+        return count, empreinte.hexdigest()
+
+    def create_backup(self, filename=None, incremental=False):
+        """
+        Crée une sauvegarde de la base de données
+
+        Une sauvegarde incrémentale ne contient que les objets modifiés
+        (champ updated_at) depuis la sauvegarde précédente, ainsi que les
+        suppressions journalisées. Elle se restaure à la suite de la chaîne
+        de sauvegardes dont elle dépend.
+
+        Args:
+            filename: Nom du dossier (défaut : backup_<date>)
+            incremental: Sauvegarde incrémentale au lieu de complète
+        """
+        # Point de reprise de la prochaine sauvegarde incrémentale
+        high_water_mark = timezone.now()
+
+        depuis = None
+        parent = None
+        if incremental:
+            parent_path, parent = self.get_latest_backup()
+            if parent is None:
+                raise FileNotFoundError("Aucune sauvegarde précédente : créez d'abord une sauvegarde complète")
+            depuis = datetime.fromisoformat(parent['high_water_mark']) - MARGE_INCREMENTALE
 
-    def create_backup(self, filename=None):
-        """Crée une sauvegarde complète de la base de données"""
         if not filename:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'backup_{timestamp}.json'
+            filename = f'backup_{timestamp}'
 
         backup_path = self.backup_dir / filename
+        backup_path.mkdir()
 
-        print(f"📦 Création de la sauvegarde: {backup_path}")
-
-        # Modèles à sauvegarder - selon votre diagramme
-        models_to_backup = [
-            'accounts.CustomUser',
-            'immeuble.Immeuble',
-            'immeuble.Appartement',
-            'persons.Locataires',
-            'persons.Proprietaires',
-            'contrats.Contrats',
-            'paiements.PaiementLocataire',
-            'quittances.Quittance',
-        ]
+        if incremental:
+            print(f"📦 Création de la sauvegarde incrémentale: {backup_path}")
+            print(f"🔗 Depuis: {parent_path.name} ({parent['high_water_mark']})")
+        else:
+            print(f"📦 Création de la sauvegarde: {backup_path}")
 
-        all_objects = []
+        manifest_models = {}
         stats = {}
+        erreurs = []
 
-        for model_name in models_to_backup:
-            try:
-                model = apps.get_model(model_name)
-                objects = model.objects.all()
-                count = objects.count()
+        # Un flux (et une connexion) par modèle, en parallèle
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                (model, pool.submit(self.backup_model, model, backup_path, depuis))
+                for model in self.models
+            ]
 
-                if count > 0:
-                    serialized = serializers.serialize('json', objects)
-                    model_data = json.loads(serialized)
+            for model, future in futures:
+                model_name = model._meta.label
+                try:
+                    entree = future.result()
+                except Exception as e:
+                    erreurs.append(model_name)
+                    print(f"❌ Erreur avec {model_name}: {e}")
+                    continue
 
-                    for obj in model_data:
-                        obj['model_name'] = model_name
-                        all_objects.append(obj)
+                manifest_models[model_name] = entree
+                stats[model_name] = entree['count']
+                print(f"✅ {model._meta.verbose_name}: {entree['count']} objet(s)")
 
-                stats[model_name] = count
-                print(f"✅ {model._meta.verbose_name}: {count} objet(s)")
+        if erreurs:
+            raise RuntimeError(f"Sauvegarde incomplète ({', '.join(erreurs)})")
 
-            except LookupError:
-                print(f"⚠️  Modèle introuvable: {model_name} (ignoré)")
-            except Exception as e:
-                print(f"❌ Erreur avec {model_name}: {e}")
+        suppressions = None
+        if incremental:
+            suppressions = self.backup_deletions(backup_path, depuis)
+            print(f"🗑️  Suppressions: {suppressions['count']}")
 
-        # Sauvegarde dans le fichier
-        backup_data = {
+        # Le manifest est écrit en dernier : une sauvegarde interrompue n'en a pas
+        manifest = {
             'timestamp': datetime.now().isoformat(),
-            'version': '1.0',
+            'version': FORMAT_VERSION,
+            'format': 'jsonl.gz',
             'django_version': django.get_version(),
+            'type': 'incrementale' if incremental else 'complete',
+            'parent': parent_path.name if incremental else None,
+            'depuis': depuis.isoformat() if depuis else None,
+            'high_water_mark': high_water_mark.isoformat(),
+            'ordre': self.restore_order,
             'stats': stats,
-            'objects': all_objects
+            'models': manifest_models,
+            'suppressions': suppressions,
         }
+        manifest_tmp = backup_path / f"{MANIFEST}.tmp"
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(manifest_tmp, backup_path / MANIFEST)
 
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, indent=2, ensure_ascii=False)
+        if not incremental:
+            # Les suppressions antérieures sont couvertes par cette sauvegarde complète
+            JournalSuppression.objects.filter(
+                date_suppression__lt=high_water_mark - MARGE_INCREMENTALE
+            ).delete()
 
-        file_size = backup_path.stat().st_size / 1024  # KB
+        total = sum(stats.values())
+        brut = sum(e['taille'] for e in manifest_models.values()) / 1024  # KB
+        file_size = sum(p.stat().st_size for p in backup_path.iterdir()) / 1024  # KB
         print(f"\n✅ Sauvegarde créée: {backup_path}")
-        print(f"📊 Total: {len(all_objects)} objets sauvegardés")
-        print(f"💾 Taille: {file_size:.1f} KB")
+        print(f"📊 Total: {total} objets sauvegardés")
+        print(f"💾 Taille: {file_size:.1f} KB ({brut:.1f} KB avant compression)")
 
         return backup_path
 
-    def restore_backup(self, backup_file):
-        """Restaure une sauvegarde"""
+    def read_manifest(self, backup_path):
+        """Lit le manifest d'une sauvegarde au format dossier"""
+        with open(backup_path / MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def verify_backup(self, backup_path, manifest=None):
+        """
+        Vérifie l'intégrité d'une sauvegarde (nombre d'objets et SHA-256)
+
+        Les fichiers sont relus en flux, sans être chargés en mémoire.
+
+        Returns:
+            list: Messages d'erreur (vide si la sauvegarde est intègre)
+        """
+        manifest = manifest or self.read_manifest(backup_path)
+        erreurs = []
+
+        fichiers = list(manifest['models'].items())
+        if manifest.get('suppressions'):
+            fichiers.append(('Suppressions', manifest['suppressions']))
+
+        for model_name, entree in fichiers:
+            chemin = backup_path / entree['fichier']
+            if not chemin.exists():
+                erreurs.append(f"{model_name}: fichier {entree['fichier']} manquant")
+                continue
+
+            empreinte = hashlib.sha256()
+            try:
+                count = sum(1 for _ in lire_lignes(chemin, empreinte))
+            except (OSError, EOFError) as e:
+                erreurs.append(f"{model_name}: fichier illisible ({e})")
+                continue
+
+            if count != entree['count']:
+                erreurs.append(f"{model_name}: {count} objet(s) au lieu de {entree['count']}")
+            if empreinte.hexdigest() != entree['sha256']:
+                erreurs.append(f"{model_name}: empreinte SHA-256 invalide")
+
+        return erreurs
+
+    def iter_backup_objects(self, backup_path, manifest, model_name):
+        """Objets désérialisés d'un modèle, lus en flux"""
+        entree = manifest['models'].get(model_name)
+        if not entree:
+            return iter(())
+        return serializers.deserialize('jsonl', lire_lignes(backup_path / entree['fichier']))
+
+    def iter_legacy_objects(self, objects_by_model, model_name):
+        """Objets désérialisés d'un modèle, depuis une sauvegarde .json (version 1.0)"""
+        for obj_data in objects_by_model.get(model_name, []):
+            # Nettoyage des données
+            obj_data_clean = {
+                'model': obj_data['model'],
+                'pk': obj_data['pk'],
+                'fields': obj_data['fields']
+            }
+            yield from serializers.deserialize('python', [obj_data_clean])
+
+    def restore_backup(self, backup_file, mode='bulk', verifier=True, purger=False):
+        """
+        Restaure une sauvegarde (dossier version 2.0+ ou fichier .json version 1.0)
+
+        Une sauvegarde au format dossier remplace le contenu des tables
+        qu'elle contient, puis le résultat est comparé au manifest (nombre
+        d'objets et empreinte de chaque modèle). Pour une sauvegarde
+        incrémentale, la sauvegarde complète d'origine est restaurée puis
+        chaque sauvegarde incrémentale de la chaîne est rejouée, dans la même
+        transaction. Une ancienne sauvegarde .json écrase seulement les objets
+        de même clé primaire.
+
+        Args:
+            backup_file: Nom ou chemin de la sauvegarde
+            mode: 'bulk' (par lots, transactionnel) ou 'objet' (objet par objet)
+            verifier: Compare le résultat au manifest avant de valider
+            purger: Point media : supprime les fichiers absents de la sauvegarde
+        """
         backup_path = Path(backup_file)
 
         if not backup_path.exists():
@@ -129,14 +545,57 @@ class DatabaseManager:
 
         print(f"📥 Restauration depuis: {backup_path}")
 
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_data = json.load(f)
+        chaine = []
+        if backup_path.is_dir() and self.read_manifest(backup_path).get('type') == 'snapshot':
+            return self.restore_snapshot(backup_path, self.read_manifest(backup_path))
+
+        if backup_path.is_dir() and self.read_manifest(backup_path).get('type') == 'media':
+            return self.restore_media(backup_path, self.read_manifest(backup_path), purger=purger)
+
+        if backup_path.is_dir():
+            chaine = self.get_chain(backup_path)
+            backup_path, backup_data = chaine[0]
+
+            if len(chaine) > 1:
+                print(f"🔗 Chaîne: {' → '.join(path.name for path, _ in chaine)}")
+                if mode == 'objet':
+                    raise ValueError("Le mode objet par objet ne s'applique pas aux sauvegardes incrémentales")
+
+            print("🔍 Vérification de l'intégrité...")
+            erreurs = [
+                f"{path.name}: {erreur}"
+                for path, manifest in chaine
+                for erreur in self.verify_backup(path, manifest)
+            ]
+            if erreurs:
+                for erreur in erreurs:
+                    print(f"  ❌ {erreur}")
+                raise ValueError("Sauvegarde corrompue, restauration impossible")
+
+            def iter_objects(model_name):
+                return self.iter_backup_objects(backup_path, backup_data, model_name)
+        else:
+            with open(backup_path, 'r', encoding='utf-8') as f:
+                backup_data = json.load(f)
+
+            # Grouper les objets par modèle
+            objects_by_model = {}
+            for obj_data in backup_data['objects']:
+                objects_by_model.setdefault(obj_data.get('model_name'), []).append(obj_data)
+
+            def iter_objects(model_name):
+                return self.iter_legacy_objects(objects_by_model, model_name)
 
         print(f"📅 Sauvegarde du: {backup_data.get('timestamp', 'Inconnue')}")
         print(f"🔢 Django version: {backup_data.get('django_version', 'Inconnue')}")
-        print(f"📊 Objets à restaurer: {len(backup_data['objects'])}")
+
+        for path, manifest in chaine[1:]:
+            print(f"➕ Incrément du: {manifest['timestamp']} "
+                  f"({sum(manifest['stats'].values())} objets, "
+                  f"{manifest['suppressions']['count']} suppressions)")
 
         if 'stats' in backup_data:
+            print(f"📊 Objets à restaurer: {sum(backup_data['stats'].values())}")
             print("\n📋 Détail par modèle:")
             for model_name, count in backup_data['stats'].items():
                 print(f"  - {model_name}: {count}")
@@ -148,56 +607,290 @@ class DatabaseManager:
             print("Restauration annulée.")
             return
 
-        # Restauration par modèle
-        restored_count = 0
-        errors = []
+        inconnus = set(backup_data.get('stats', {})) - set(self.restore_order)
+        for model_name in sorted(inconnus):
+            print(f"⚠️  Modèle introuvable: {model_name} (ignoré)")
 
-        # Ordre de restauration (important pour les FK)
-        restore_order = [
-            'accounts.CustomUser',
-            'persons.Proprietaires',
-            'persons.Locataires',
-            'immeuble.Immeuble',
-            'immeuble.Appartement',
-            'contrats.Contrats',
-            'paiements.PaiementLocataire',
-            'quittances.Quittance',
-        ]
+        if mode == 'objet':
+            models_to_restore = [
+                model_name for model_name in self.restore_order
+                if backup_data.get('stats', {}).get(model_name)
+            ]
+            self.restore_one_by_one(models_to_restore, iter_objects)
+        elif chaine:
+            models_to_restore = [
+                model_name for model_name in self.restore_order
+                if model_name in backup_data['models']
+            ]
+            with transaction.atomic(), connection.constraint_checks_disabled():
+                self.restore_bulk(models_to_restore, iter_objects, remplacer=True,
+                                  manifest=backup_data if verifier else None)
+
+                for path, manifest in chaine[1:]:
+                    self.apply_increment(path, manifest)
+        else:
+            models_to_restore = [
+                model_name for model_name in self.restore_order
+                if backup_data.get('stats', {}).get(model_name)
+            ]
+            self.restore_bulk(models_to_restore, iter_objects)
 
-        # Grouper les objets par modèle
-        objects_by_model = {}
-        for obj_data in backup_data['objects']:
-            model_name = obj_data.get('model_name')
-            if model_name not in objects_by_model:
-                objects_by_model[model_name] = []
-            objects_by_model[model_name].append(obj_data)
+    def get_chain(self, backup_path):
+        """
+        Chaîne de sauvegardes à restaurer, de la sauvegarde complète à `backup_path`
 
-        # Restaurer dans l'ordre
-        for model_name in restore_order:
-            if model_name not in objects_by_model:
+        Returns:
+            list: [(dossier, manifest), ...] en commençant par la sauvegarde complète
+        """
+        chaine = []
+        while True:
+            manifest = self.read_manifest(backup_path)
+            chaine.insert(0, (backup_path, manifest))
+            if manifest.get('type') != 'incrementale':
+                return chaine
+
+            parent = self.backup_dir / manifest['parent']
+            if not (parent / MANIFEST).exists():
+                raise FileNotFoundError(f"Sauvegarde parente introuvable: {manifest['parent']}")
+            backup_path = parent
+
+    def apply_increment(self, backup_path, manifest):
+        """
+        Rejoue une sauvegarde incrémentale : objets modifiés puis suppressions
+
+        Les tables dérivées, complètes dans chaque sauvegarde, sont vidées
+        puis rechargées. Doit être appelé dans la transaction de la
+        restauration.
+        """
+        print(f"\n➕ Application de {backup_path.name}...")
+        debut = time.monotonic()
+
+        models = []
+        count = 0
+        for model_name in self.restore_order:
+            derive = model_name in MODELES_DERIVES and model_name in manifest['models']
+            if not manifest['stats'].get(model_name) and not derive:
                 continue
+            model = apps.get_model(model_name)
+            models.append(model)
+            with transaction.atomic():
+                if derive:
+                    self.vider_tables([model])
+                count += self.restore_model(
+                    model, self.iter_backup_objects(backup_path, manifest, model_name)
+                )
 
-            print(f"\n🔄 Restauration de {model_name}...")
+        suppressions = 0
+        labels = set(self.restore_order)
+        lignes = lire_lignes(backup_path / manifest['suppressions']['fichier'])
+        for lot in iterer_lots(map(json.loads, lignes), self.chunk_size):
+            par_model = {}
+            for ligne in lot:
+                if ligne['model'] in labels:
+                    par_model.setdefault(ligne['model'], []).append(ligne['pk'])
+            for model_name, pks in par_model.items():
+                model = apps.get_model(model_name)
+                models.append(model)
+                suppressions += self.supprimer_objets(model, pks)
 
-            for obj_data in objects_by_model[model_name]:
-                try:
-                    model = apps.get_model(model_name)
+        self.finaliser_restauration(models)
+
+        duree = time.monotonic() - debut
+        print(f"  ✅ {count} objet(s) restauré(s), {suppressions} supprimé(s) en {duree:.2f}s")
+
+    def supprimer_objets(self, model, pks):
+        """
+        Supprime des objets par clé primaire, sans cascade ni signal
+
+        Les objets supprimés en cascade figurent eux-mêmes dans le journal.
+
+        Returns:
+            int: Nombre de lignes supprimées
+        """
+        pks = [model._meta.pk.to_python(pk) for pk in pks]
+        marqueurs = ', '.join(['%s'] * len(pks))
+        quote = connection.ops.quote_name
+
+        with connection.cursor() as cursor:
+            for field in model._meta.many_to_many:
+                through = field.remote_field.through
+                if through._meta.auto_created:
+                    colonne = through._meta.get_field(field.m2m_field_name()).column
+                    cursor.execute(
+                        f"DELETE FROM {quote(through._meta.db_table)} WHERE {quote(colonne)} IN ({marqueurs})",
+                        pks
+                    )
+            cursor.execute(
+                f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({marqueurs})",
+                pks
+            )
+            return cursor.rowcount
 
-                    # Nettoyage des données
-                    obj_data_clean = {
-                        'model': obj_data['model'],
-                        'pk': obj_data['pk'],
-                        'fields': obj_data['fields']
-                    }
+    def finaliser_restauration(self, models):
+        """Vérifie les clés étrangères et réinitialise les séquences des tables restaurées"""
+        print("\n🔍 Vérification des clés étrangères...")
+        connection.check_constraints(table_names=list({m._meta.db_table for m in models}))
 
-                    # Désérialisation - Django attend une CHAÎNE JSON, pas une liste
-                    json_str = json.dumps([obj_data_clean])
-                    for deserialized_obj in serializers.deserialize('json', json_str):
-                        deserialized_obj.save()
-                        restored_count += 1
+        sequences = connection.ops.sequence_reset_sql(no_style(), list(set(models)))
+        if sequences:
+            with connection.cursor() as cursor:
+                for sql in sequences:
+                    cursor.execute(sql)
+
+    def vider_tables(self, models):
+        """Supprime le contenu des tables (et des tables many-to-many automatiques)"""
+        tables = []
+        for model in models:
+            tables.append(model._meta.db_table)
+            tables.extend(
+                field.remote_field.through._meta.db_table
+                for field in model._meta.many_to_many
+                if field.remote_field.through._meta.auto_created
+            )
+
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(table)}")
+
+    def verify_restore(self, manifest, model_names):
+        """
+        Compare le contenu restauré au manifest de la sauvegarde
+
+        Returns:
+            list: Différences constatées (vide si la restauration est fidèle)
+        """
+        erreurs = []
+        for model_name in model_names:
+            entree = manifest['models'][model_name]
+            count, sha256 = self.checksum_model(apps.get_model(model_name))
+            if count != entree['count']:
+                erreurs.append(f"{model_name}: {count} objet(s) au lieu de {entree['count']}")
+            elif sha256 != entree['sha256']:
+                erreurs.append(f"{model_name}: contenu différent de la sauvegarde")
+        return erreurs
+
+    def restore_model(self, model, objets):
+        """
+        Restaure les objets d'un modèle par lots (bulk_create)
+
+        Les lignes existantes de même clé primaire sont écrasées (upsert),
+        comme le faisait la restauration objet par objet. Les relations
+        many-to-many sont remplacées pour les objets restaurés.
+
+        Returns:
+            int: Nombre d'objets restaurés
+        """
+        pk_name = model._meta.pk.name
+        update_fields = [f.name for f in model._meta.concrete_fields if not f.primary_key]
+        count = 0
+
+        with auto_now_desactive(model):
+            for lot in iterer_lots(objets, self.chunk_size):
+                model._base_manager.bulk_create(
+                    [obj.object for obj in lot],
+                    update_conflicts=True,
+                    unique_fields=[pk_name],
+                    update_fields=update_fields,
+                )
+                self.restore_m2m(model, lot)
+                count += len(lot)
+
+        return count
+
+    def restore_m2m(self, model, lot):
+        """Remplace les liaisons many-to-many (tables automatiques) d'un lot d'objets"""
+        pks = [obj.object.pk for obj in lot]
+
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created:
+                continue  # Modèle intermédiaire explicite, restauré pour lui-même
+
+            source = field.m2m_field_name()
+            cible = field.m2m_reverse_field_name()
+
+            through._base_manager.filter(**{f'{source}__in': pks}).delete()
+            through._base_manager.bulk_create([
+                through(**{f'{source}_id': obj.object.pk, f'{cible}_id': valeur})
+                for obj in lot
+                for valeur in obj.m2m_data.get(field.name, [])
+            ], batch_size=self.chunk_size)
+
+    def restore_bulk(self, models_to_restore, iter_objects, remplacer=False, manifest=None):
+        """
+        Restauration en masse, en une seule transaction
+
+        Chaque modèle est restauré dans sa propre transaction imbriquée, par
+        lots. Les contraintes de clés étrangères sont différées pendant le
+        chargement puis vérifiées en une fois : en cas d'erreur, la base
+        reste dans son état initial. Les séquences sont réinitialisées à la fin.
+
+        Args:
+            remplacer: Vide les tables avant de les recharger
+            manifest: Si fourni, le contenu restauré est comparé à ce
+                manifest et la transaction annulée en cas de différence
+        """
+        models = [apps.get_model(model_name) for model_name in models_to_restore]
+        restored_count = 0
+        debut = time.monotonic()
+
+        try:
+            with transaction.atomic(), connection.constraint_checks_disabled():
+                if remplacer:
+                    self.vider_tables(models)
+
+                for model_name, model in zip(models_to_restore, models):
+                    print(f"\n🔄 Restauration de {model_name}...")
+                    debut_model = time.monotonic()
+
+                    with transaction.atomic():
+                        count = self.restore_model(model, iter_objects(model_name))
+
+                    duree = time.monotonic() - debut_model
+                    restored_count += count
+                    print(f"  ✅ {count} objet(s) en {duree:.2f}s ({count / max(duree, 1e-6):.0f} objets/s)")
+
+                self.finaliser_restauration(models)
+
+                if manifest:
+                    print("🔍 Comparaison avec la sauvegarde...")
+                    erreurs = self.verify_restore(manifest, models_to_restore)
+                    if erreurs:
+                        for erreur in erreurs:
+                            print(f"  ❌ {erreur}")
+                        raise ValueError("Le contenu restauré diffère de la sauvegarde")
+
+        except Exception as e:
+            print(f"\n{'=' * 60}")
+            print(f"❌ Restauration annulée, aucune donnée modifiée: {e}")
+            raise
+
+        duree = time.monotonic() - debut
+        print(f"\n{'=' * 60}")
+        print(f"✅ Restauration terminée: {restored_count} objets restaurés en {duree:.2f}s "
+              f"({restored_count / max(duree, 1e-6):.0f} objets/s)")
+
+    def restore_one_by_one(self, models_to_restore, iter_objects):
+        """
+        Restauration objet par objet, sans transaction
+
+        Plus lente, mais les objets invalides sont signalés individuellement
+        au lieu d'annuler toute la restauration.
+        """
+        restored_count = 0
+        errors = []
+
+        # Restaurer dans l'ordre
+        for model_name in models_to_restore:
+            print(f"\n🔄 Restauration de {model_name}...")
+
+            for deserialized_obj in iter_objects(model_name):
+                try:
+                    deserialized_obj.save()
+                    restored_count += 1
 
                 except Exception as e:
-                    error_msg = f"Erreur {model_name} (pk={obj_data.get('pk')}): {e}"
+                    error_msg = f"Erreur {model_name} (pk={deserialized_obj.object.pk}): {e}"
                     errors.append(error_msg)
                     print(f"  ⚠️  {error_msg}")
 
@@ -212,9 +905,318 @@ class DatabaseManager:
             if len(errors) > 10:
                 print(f"  ... et {len(errors) - 10} autre(s) erreur(s)")
 
+    def get_sqlite_path(self):
+        """Chemin du fichier de la base SQLite (erreur pour un autre moteur)"""
+        base = settings.DATABASES['default']
+        if base['ENGINE'] != 'django.db.backends.sqlite3':
+            raise ValueError("Les snapshots ne sont disponibles que pour une base SQLite")
+        return Path(base['NAME'])
+
+    def create_snapshot(self, filename=None, pages=SNAPSHOT_PAGES, compresser=False):
+        """
+        Copie la base SQLite page à page avec sqlite3.Connection.backup
+
+        La copie avance par étapes de `pages` pages. Entre deux étapes le
+        verrou de lecture est relâché, si bien que l'application continue de
+        lire et d'écrire ; une écriture concurrente fait reprendre la copie
+        pour que le snapshot reste cohérent. Le fichier obtenu est vérifié
+        (PRAGMA integrity_check) puis éventuellement compressé.
+        """
+        db_path = self.get_sqlite_path()
+
+        if not filename:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'snapshot_{timestamp}'
+
+        backup_path = self.backup_dir / filename
+        backup_path.mkdir()
+        copie = backup_path / 'db.sqlite3'
+
+        print(f"📸 Snapshot de {db_path} vers {backup_path}")
+        debut = time.monotonic()
+
+        def progression(status, remaining, total):
+            if total:
+                print(f"\r  ⏳ {100 * (total - remaining) // total}% ({total} pages)", end='', flush=True)
+            time.sleep(SNAPSHOT_PAUSE)
+
+        source = sqlite3.connect(db_path)
+        destination = sqlite3.connect(copie)
+        try:
+            with destination:
+                source.backup(destination, pages=pages, progress=progression)
+            verification = destination.execute('PRAGMA integrity_check').fetchone()[0]
+        finally:
+            destination.close()
+            source.close()
+        print()
+
+        if verification != 'ok':
+            raise RuntimeError(f"Snapshot invalide: {verification}")
+
+        fichier = copie
+        if compresser:
+            fichier = backup_path / 'db.sqlite3.gz'
+            with open(copie, 'rb') as f_in, gzip.open(fichier, 'wb', compresslevel=COMPRESSION_LEVEL) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            copie.unlink()
+
+        manifest = {
+            'timestamp': datetime.now().isoformat(),
+            'version': FORMAT_VERSION,
+            'type': 'snapshot',
+            'django_version': django.get_version(),
+            'fichier': fichier.name,
+            'compression': 'gzip' if compresser else None,
+            'taille_base': db_path.stat().st_size,
+            'sha256': self.hash_file(fichier),
+        }
+        manifest_tmp = backup_path / f"{MANIFEST}.tmp"
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(manifest_tmp, backup_path / MANIFEST)
+
+        duree = time.monotonic() - debut
+        print(f"✅ Snapshot créé en {duree:.2f}s: {backup_path}")
+        print(f"💾 Taille: {fichier.stat().st_size / 1024:.1f} KB "
+              f"(base: {manifest['taille_base'] / 1024:.1f} KB)")
+
+        return backup_path
+
+    def hash_file(self, chemin):
+        """Empreinte SHA-256 d'un fichier, lu par blocs"""
+        empreinte = hashlib.sha256()
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(1024 * 1024), b''):
+                empreinte.update(bloc)
+        return empreinte.hexdigest()
+
+    def restore_snapshot(self, backup_path, manifest):
+        """
+        Remplace le fichier de la base SQLite par un snapshot
+
+        Le snapshot est décompressé à côté de la base, vérifié, puis mis en
+        place par os.replace : la base est soit l'ancienne, soit la nouvelle,
+        jamais un fichier partiellement écrit. L'application doit être
+        arrêtée pendant l'opération.
+        """
+        db_path = self.get_sqlite_path()
+        fichier = backup_path / manifest['fichier']
+
+        print("🔍 Vérification de l'intégrité...")
+        if self.hash_file(fichier) != manifest['sha256']:
+            raise ValueError("Snapshot corrompu, restauration impossible")
+
+        print(f"📅 Snapshot du: {manifest['timestamp']}")
+        print("\n" + "=" * 60)
+        response = input(f"⚠️  Cette opération va REMPLACER la base {db_path}. Continuer? (y/N): ")
+        if response.lower() != 'y':
+            print("Restauration annulée.")
+            return
+
+        # Même dossier que la base : os.replace reste atomique
+        temporaire = db_path.with_name(f"{db_path.name}.restauration")
+        try:
+            if manifest.get('compression') == 'gzip':
+                with gzip.open(fichier, 'rb') as f_in, open(temporaire, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            else:
+                shutil.copyfile(fichier, temporaire)
+
+            verification = sqlite3.connect(temporaire)
+            try:
+                resultat = verification.execute('PRAGMA integrity_check').fetchone()[0]
+            finally:
+                verification.close()
+            if resultat != 'ok':
+                raise RuntimeError(f"Snapshot invalide: {resultat}")
+
+            # Vide le journal WAL éventuel de l'ancienne base, qui ne doit
+            # pas être rejoué sur la nouvelle
+            connection.close()
+            if db_path.exists():
+                ancienne = sqlite3.connect(db_path)
+                try:
+                    ancienne.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                finally:
+                    ancienne.close()
+
+            os.replace(temporaire, db_path)
+        finally:
+            if temporaire.exists():
+                temporaire.unlink()
+
+        print(f"\n✅ Base restaurée depuis: {backup_path}")
+
+    def get_blob_path(self, sha256):
+        """Emplacement d'un fichier dans le magasin d'objets"""
+        return self.backup_dir / OBJETS_MEDIA / sha256[:2] / sha256
+
+    def get_latest_media_index(self):
+        """Index du dernier point de sauvegarde media ({} s'il n'y en a pas)"""
+        dernier = None
+        for dossier in self.backup_dir.glob('media_*'):
+            if (dossier / MANIFEST).exists():
+                manifest = self.read_manifest(dossier)
+                if dernier is None or manifest['timestamp'] > dernier['timestamp']:
+                    dernier = manifest
+        return dernier['fichiers'] if dernier else {}
+
+    def store_media_file(self, racine, chemin, precedent):
+        """
+        Calcule l'empreinte d'un fichier media et le copie dans le magasin si besoin
+
+        Un fichier dont la taille et la date de modification n'ont pas changé
+        depuis le point précédent n'est pas relu.
+
+        Returns:
+            tuple: (chemin relatif, entrée d'index, True si un objet a été ajouté)
+        """
+        relatif = chemin.relative_to(racine).as_posix()
+        stat = chemin.stat()
+
+        ancien = precedent.get(relatif)
+        if (ancien and ancien['taille'] == stat.st_size and ancien['mtime_ns'] == stat.st_mtime_ns
+                and self.get_blob_path(ancien['sha256']).exists()):
+            return relatif, ancien, False
+
+        sha256 = self.hash_file(chemin)
+        entree = {'sha256': sha256, 'taille': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+        blob = self.get_blob_path(sha256)
+        if blob.exists():
+            return relatif, entree, False
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = blob.with_name(f"{sha256}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(chemin, temporaire)
+        os.replace(temporaire, blob)
+        return relatif, entree, True
+
+    def create_media_backup(self, filename=None):
+        """
+        Crée un point de sauvegarde des fichiers de MEDIA_ROOT
+
+        Les fichiers sont hachés en parallèle ; seul le contenu absent du
+        magasin d'objets est copié, si bien qu'une quittance inchangée n'est
+        stockée qu'une fois quel que soit le nombre de sauvegardes.
+        """
+        racine = Path(settings.MEDIA_ROOT)
+        if not filename:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'media_{timestamp}'
+
+        backup_path = self.backup_dir / filename
+        backup_path.mkdir()
+
+        print(f"🗂️  Sauvegarde des media de {racine} vers {backup_path}")
+        debut = time.monotonic()
+
+        precedent = self.get_latest_media_index()
+        chemins = [p for p in racine.rglob('*') if p.is_file()] if racine.exists() else []
+
+        fichiers = {}
+        nouveaux = 0
+        taille_nouveaux = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for relatif, entree, ajoute in pool.map(
+                lambda chemin: self.store_media_file(racine, chemin, precedent), chemins
+            ):
+                fichiers[relatif] = entree
+                if ajoute:
+                    nouveaux += 1
+                    taille_nouveaux += entree['taille']
+
+        manifest = {
+            'timestamp': datetime.now().isoformat(),
+            'version': FORMAT_VERSION,
+            'type': 'media',
+            'fichiers': fichiers,
+        }
+        manifest_tmp = backup_path / f"{MANIFEST}.tmp"
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(manifest_tmp, backup_path / MANIFEST)
+
+        duree = time.monotonic() - debut
+        total = sum(e['taille'] for e in fichiers.values())
+        print(f"✅ {len(fichiers)} fichier(s) ({total / 1024:.1f} KB) en {duree:.2f}s")
+        print(f"💾 Nouveaux contenus stockés: {nouveaux} ({taille_nouveaux / 1024:.1f} KB)")
+
+        return backup_path
+
+    def restore_media(self, backup_path, manifest, purger=False):
+        """
+        Remet MEDIA_ROOT dans l'état d'un point de sauvegarde media
+
+        Seuls les fichiers absents ou différents sont réécrits, chacun par
+        une copie temporaire suivie d'un os.replace. Les fichiers apparus
+        depuis sont signalés, et supprimés si `purger` est vrai.
+        """
+        racine = Path(settings.MEDIA_ROOT)
+        fichiers = manifest['fichiers']
+
+        manquants = {e['sha256'] for e in fichiers.values() if not self.get_blob_path(e['sha256']).exists()}
+        if manquants:
+            raise FileNotFoundError(f"{len(manquants)} objet(s) absent(s) du magasin, restauration impossible")
+
+        print(f"📅 Sauvegarde media du: {manifest['timestamp']}")
+        print(f"📊 Fichiers: {len(fichiers)}")
+        print("\n" + "=" * 60)
+        response = input(f"⚠️  Cette opération va ÉCRASER les fichiers de {racine}. Continuer? (y/N): ")
+        if response.lower() != 'y':
+            print("Restauration annulée.")
+            return
+
+        def restaurer(item):
+            relatif, entree = item
+            cible = racine / relatif
+            if cible.is_file() and cible.stat().st_size == entree['taille'] \
+                    and self.hash_file(cible) == entree['sha256']:
+                return False
+
+            cible.parent.mkdir(parents=True, exist_ok=True)
+            temporaire = cible.with_name(f".{cible.name}.restauration")
+            shutil.copyfile(self.get_blob_path(entree['sha256']), temporaire)
+            os.replace(temporaire, cible)
+            return True
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            restaures = sum(pool.map(restaurer, fichiers.items()))
+
+        apparus = [
+            p for p in racine.rglob('*')
+            if p.is_file() and p.relative_to(racine).as_posix() not in fichiers
+        ] if racine.exists() else []
+        if purger:
+            for chemin in apparus:
+                chemin.unlink()
+
+        print(f"\n✅ {restaures} fichier(s) restauré(s), {len(fichiers) - restaures} déjà à jour")
+        if apparus:
+            action = "supprimé(s)" if purger else "conservé(s) (--purger pour les supprimer)"
+            print(f"⚠️  {len(apparus)} fichier(s) absent(s) de la sauvegarde {action}")
+
+    def clean_media_store(self):
+        """Supprime du magasin les objets qui ne sont plus référencés par aucun point media"""
+        references = set()
+        for dossier in self.backup_dir.glob('media_*'):
+            if (dossier / MANIFEST).exists():
+                references.update(e['sha256'] for e in self.read_manifest(dossier)['fichiers'].values())
+
+        supprimes = 0
+        for blob in (self.backup_dir / OBJETS_MEDIA).glob('*/*'):
+            if blob.name not in references:
+                blob.unlink()
+                supprimes += 1
+
+        print(f"🧹 {supprimes} objet(s) non référencé(s) supprimé(s)")
+
     def list_backups(self):
         """Liste les sauvegardes disponibles"""
-        backups = list(self.backup_dir.glob('backup_*.json'))
+        backups = list(self.backup_dir.glob('backup_*.json')) + [
+            p for p in self.backup_dir.iterdir() if (p / MANIFEST).exists()
+        ]
 
         if not backups:
             print(f"Aucune sauvegarde trouvée dans: {self.backup_dir}")
@@ -222,18 +1224,39 @@ class DatabaseManager:
 
         print(f"📋 Sauvegardes disponibles dans: {self.backup_dir}\n")
         for backup in sorted(backups, reverse=True):
-            size = backup.stat().st_size / 1024  # Taille en KB
+            if backup.is_dir():
+                size = sum(p.stat().st_size for p in backup.iterdir()) / 1024  # Taille en KB
+            else:
+                size = backup.stat().st_size / 1024  # Taille en KB
             mtime = datetime.fromtimestamp(backup.stat().st_mtime)
 
             # Lire les stats si disponibles
             try:
-                with open(backup, 'r') as f:
-                    data = json.load(f)
-                    obj_count = len(data.get('objects', []))
-                    print(f"  📦 {backup.name}")
-                    print(f"     📅 {mtime.strftime('%d/%m/%Y %H:%M')}")
-                    print(f"     💾 {size:.1f} KB - {obj_count} objets")
-                    print()
+                description = ''
+                if backup.is_dir():
+                    manifest = self.read_manifest(backup)
+                    if manifest.get('type') == 'media':
+                        print(f"  🗂️  {backup.name} (media, {len(manifest['fichiers'])} fichiers)")
+                        print(f"     📅 {mtime.strftime('%d/%m/%Y %H:%M')}")
+                        print()
+                        continue
+                    if manifest.get('type') == 'snapshot':
+                        print(f"  📸 {backup.name} (snapshot SQLite)")
+                        print(f"     📅 {mtime.strftime('%d/%m/%Y %H:%M')}")
+                        print(f"     💾 {size:.1f} KB")
+                        print()
+                        continue
+                    obj_count = sum(manifest['stats'].values())
+                    if manifest.get('type') == 'incrementale':
+                        description = f" (incrémentale, depuis {manifest['parent']})"
+                else:
+                    with open(backup, 'r') as f:
+                        data = json.load(f)
+                        obj_count = len(data.get('objects', []))
+                print(f"  📦 {backup.name}{description}")
+                print(f"     📅 {mtime.strftime('%d/%m/%Y %H:%M')}")
+                print(f"     💾 {size:.1f} KB - {obj_count} objets")
+                print()
             except:
                 print(f"  📦 {backup.name} ({size:.1f} KB, {mtime.strftime('%d/%m/%Y %H:%M')})")
 
@@ -245,16 +1268,42 @@ def main():
         epilog="""
 Exemples d'utilisation (depuis la racine du projet):
   python scripts/backup.py --backup
-  python scripts/backup.py --backup --filename ma_sauvegarde.json
+  python scripts/backup.py --backup --filename ma_sauvegarde
+  python scripts/backup.py --backup --chunk-size 5000
+  python scripts/backup.py --backup --incremental
+  python scripts/backup.py --snapshot --compresser --pages 256
+  python scripts/backup.py --media
+  python scripts/backup.py --restore media_20240108_153045 --purger
   python scripts/backup.py --list
-  python scripts/backup.py --restore backup_20240108_153045.json
+  python scripts/backup.py --restore backup_20240108_153045
+  python scripts/backup.py --restore backup_20240108_153045.json  (ancien format)
+  python scripts/backup.py --restore backup_20240108_153045 --par-objet
         """
     )
 
     parser.add_argument('--backup', action='store_true', help='Créer une sauvegarde')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Avec --backup : ne sauvegarder que les changements depuis la dernière sauvegarde')
+    parser.add_argument('--snapshot', action='store_true', help='Créer un snapshot de la base SQLite')
+    parser.add_argument('--pages', type=int, default=SNAPSHOT_PAGES,
+                        help=f'Avec --snapshot : pages copiées par étape (défaut: {SNAPSHOT_PAGES})')
+    parser.add_argument('--compresser', action='store_true', help='Avec --snapshot : compresser le snapshot (gzip)')
+    parser.add_argument('--media', action='store_true', help='Sauvegarder les fichiers media (MEDIA_ROOT)')
+    parser.add_argument('--purger', action='store_true',
+                        help='Avec --restore media_... : supprimer les fichiers absents de la sauvegarde')
+    parser.add_argument('--nettoyer-media', action='store_true',
+                        help='Supprimer les objets media qui ne sont plus référencés')
     parser.add_argument('--restore', type=str, help='Restaurer depuis un fichier')
     parser.add_argument('--list', action='store_true', help='Lister les sauvegardes')
-    parser.add_argument('--filename', type=str, help='Nom du fichier de sauvegarde')
+    parser.add_argument('--filename', type=str, help='Nom du dossier de sauvegarde')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f"Nombre d'objets lus par lot (défaut: {CHUNK_SIZE})")
+    parser.add_argument('--par-objet', action='store_true',
+                        help='Restaurer objet par objet (lent, signale chaque objet en erreur)')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f'Nombre de modèles (ou fichiers media) traités en parallèle (défaut: {WORKERS})')
+    parser.add_argument('--sans-verification', action='store_true',
+                        help='Ne pas comparer le résultat de la restauration à la sauvegarde')
 
     args = parser.parse_args()
 
@@ -268,13 +1317,24 @@ Exemples d'utilisation (depuis la racine du projet):
         print(f"   python scripts/backup.py --backup")
         sys.exit(1)
 
-    db_manager = DatabaseManager()
+    db_manager = DatabaseManager(chunk_size=args.chunk_size, workers=args.workers)
 
     try:
         if args.backup:
-            db_manager.create_backup(args.filename)
+            db_manager.create_backup(args.filename, incremental=args.incremental)
+        elif args.snapshot:
+            db_manager.create_snapshot(args.filename, pages=args.pages, compresser=args.compresser)
+        elif args.media:
+            db_manager.create_media_backup(args.filename)
+        elif args.nettoyer_media:
+            db_manager.clean_media_store()
         elif args.restore:
-            db_manager.restore_backup(args.restore)
+            db_manager.restore_backup(
+                args.restore,
+                mode='objet' if args.par_objet else 'bulk',
+                verifier=not args.sans_verification,
+                purger=args.purger
+            )
         elif args.list:
             db_manager.list_backups()
         else:
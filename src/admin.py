@@ -0,0 +1,37 @@
+from django.contrib import admin
+
+from src.models import PerformanceVue, RequeteLente
+
+
+@admin.register(PerformanceVue)
+class PerformanceVueAdmin(admin.ModelAdmin):
+    list_display = (
+        'vue', 'methode', 'nombre', 'p50', 'p95', 'p99', 'requetes_moyennes',
+        'duree_db_moyenne', 'duree_rendu_moyenne', 'taille_moyenne', 'erreurs', 'mis_a_jour'
+    )
+    list_filter = ('methode',)
+    search_fields = ('vue',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Consultation seule ; la suppression remet les compteurs d'une vue à zéro
+        return False
+
+
+
+@admin.register(RequeteLente)
+class RequeteLenteAdmin(admin.ModelAdmin):
+    list_display = (
+        'empreinte', 'application', 'appelant', 'vue', 'nombre', 'duree_totale_ms',
+        'duree_moyenne_ms', 'duree_max_ms', 'parcours_complets', 'derniere_occurrence'
+    )
+    list_filter = ('application',)
+    search_fields = ('sql', 'appelant', 'vue')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
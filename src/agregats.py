@@ -0,0 +1,159 @@
+# src/agregats.py
+"""
+Tables d'agrégats mensuels par immeuble, maintenues au fil des écritures
+
+Une table d'agrégats (StatistiqueMensuelle, OccupationMensuelle) a une
+cellule par (immeuble, mois). Chaque écriture d'un modèle suivi invalide
+les cellules qu'elle touche, avant et après modification ; elles sont
+recalculées une seule fois, à la validation de la transaction.
+"""
+import threading
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from immeuble.models import Immeuble
+
+
+# Cellules (immeuble_id, mois) à recalculer à la fin de la transaction courante, par agrégat
+_en_attente = threading.local()
+
+# Modèles suivis : {modèle: [(agrégat, fonction des cellules, champs déterminants)]}
+_suivis = {}
+
+
+class AgregatMensuel:
+    """
+    Base des gestionnaires d'agrégats mensuels
+
+    Une sous-classe fournit le modèle, les champs mis à jour et
+    `calculer(debut, fin, immeubles=None)`, qui renvoie les cellules non
+    sauvegardées {(immeuble_id, mois): instance}.
+    """
+
+    modele = None
+    champs = []
+
+    @staticmethod
+    def calculer(debut, fin, immeubles=None):
+        raise NotImplementedError
+
+    @classmethod
+    def enregistrer(cls, cellules):
+        """Enregistre (insertion ou mise à jour) des cellules calculées"""
+        cls.modele.objects.bulk_create(
+            cellules,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['immeuble', 'mois'],
+            update_fields=cls.champs,
+        )
+
+    @classmethod
+    def mettre_a_jour(cls, cellules):
+        """
+        Recalcule un ensemble de cellules (immeuble_id, mois)
+
+        Les cellules sont regroupées par immeuble et recalculées sur la plage
+        de mois concernée.
+        """
+        par_immeuble = {}
+        for immeuble_id, mois in cellules:
+            if immeuble_id:
+                par_immeuble.setdefault(immeuble_id, set()).add(mois.replace(day=1))
+
+        # Un immeuble supprimé entre-temps n'a plus d'agrégats
+        existants = set(Immeuble.objects.filter(id__in=par_immeuble).values_list('id', flat=True))
+
+        for immeuble_id, mois in par_immeuble.items():
+            if immeuble_id not in existants:
+                continue
+            calculees = cls.calculer(min(mois), max(mois), immeubles=[immeuble_id])
+            cls.enregistrer([cellule for cle, cellule in calculees.items() if cle[1] in mois])
+
+    @classmethod
+    def invalider(cls, cellules):
+        """
+        Programme le recalcul de cellules à la validation de la transaction
+
+        Les cellules modifiées dans une même transaction sont dédupliquées :
+        le premier rappel exécuté au commit traite tout l'ensemble, les
+        suivants n'ont plus rien à faire. Après un rollback, les cellules
+        restantes sont simplement recalculées au commit suivant.
+        """
+        en_attente = getattr(_en_attente, 'cellules', None)
+        if en_attente is None:
+            en_attente = _en_attente.cellules = {}
+        en_attente.setdefault(cls, set()).update(cellules)
+
+        transaction.on_commit(cls.traiter_en_attente)
+
+    @classmethod
+    def traiter_en_attente(cls):
+        """Recalcule les cellules invalidées"""
+        cellules = getattr(_en_attente, 'cellules', {}).pop(cls, None)
+        if cellules:
+            cls.mettre_a_jour(cellules)
+
+    @classmethod
+    def remplacer(cls, debut, fin):
+        """
+        Recalcule et remplace toutes les cellules des mois de debut à fin
+
+        Returns:
+            int: Nombre de cellules enregistrées
+        """
+        with transaction.atomic():
+            cellules = cls.calculer(debut, fin)
+            cls.modele.objects.filter(mois__gte=debut, mois__lte=fin).delete()
+            cls.modele.objects.bulk_create(cellules.values(), batch_size=1000)
+        return len(cellules)
+
+
+def suivre(modele, agregat, cellules, champs=None):
+    """
+    Maintient un agrégat à jour des écritures d'un modèle
+
+    Args:
+        modele: Modèle dont les save() et delete() invalident l'agrégat
+        agregat: Sous-classe d'AgregatMensuel
+        cellules: Fonction instance -> {(immeuble_id, mois)}
+        champs: Attributs dont dépendent les cellules ; une modification qui
+            n'en change aucun n'invalide rien (défaut : toute modification)
+
+    L'état précédent vient d'EtatInitialMixin (valeurs lues par from_db) :
+    aucune requête avant le save(). Les écritures en masse (bulk_create,
+    bulk_update, update()) n'émettent pas de signal : leurs auteurs
+    appellent agregat.invalider() eux-mêmes.
+    """
+    if modele not in _suivis:
+        _suivis[modele] = []
+        post_save.connect(invalider_cellules, sender=modele, dispatch_uid=f'agregats.{modele._meta.label}')
+        post_delete.connect(invalider_cellules, sender=modele, dispatch_uid=f'agregats.{modele._meta.label}')
+    _suivis[modele].append((agregat, cellules, champs))
+
+
+def invalider_cellules(sender, instance, signal, raw=False, **kwargs):
+    """Programme le recalcul des cellules touchées, avant et après modification"""
+    if raw:
+        return
+    ancien = instance.etat_initial() if hasattr(instance, 'etat_initial') else None
+
+    for agregat, cellules, champs in _suivis[sender]:
+        if signal is post_save and ancien is not None and champs and all(
+            getattr(ancien, champ) == getattr(instance, champ) for champ in champs
+        ):
+            continue
+        try:
+            touchees = cellules(instance)
+            if ancien is not None:
+                touchees |= cellules(ancien)
+        except ObjectDoesNotExist:
+            # Suppression en cascade : l'immeuble disparaît avec ses agrégats
+            continue
+        if touchees:
+            agregat.invalider(touchees)
+
+    if hasattr(instance, 'memoriser_etat_initial'):
+        instance.memoriser_etat_initial()
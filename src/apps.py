@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SrcConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'src'
+
+    def ready(self):
+        from . import db, requetes_lentes  # noqa: F401
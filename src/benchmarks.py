@@ -0,0 +1,167 @@
+# src/benchmarks.py
+import statistics
+import time
+import tracemalloc
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from paiements.statistiques import ajouter_mois
+from persons.models import Locataires
+from quittances.models import Quittance
+from quittances.pdf_generator import QuittancePDFGenerator
+from quittances.utils import QuittanceManager
+
+
+# Scénarios mesurés : (nom, méthode de BenchmarkRunner)
+SCENARIOS = [
+    ('dashboard', 'scenario_dashboard'),
+    ('liste_paiements', 'scenario_liste_paiements'),
+    ('liste_quittances', 'scenario_liste_quittances'),
+    ('detail_locataire', 'scenario_detail_locataire'),
+    ('quittance_pdf', 'scenario_quittance_pdf'),
+    ('generer_quittances_mois', 'scenario_generer_quittances_mois'),
+]
+
+# Écarts absolus ignorés lors de la comparaison (bruit de mesure)
+MARGE_DUREE_MS = 5
+MARGE_MEMOIRE_KO = 256
+
+
+class CompteurRequetes:
+    """
+    execute_wrapper qui compte les requêtes SQL, hors points de sauvegarde
+
+    (connection.queries est remis à zéro à chaque requête HTTP du Client :
+    CaptureQueriesContext ne convient pas aux vues.)
+    """
+
+    def __init__(self):
+        self.nombre = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')):
+            self.nombre += 1
+        return execute(sql, params, many, context)
+
+
+class BenchmarkRunner:
+    """
+    Mesure les chemins critiques sur la base courante (portefeuille synthétique)
+
+    Pour chaque scénario : durée médiane sur `repetitions` exécutions,
+    nombre de requêtes SQL et pic de mémoire Python (tracemalloc). Chaque
+    exécution a lieu dans une transaction annulée : les scénarios qui
+    écrivent (génération des quittances du mois) repartent du même état.
+    La date de référence est par défaut le premier jour du mois courant.
+    """
+
+    def __init__(self, aujourd_hui=None, repetitions=5):
+        self.repetitions = repetitions
+        aujourd_hui = aujourd_hui or date.today()
+        self.mois = ajouter_mois(aujourd_hui.replace(day=1), 1)
+
+        utilisateur = get_user_model().objects.create_user(email='benchmark@exemple.fr')
+        self.client = Client()
+        self.client.force_login(utilisateur)
+
+        self.locataire = Locataires.objects.filter(actif=True).order_by('pk').first()
+        # Quittance d'une colocation de préférence (cas le plus coûteux du PDF)
+        quittances = Quittance.objects.order_by('-mois', '-pk')
+        self.quittance = quittances.filter(contrat__contratlocataire__ordre=3).first() or quittances.first()
+
+    def get(self, url):
+        reponse = self.client.get(url)
+        assert reponse.status_code == 200, f"{url} : HTTP {reponse.status_code}"
+        # Le rendu des TemplateResponse fait partie de la mesure
+        return reponse.content
+
+    def scenario_dashboard(self):
+        return self.get(reverse('dashboard'))
+
+    def scenario_liste_paiements(self):
+        return self.get(reverse('paiements:paiement_list'))
+
+    def scenario_liste_quittances(self):
+        return self.get(reverse('quittances:list'))
+
+    def scenario_detail_locataire(self):
+        return self.get(reverse('persons:locataire_detail', args=[self.locataire.pk]))
+
+    def scenario_quittance_pdf(self):
+        return QuittancePDFGenerator(Quittance.objects.get(pk=self.quittance.pk)).generate_pdf()
+
+    def scenario_generer_quittances_mois(self):
+        return QuittanceManager.generer_quittances_mois(self.mois)
+
+    def executer(self, fonction):
+        with transaction.atomic():
+            fonction()
+            transaction.set_rollback(True)
+
+    def mesurer(self, fonction):
+        """Durées (ms), nombre de requêtes et pic mémoire (Ko) d'un scénario"""
+        # Exécution de chauffe (templates, imports), hors mesure
+        self.executer(fonction)
+
+        # Requêtes et mémoire sur une exécution dédiée : leur suivi fausserait les durées
+        requetes = CompteurRequetes()
+        tracemalloc.start()
+        with connection.execute_wrapper(requetes):
+            self.executer(fonction)
+        pic = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        durees = []
+        for _ in range(self.repetitions):
+            debut = time.perf_counter()
+            self.executer(fonction)
+            durees.append((time.perf_counter() - debut) * 1000)
+
+        return {
+            'duree_ms': round(statistics.median(durees), 2),
+            'min_ms': round(min(durees), 2),
+            'requetes': requetes.nombre,
+            'memoire_ko': round(pic / 1024),
+        }
+
+    def lancer(self, scenarios=None):
+        """
+        Returns:
+            dict: Mesures par nom de scénario
+        """
+        return {
+            nom: self.mesurer(getattr(self, methode))
+            for nom, methode in SCENARIOS
+            if not scenarios or nom in scenarios
+        }
+
+
+def comparer_resultats(reference, resultats, seuil):
+    """
+    Compare deux exécutions du benchmark (même format JSON)
+
+    Une régression est une durée ou un pic mémoire en hausse de plus de
+    `seuil` (fraction, au-delà du bruit de mesure), ou toute requête SQL
+    supplémentaire.
+
+    Returns:
+        list: (taille, scénario, métrique, référence, mesure) des régressions
+    """
+    regressions = []
+    for taille, mesures in resultats['tailles'].items():
+        precedentes = reference.get('tailles', {}).get(taille, {}).get('scenarios', {})
+        for nom, mesure in mesures['scenarios'].items():
+            avant = precedentes.get(nom)
+            if not avant:
+                continue
+            if mesure['duree_ms'] > max(avant['duree_ms'] * (1 + seuil), avant['duree_ms'] + MARGE_DUREE_MS):
+                regressions.append((taille, nom, 'duree_ms', avant['duree_ms'], mesure['duree_ms']))
+            if mesure['requetes'] > avant['requetes']:
+                regressions.append((taille, nom, 'requetes', avant['requetes'], mesure['requetes']))
+            if mesure['memoire_ko'] > max(avant['memoire_ko'] * (1 + seuil), avant['memoire_ko'] + MARGE_MEMOIRE_KO):
+                regressions.append((taille, nom, 'memoire_ko', avant['memoire_ko'], mesure['memoire_ko']))
+    return regressions
@@ -0,0 +1,85 @@
+# src/db.py
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import OuterRef, Subquery
+from django.dispatch import receiver
+
+
+# Profil de production SQLite (surchargeable par settings.SQLITE_PRAGMAS)
+PRAGMAS_PRODUCTION = {
+    # Les lecteurs ne bloquent plus l'écrivain (et inversement)
+    'journal_mode': 'WAL',
+    # Sûr en mode WAL : seul un arrêt brutal du système peut perdre la dernière transaction
+    'synchronous': 'NORMAL',
+    # Cache de pages : valeur négative = taille en Kio (ici 64 Mio)
+    'cache_size': -64000,
+    # Lectures par projection mémoire du fichier (256 Mio)
+    'mmap_size': 268435456,
+    # Attente maximale d'un verrou avant "database is locked" (ms)
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+def get_pragmas():
+    """PRAGMA appliqués à chaque nouvelle connexion SQLite"""
+    return getattr(settings, 'SQLITE_PRAGMAS', PRAGMAS_PRODUCTION)
+
+
+def appliquer_pragmas(cursor, pragmas):
+    """Exécute les PRAGMA sur une connexion (curseur DB-API)"""
+    for nom, valeur in pragmas.items():
+        cursor.execute(f'PRAGMA {nom} = {valeur}')
+
+
+@receiver(connection_created)
+def configurer_sqlite(sender, connection, **kwargs):
+    """Applique le profil de production à chaque connexion SQLite ouverte par Django"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        appliquer_pragmas(cursor, get_pragmas())
+
+
+def expliquer(cursor, sql, params):
+    """Plan d'exécution (une ligne par étape) et tables parcourues sans index"""
+    if cursor.db.vendor == 'sqlite':
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = [ligne[-1] for ligne in cursor.fetchall()]
+        scans = [
+            re.match(r'SCAN (\S+)', etape).group(1)
+            for etape in plan
+            if etape.startswith('SCAN ') and 'INDEX' not in etape
+        ]
+    else:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        plan = [ligne[0] for ligne in cursor.fetchall()]
+        scans = re.findall(r'Seq Scan on (\S+)', '\n'.join(plan))
+    return plan, scans
+
+
+def derniers_par(queryset, champ, *ordre):
+    """
+    Premier objet de chaque groupe `champ` selon `ordre` (ex. dernier paiement par contrat)
+
+    PostgreSQL : SELECT DISTINCT ON (champ) ... ORDER BY champ, ordre, qui
+    parcourt l'index (champ, ordre) une seule fois. Autres moteurs : sous-requête
+    corrélée « pk = premier pk du groupe », une recherche dans ce même index
+    par ligne (environ 3 fois plus rapide qu'un ROW_NUMBER() sous SQLite).
+
+    Args:
+        queryset: QuerySet de départ (filtres déjà appliqués)
+        champ: Nom du champ de regroupement (ex. 'contrat')
+        ordre: Expressions d'ordre, la première ligne de chaque groupe est gardée
+
+    Returns:
+        QuerySet: Un objet par valeur de `champ`
+    """
+    if connections[queryset.db].features.can_distinct_on_fields:
+        return queryset.order_by(champ, *ordre).distinct(champ)
+
+    premier = queryset.filter(**{champ: OuterRef(champ)}).order_by(*ordre).values('pk')[:1]
+    return queryset.filter(pk=Subquery(premier))
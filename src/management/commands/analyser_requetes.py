@@ -0,0 +1,187 @@
+# src/management/commands/analyser_requetes.py
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test import Client
+from django.test.utils import get_runner, override_settings
+
+from src.db import expliquer
+
+
+# Requêtes internes (migrations, introspection) exclues de la charge
+TABLES_IGNOREES = ('django_migrations', 'sqlite_master', 'django_content_type', 'auth_permission')
+
+
+class Enregistreur:
+    """execute_wrapper qui mémorise chaque SELECT distinct (SQL paramétré) et son nombre d'appels"""
+
+    def __init__(self):
+        self.requetes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT') and not any(t in sql for t in TABLES_IGNOREES):
+            entree = self.requetes.setdefault(sql, {'sql': sql, 'params': list(params or ()), 'appels': 0})
+            entree['appels'] += 1
+        return execute(sql, params, many, context)
+
+
+def mesurer(cursor, sql, params, repetitions):
+    """Durée médiane d'exécution (ms), résultat compris"""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
+
+
+class Command(BaseCommand):
+    help = (
+        "Enregistre la charge de requêtes de la suite de tests, puis la rejoue sur la base "
+        "courante : plan d'exécution (tables parcourues sans index) et durée de chaque requête"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Fichier JSON de la charge enregistrée")
+        parser.add_argument(
+            '--enregistrer',
+            nargs='*',
+            metavar='TEST',
+            help="Exécute les tests (tous par défaut) et enregistre leurs SELECT dans le fichier"
+        )
+        parser.add_argument(
+            '--pages',
+            nargs='+',
+            metavar='URL',
+            help="Affiche ces pages sur la base courante (jeu de données réaliste) et enregistre leurs SELECT"
+        )
+        parser.add_argument('--repetitions', type=int, default=5, help="Exécutions par requête (défaut : 5)")
+        parser.add_argument('--limite', type=int, default=20, help="Requêtes affichées (défaut : 20)")
+        parser.add_argument('--sortie', help="Enregistre les mesures (JSON) pour une comparaison ultérieure")
+        parser.add_argument('--comparer', help="Mesures d'une exécution précédente (avant ajout d'index)")
+
+    def handle(self, *args, **options):
+        if options['enregistrer'] is not None or options['pages']:
+            self.enregistrer(options['fichier'], options['enregistrer'], options['pages'])
+        else:
+            self.analyser(options)
+
+    def enregistrer(self, fichier, labels, pages):
+        enregistreur = Enregistreur()
+
+        with connection.execute_wrapper(enregistreur):
+            if labels is not None:
+                runner = get_runner(settings)(verbosity=0, interactive=False)
+                echecs = runner.run_tests(labels)
+                if echecs:
+                    self.stdout.write(self.style.WARNING(f"{echecs} test(s) en échec, charge enregistrée malgré tout"))
+            if pages:
+                self.parcourir(pages)
+
+        # Une charge existante est complétée (tests puis pages, par exemple)
+        chemin = Path(fichier)
+        if chemin.exists():
+            for requete in json.loads(chemin.read_text()):
+                entree = enregistreur.requetes.setdefault(requete['sql'], dict(requete, appels=0))
+                entree['appels'] += requete['appels']
+
+        requetes = sorted(enregistreur.requetes.values(), key=lambda r: -r['appels'])
+        Path(fichier).write_text(json.dumps(requetes, cls=DjangoJSONEncoder, indent=1))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(requetes)} requête(s) distincte(s), {sum(r['appels'] for r in requetes)} appel(s) → {fichier}"
+        ))
+
+    def parcourir(self, pages):
+        """Affiche les pages, connecté avec le premier utilisateur actif de la base"""
+        client = Client()
+        utilisateur = get_user_model().objects.filter(is_active=True).order_by('pk').first()
+        if utilisateur:
+            client.force_login(utilisateur)
+
+        with override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False):
+            for page in pages:
+                reponse = client.get(page)
+                self.stdout.write(f"  {reponse.status_code} {page}")
+
+    def analyser(self, options):
+        try:
+            requetes = json.loads(Path(options['fichier']).read_text())
+        except FileNotFoundError:
+            raise CommandError(f"Charge introuvable : {options['fichier']} (voir --enregistrer)")
+
+        mesures = {}
+        with connection.cursor() as cursor:
+            for requete in requetes:
+                try:
+                    plan, scans = expliquer(cursor, requete['sql'], requete['params'])
+                    duree = mesurer(cursor, requete['sql'], requete['params'], options['repetitions'])
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"Ignorée ({e}) : {requete['sql'][:80]}"))
+                    continue
+                mesures[requete['sql']] = {
+                    'appels': requete['appels'],
+                    'duree_ms': duree,
+                    'plan': plan,
+                    'scans': scans,
+                }
+
+        # Coût = durée × nombre d'appels dans la charge
+        classement = sorted(mesures.items(), key=lambda m: -m[1]['duree_ms'] * m[1]['appels'])
+        for sql, mesure in classement[:options['limite']]:
+            self.stdout.write(
+                f"\n{mesure['duree_ms']:8.2f} ms × {mesure['appels']:<4} {sql[:150]}"
+            )
+            if mesure['scans']:
+                self.stdout.write(self.style.WARNING(f"           parcours complet : {', '.join(mesure['scans'])}"))
+                for etape in mesure['plan']:
+                    self.stdout.write(f"           {etape}")
+
+        tables = {}
+        for mesure in mesures.values():
+            for table in mesure['scans']:
+                tables[table] = tables.get(table, 0) + mesure['appels']
+        self.stdout.write("\nTables parcourues sans index (appels) :")
+        for table, appels in sorted(tables.items(), key=lambda t: -t[1]):
+            self.stdout.write(f"  {table:<40} {appels}")
+
+        total = sum(m['duree_ms'] * m['appels'] for m in mesures.values())
+        self.stdout.write(f"\nDurée totale de la charge : {total:.1f} ms ({len(mesures)} requêtes)")
+
+        if options['comparer']:
+            self.comparer(json.loads(Path(options['comparer']).read_text()), mesures)
+
+        if options['sortie']:
+            Path(options['sortie']).write_text(json.dumps(mesures, indent=1))
+
+    def comparer(self, avant, apres):
+        """Durées avant/après des requêtes communes aux deux mesures"""
+        communes = [sql for sql in apres if sql in avant]
+        if not communes:
+            self.stdout.write(self.style.WARNING("Aucune requête commune avec la mesure précédente"))
+            return
+
+        ecarts = sorted(
+            communes,
+            key=lambda sql: apres[sql]['duree_ms'] * apres[sql]['appels'] - avant[sql]['duree_ms'] * avant[sql]['appels']
+        )
+        self.stdout.write("\nPlus fortes améliorations :")
+        for sql in ecarts[:10]:
+            self.stdout.write(
+                f"  {avant[sql]['duree_ms']:8.2f} → {apres[sql]['duree_ms']:8.2f} ms  {sql[:110]}"
+            )
+
+        total_avant = sum(avant[sql]['duree_ms'] * avant[sql]['appels'] for sql in communes)
+        total_apres = sum(apres[sql]['duree_ms'] * apres[sql]['appels'] for sql in communes)
+        self.stdout.write(self.style.SUCCESS(
+            f"\nCharge : {total_avant:.1f} ms → {total_apres:.1f} ms "
+            f"({total_avant / total_apres if total_apres else 0:.1f}x)"
+        ))
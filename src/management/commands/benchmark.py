@@ -0,0 +1,129 @@
+# src/management/commands/benchmark.py
+
+import json
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from src.benchmarks import SCENARIOS, BenchmarkRunner, comparer_resultats
+from src.portefeuille import PortefeuilleGenerator, TAILLES_PORTEFEUILLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure durée, nombre de requêtes et pic mémoire des chemins critiques (tableau de bord, "
+        "listes, détail locataire, PDF et génération mensuelle des quittances) sur un portefeuille "
+        "synthétique de chaque taille, créé dans une base de test jetable. Échoue en cas de "
+        "régression par rapport à une référence (--reference)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tailles',
+            nargs='+',
+            choices=sorted(TAILLES_PORTEFEUILLE),
+            default=['petit', 'moyen'],
+            help="Tailles de portefeuille mesurées (défaut : petit moyen)"
+        )
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=[nom for nom, _ in SCENARIOS],
+            help="Scénarios mesurés (défaut : tous)"
+        )
+        parser.add_argument('--repetitions', type=int, default=5, help="Exécutions mesurées par scénario (défaut : 5)")
+        parser.add_argument('--graine', type=int, default=42, help="Graine du portefeuille (défaut : 42)")
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            default=None,
+            help="Date de référence du portefeuille (AAAA-MM-JJ, défaut : premier jour du mois courant) ; "
+                 "à fixer pour comparer des mesures de mois différents"
+        )
+        parser.add_argument('--sortie', help="Enregistre les résultats (JSON), par ex. comme nouvelle référence")
+        parser.add_argument('--reference', help="Résultats de référence (JSON) à comparer")
+        parser.add_argument(
+            '--seuil',
+            type=float,
+            default=0.25,
+            help="Hausse tolérée de la durée et de la mémoire par rapport à la référence (défaut : 0.25)"
+        )
+
+    def handle(self, *args, **options):
+        reference = None
+        if options['reference']:
+            try:
+                reference = json.loads(Path(options['reference']).read_text())
+            except FileNotFoundError:
+                raise CommandError(f"Référence introuvable : {options['reference']}")
+
+        aujourd_hui = options['date'] or date.today().replace(day=1)
+
+        resultats = {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'date_reference': aujourd_hui.isoformat(),
+            'base': connection.vendor,
+            'repetitions': options['repetitions'],
+            'tailles': {},
+        }
+        for taille in options['tailles']:
+            resultats['tailles'][taille] = self.mesurer_taille(taille, aujourd_hui, options)
+
+        if options['sortie']:
+            Path(options['sortie']).write_text(json.dumps(resultats, indent=1))
+            self.stdout.write(f"Résultats enregistrés : {options['sortie']}")
+
+        if reference:
+            self.comparer(reference, resultats, options['seuil'])
+
+    def mesurer_taille(self, taille, aujourd_hui, options):
+        """Portefeuille de la taille demandée dans une base de test jetable, puis mesures"""
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nPortefeuille {taille}"))
+        nom_base = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            with tempfile.TemporaryDirectory() as media, override_settings(
+                ALLOWED_HOSTS=['testserver'], DEBUG=False, MEDIA_ROOT=media
+            ):
+                debut = time.monotonic()
+                compteurs = PortefeuilleGenerator(
+                    graine=options['graine'], aujourd_hui=aujourd_hui, **TAILLES_PORTEFEUILLE[taille]
+                ).generer()
+                objets = sum(compteurs.values())
+                self.stdout.write(f"  {objets} objets générés en {time.monotonic() - debut:.1f}s")
+
+                runner = BenchmarkRunner(aujourd_hui, repetitions=options['repetitions'])
+                scenarios = runner.lancer(options['scenarios'])
+        finally:
+            connection.creation.destroy_test_db(nom_base, verbosity=0)
+
+        self.stdout.write(f"  {'Scénario':<26}{'médiane (ms)':>14}{'min (ms)':>10}{'requêtes':>10}{'mémoire (Ko)':>14}")
+        for nom, mesure in scenarios.items():
+            self.stdout.write(
+                f"  {nom:<26}{mesure['duree_ms']:>14.1f}{mesure['min_ms']:>10.1f}"
+                f"{mesure['requetes']:>10}{mesure['memoire_ko']:>14}"
+            )
+
+        return {'objets': objets, 'scenarios': scenarios}
+
+    def comparer(self, reference, resultats, seuil):
+        regressions = comparer_resultats(reference, resultats, seuil)
+        self.stdout.write(f"\nComparaison avec la référence du {reference.get('date', '?')} :")
+        if reference.get('date_reference', resultats['date_reference']) != resultats['date_reference']:
+            self.stdout.write(self.style.WARNING(
+                f"  Portefeuille daté du {reference['date_reference']} dans la référence, "
+                f"du {resultats['date_reference']} ici : passer --date {reference['date_reference']}"
+            ))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("  Aucune régression"))
+            return
+
+        for taille, nom, metrique, avant, apres in regressions:
+            self.stdout.write(self.style.WARNING(f"  {taille:<6} {nom:<26} {metrique:<11} {avant} → {apres}"))
+        raise CommandError(f"{len(regressions)} régression(s) par rapport à la référence")
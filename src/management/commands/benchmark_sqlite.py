@@ -0,0 +1,138 @@
+# src/management/commands/benchmark_sqlite.py
+
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from src.db import appliquer_pragmas, get_pragmas
+
+
+# Configuration SQLite par défaut (journal de rollback), pour comparaison
+PRAGMAS_DEFAUT = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+
+
+def connecter(chemin, pragmas):
+    connexion = sqlite3.connect(chemin, isolation_level=None, check_same_thread=False)
+    appliquer_pragmas(connexion, pragmas)
+    return connexion
+
+
+def preparer_base(chemin, pragmas, lignes):
+    """Crée une table de paiements de `lignes` lignes"""
+    connexion = connecter(chemin, pragmas)
+    connexion.execute(
+        "CREATE TABLE paiement (id INTEGER PRIMARY KEY, contrat INTEGER, mois TEXT, montant REAL)"
+    )
+    connexion.execute("BEGIN")
+    connexion.executemany(
+        "INSERT INTO paiement (contrat, mois, montant) VALUES (?, ?, ?)",
+        ((i % 500, f"2025-{i % 12 + 1:02d}-01", 650.0) for i in range(lignes))
+    )
+    connexion.execute("COMMIT")
+    connexion.close()
+
+
+def percentile(valeurs, p):
+    if not valeurs:
+        return 0.0
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(len(valeurs) * p))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence des écritures pendant des lectures concurrentes, "
+        "avec la configuration SQLite par défaut puis le profil de production"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lignes', type=int, default=200000, help="Taille de la table (défaut : 200000)")
+        parser.add_argument('--lecteurs', type=int, default=4, help="Threads de lecture (défaut : 4)")
+        parser.add_argument('--duree', type=float, default=5.0, help="Durée de chaque mesure en secondes (défaut : 5)")
+
+    def mesurer(self, pragmas, options):
+        """Lance les lecteurs et un écrivain sur une base neuve, renvoie les mesures"""
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = Path(dossier) / 'benchmark.sqlite3'
+            preparer_base(chemin, pragmas, options['lignes'])
+
+            arret = threading.Event()
+            lectures = []
+            latences = []
+            erreurs = []
+
+            def lecteur():
+                connexion = connecter(chemin, pragmas)
+                nombre = 0
+                while not arret.is_set():
+                    connexion.execute(
+                        "SELECT contrat, mois, SUM(montant) FROM paiement GROUP BY contrat, mois"
+                    ).fetchall()
+                    nombre += 1
+                lectures.append(nombre)
+                connexion.close()
+
+            def ecrivain():
+                connexion = connecter(chemin, pragmas)
+                while not arret.is_set():
+                    debut = time.perf_counter()
+                    try:
+                        connexion.execute("BEGIN IMMEDIATE")
+                        connexion.execute(
+                            "INSERT INTO paiement (contrat, mois, montant) VALUES (1, '2025-01-01', 650.0)"
+                        )
+                        connexion.execute("COMMIT")
+                        latences.append(time.perf_counter() - debut)
+                    except sqlite3.OperationalError as e:
+                        erreurs.append(str(e))
+                        if connexion.in_transaction:
+                            connexion.execute("ROLLBACK")
+                    time.sleep(0.01)
+                connexion.close()
+
+            threads = [threading.Thread(target=lecteur) for _ in range(options['lecteurs'])]
+            threads.append(threading.Thread(target=ecrivain))
+            for thread in threads:
+                thread.start()
+            time.sleep(options['duree'])
+            arret.set()
+            for thread in threads:
+                thread.join()
+
+        return {
+            'lectures': sum(lectures),
+            'ecritures': len(latences),
+            'erreurs': len(erreurs),
+            'p50': percentile(latences, 0.50) * 1000,
+            'p95': percentile(latences, 0.95) * 1000,
+            'max': max(latences, default=0) * 1000,
+        }
+
+    def handle(self, *args, **options):
+        profils = [
+            ('Défaut (journal DELETE)', PRAGMAS_DEFAUT),
+            ('Production (src/db.py)', get_pragmas()),
+        ]
+
+        self.stdout.write(
+            f"{options['lignes']} lignes, {options['lecteurs']} lecteur(s), "
+            f"1 écrivain, {options['duree']:.0f}s par profil\n"
+        )
+        self.stdout.write(
+            f"{'Profil':<26}{'Lectures':>10}{'Écritures':>11}{'Erreurs':>9}"
+            f"{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}"
+        )
+        for nom, pragmas in profils:
+            m = self.mesurer(pragmas, options)
+            self.stdout.write(
+                f"{nom:<26}{m['lectures']:>10}{m['ecritures']:>11}{m['erreurs']:>9}"
+                f"{m['p50']:>10.1f}{m['p95']:>10.1f}{m['max']:>10.1f}"
+            )
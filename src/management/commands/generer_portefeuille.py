@@ -0,0 +1,70 @@
+# src/management/commands/generer_portefeuille.py
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from immeuble.models import Immeuble
+from src.portefeuille import PortefeuilleGenerator, TAILLES_PORTEFEUILLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un portefeuille synthétique reproductible (propriétaires, immeubles, baux en colocation, "
+        "paiements, quittances, dépenses) dans une base vide, pour les benchmarks et le profilage"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--taille',
+            choices=sorted(TAILLES_PORTEFEUILLE),
+            default='moyen',
+            help="Taille prédéfinie (défaut : moyen), précisable par les options suivantes"
+        )
+        parser.add_argument('--proprietaires', type=int, help="Nombre de propriétaires")
+        parser.add_argument('--immeubles', type=int, help="Nombre d'immeubles")
+        parser.add_argument('--appartements', type=int, help="Appartements par immeuble")
+        parser.add_argument('--annees', type=int, help="Années d'historique")
+        parser.add_argument('--colocation', type=float, default=0.3, help="Part des baux en colocation (défaut : 0.3)")
+        parser.add_argument('--vacance', type=float, default=0.08, help="Part des appartements vacants (défaut : 0.08)")
+        parser.add_argument('--depenses', type=int, default=6, help="Dépenses par immeuble et par an (défaut : 6)")
+        parser.add_argument('--graine', type=int, default=42, help="Graine aléatoire (défaut : 42)")
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            default=None,
+            help="Date de référence (AAAA-MM-JJ, défaut : aujourd'hui) ; à fixer pour un portefeuille identique"
+        )
+
+    def handle(self, *args, **options):
+        if Immeuble.objects.exists():
+            raise CommandError(
+                "La base contient déjà des immeubles : générez le portefeuille dans une base vide "
+                "(par ex. DB_NAME=/tmp/portefeuille.sqlite3 python manage.py migrate)"
+            )
+
+        parametres = dict(TAILLES_PORTEFEUILLE[options['taille']])
+        for nom in ('proprietaires', 'immeubles', 'appartements', 'annees'):
+            if options[nom] is not None:
+                parametres[nom] = options[nom]
+
+        generateur = PortefeuilleGenerator(
+            colocation=options['colocation'],
+            vacance=options['vacance'],
+            depenses=options['depenses'],
+            graine=options['graine'],
+            aujourd_hui=options['date'],
+            **parametres
+        )
+
+        debut = time.monotonic()
+        compteurs = generateur.generer()
+        duree = time.monotonic() - debut
+
+        for label, nombre in compteurs.items():
+            self.stdout.write(f"  {label:<35} {nombre:>8}")
+        total = sum(compteurs.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} objets créés en {duree:.1f}s ({total / duree:.0f} objets/s)"
+        ))
@@ -0,0 +1,41 @@
+# src/management/commands/profiler.py
+
+import argparse
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from src.profilage import Echantillonneur
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute une commande de gestion sous le profileur par échantillonnage et enregistre ses "
+        "piles repliées (flame graph) dans PROFILAGE_DOSSIER. "
+        "Ex. : manage.py profiler relancer_impayes --dry-run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=None,
+            help="Période d'échantillonnage en ms (défaut : PROFILAGE_INTERVALLE_MS)"
+        )
+        parser.add_argument('--fonctions', type=int, default=15, help="Fonctions les plus coûteuses affichées")
+        parser.add_argument('commande', help="Commande à profiler")
+        parser.add_argument('arguments', nargs=argparse.REMAINDER, help="Arguments de la commande")
+
+    def handle(self, *args, **options):
+        with Echantillonneur(intervalle_ms=options['intervalle']) as profil:
+            call_command(options['commande'], *options['arguments'])
+
+        fichier = profil.enregistrer(options['commande'])
+        if fichier is None:
+            self.stdout.write(self.style.WARNING("Aucun échantillon : commande trop courte pour la période choisie"))
+            return
+
+        self.stdout.write(f"\n{profil.echantillons} échantillons en {profil.duree:.1f}s → {fichier}")
+        self.stdout.write("Temps propre par fonction :")
+        for fonction, part in profil.fonctions_couteuses(options['fonctions']):
+            self.stdout.write(f"  {part:6.1%}  {fonction}")
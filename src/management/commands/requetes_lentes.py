@@ -0,0 +1,45 @@
+# src/management/commands/requetes_lentes.py
+
+from django.core.management.base import BaseCommand
+
+from src.models import RequeteLente
+
+
+class Command(BaseCommand):
+    help = (
+        "Requêtes SQL les plus coûteuses relevées par le journal des requêtes lentes "
+        "(REQUETES_LENTES_SEUIL_MS), par durée cumulée"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--application', help="Limite aux requêtes d'une application (ex. paiements)")
+        parser.add_argument('--limite', type=int, default=10, help="Requêtes affichées (défaut : 10)")
+        parser.add_argument('--plan', action='store_true', help="Affiche le SQL et le plan d'exécution")
+        parser.add_argument('--reinitialiser', action='store_true', help="Vide le journal")
+
+    def handle(self, *args, **options):
+        requetes = RequeteLente.objects.all()
+        if options['application']:
+            requetes = requetes.filter(application=options['application'])
+
+        if options['reinitialiser']:
+            nombre, _ = requetes.delete()
+            self.stdout.write(self.style.SUCCESS(f"{nombre} requête(s) supprimée(s) du journal"))
+            return
+
+        if not requetes.exists():
+            self.stdout.write("Aucune requête lente enregistrée")
+            return
+
+        self.stdout.write(f"{'Cumul (ms)':>11}{'Nombre':>8}{'Moy. (ms)':>10}{'Max (ms)':>10}  Appelant / vue")
+        for requete in requetes[:options['limite']]:
+            self.stdout.write(
+                f"{requete.duree_totale_ms:>11.0f}{requete.nombre:>8}{requete.duree_moyenne_ms:>10.1f}"
+                f"{requete.duree_max_ms:>10.1f}  {requete.appelant or '-'} ({requete.vue or '-'})"
+            )
+            if requete.parcours_complets:
+                self.stdout.write(self.style.WARNING(f"{'':31}parcours complet : {requete.parcours_complets}"))
+            if options['plan']:
+                self.stdout.write(f"{'':31}{requete.sql[:300]}")
+                for etape in requete.plan.splitlines():
+                    self.stdout.write(f"{'':33}{etape}")
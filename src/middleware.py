@@ -0,0 +1,154 @@
+# src/middleware.py
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.dispatch import receiver
+
+from . import requetes_lentes
+from .performance import ChronometreDB, collecteur, en_tete_server_timing, journaliser
+from .profilage import Echantillonneur
+from .routers import SESSION_DERNIERE_ECRITURE, get_replica, suivi_ecritures
+
+
+class PerformanceMiddleware:
+    """
+    Mesure de chaque requête HTTP
+
+    Durée totale, nombre et durée des requêtes SQL (toutes bases),
+    durée du rendu des TemplateResponse (vues génériques ; le rendu des
+    vues qui appellent render() est compté dans la vue) et taille de la
+    réponse. Les mesures sont envoyées dans l'en-tête Server-Timing (aux
+    seuls membres du personnel), sur le logger src.performance (une ligne
+    JSON par requête) et cumulées par nom d'URL (admin : Performances des
+    vues). Le report en base se fait après l'envoi de la réponse (voir
+    vider_mesures).
+    À placer en tête de MIDDLEWARE pour mesurer aussi les autres middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            if settings.PERFORMANCE_ACTIVE:
+                return self.mesurer(request)
+            return self.get_response(request)
+        finally:
+            jeton = request.__dict__.pop('_jeton_vue_courante', None)
+            if jeton is not None:
+                requetes_lentes.vue_courante.reset(jeton)
+
+    def mesurer(self, request):
+        chronometre = ChronometreDB()
+        request.performance_rendu = None
+        debut = time.perf_counter()
+        with ExitStack() as pile:
+            for alias in connections:
+                pile.enter_context(connections[alias].execute_wrapper(chronometre))
+            response = self.get_response(request)
+        duree = time.perf_counter() - debut
+
+        match = request.resolver_match
+        mesure = {
+            'vue': match.view_name if match else '(non résolue)',
+            'methode': request.method,
+            'chemin': request.path,
+            'statut': response.status_code,
+            'duree_ms': round(duree * 1000, 1),
+            'requetes': chronometre.requetes,
+            'duree_db_ms': round(chronometre.duree * 1000, 1),
+            'duree_rendu_ms': request.performance_rendu,
+            'taille': None if response.streaming else len(response.content),
+        }
+
+        # Durées et nombre de requêtes SQL : réservés au personnel
+        utilisateur = getattr(request, 'user', None)
+        if settings.PERFORMANCE_SERVER_TIMING and utilisateur is not None and utilisateur.is_staff:
+            response['Server-Timing'] = en_tete_server_timing(mesure)
+        journaliser(mesure)
+        collecteur.ajouter(mesure)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Vue à laquelle rattacher les requêtes lentes, rétablie en fin de requête (__call__)
+        request._jeton_vue_courante = requetes_lentes.vue_courante.set(request.resolver_match.view_name)
+
+    def process_template_response(self, request, response):
+        """Chronomètre le rendu, qui suit les process_template_response de tous les middlewares"""
+        if settings.PERFORMANCE_ACTIVE:
+            debut = time.perf_counter()
+
+            def fin_rendu(rendue):
+                request.performance_rendu = round((time.perf_counter() - debut) * 1000, 1)
+
+            response.add_post_render_callback(fin_rendu)
+        return response
+
+
+@receiver(request_finished, dispatch_uid='src.middleware.vider_mesures')
+def vider_mesures(sender, **kwargs):
+    """
+    Report périodique des mesures en base, une fois la réponse envoyée
+
+    request_finished est émis à la fermeture de la réponse par le serveur :
+    le client n'attend pas les écritures. Le report reste groupé (au plus
+    toutes les PERFORMANCE_VIDAGE_SECONDES).
+    """
+    if collecteur.vidage_du():
+        collecteur.vider()
+        requetes_lentes.vider()
+
+
+class ProfilageMiddleware:
+    """
+    Profil par échantillonnage d'une fraction des requêtes (PROFILAGE_TAUX)
+
+    Un fichier de piles repliées par requête profilée, nommé d'après la
+    vue, dans PROFILAGE_DOSSIER (voir src.profilage).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILAGE_TAUX or random.random() >= settings.PROFILAGE_TAUX:
+            return self.get_response(request)
+
+        with Echantillonneur() as profil:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        profil.enregistrer(f"{request.method}_{match.view_name if match else 'non-resolue'}")
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Lecture de ses propres écritures avec une réplique
+
+    Mémorise dans la session l'heure de la dernière écriture ; pendant
+    REPLICA_DELAI_COHERENCE secondes, les lectures de reporting de cette
+    session restent sur default (voir src.routers.ReplicaRouter).
+    À placer après SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replica():
+            return self.get_response(request)
+
+        derniere = request.session.get(SESSION_DERNIERE_ECRITURE)
+        collant = derniere is not None and time.time() - derniere < settings.REPLICA_DELAI_COHERENCE
+
+        with suivi_ecritures(collant) as suivi:
+            response = self.get_response(request)
+
+        if suivi['ecriture']:
+            request.session[SESSION_DERNIERE_ECRITURE] = time.time()
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceVue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vue', models.CharField(max_length=200, verbose_name='Vue')),
+                ('methode', models.CharField(max_length=10, verbose_name='Méthode')),
+                ('nombre', models.PositiveIntegerField(default=0, verbose_name='Requêtes HTTP')),
+                ('erreurs', models.PositiveIntegerField(default=0, verbose_name='Erreurs 5xx')),
+                ('duree_totale_ms', models.FloatField(default=0, verbose_name='Durée totale (ms)')),
+                ('requetes_total', models.PositiveIntegerField(default=0, verbose_name='Requêtes SQL')),
+                ('duree_db_totale_ms', models.FloatField(default=0, verbose_name='Durée SQL totale (ms)')),
+                ('duree_rendu_totale_ms', models.FloatField(default=0, verbose_name='Durée de rendu totale (ms)')),
+                ('taille_totale', models.BigIntegerField(default=0, verbose_name='Octets envoyés')),
+                ('echantillons', models.JSONField(default=list, verbose_name='Dernières durées (ms)')),
+                ('mis_a_jour', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+            ],
+            options={
+                'verbose_name': "Performance d'une vue",
+                'verbose_name_plural': 'Performances des vues',
+                'ordering': ['vue', 'methode'],
+                'constraints': [models.UniqueConstraint(fields=('vue', 'methode'), name='performance_vue_methode_unique')],
+            },
+        ),
+    ]
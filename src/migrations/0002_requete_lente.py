@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('src', '0001_performance_vue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequeteLente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('empreinte', models.CharField(max_length=16, unique=True, verbose_name='Empreinte')),
+                ('sql', models.TextField(verbose_name='SQL normalisé')),
+                ('exemple', models.TextField(verbose_name='Exemple')),
+                ('params', models.JSONField(default=list, verbose_name="Paramètres de l'exemple")),
+                ('application', models.CharField(blank=True, db_index=True, max_length=50, verbose_name='Application')),
+                ('appelant', models.CharField(blank=True, max_length=255, verbose_name='Appelant')),
+                ('vue', models.CharField(blank=True, max_length=200, verbose_name='Vue')),
+                ('nombre', models.PositiveIntegerField(default=0, verbose_name='Occurrences')),
+                ('duree_totale_ms', models.FloatField(default=0, verbose_name='Durée cumulée (ms)')),
+                ('duree_max_ms', models.FloatField(default=0, verbose_name='Durée maximale (ms)')),
+                ('plan', models.TextField(blank=True, verbose_name="Plan d'exécution")),
+                ('parcours_complets', models.CharField(blank=True, max_length=255, verbose_name='Tables parcourues sans index')),
+                ('premiere_occurrence', models.DateTimeField(auto_now_add=True, verbose_name='Première occurrence')),
+                ('derniere_occurrence', models.DateTimeField(auto_now=True, verbose_name='Dernière occurrence')),
+            ],
+            options={
+                'verbose_name': 'Requête lente',
+                'verbose_name_plural': 'Requêtes lentes',
+                'ordering': ['-duree_totale_ms'],
+            },
+        ),
+    ]
@@ -1,3 +1,102 @@
 from django.db import models
 
+from .performance import percentile
 
+
+class PerformanceVue(models.Model):
+    """
+    Performances cumulées d'une vue (nom d'URL) et d'une méthode HTTP
+
+    Alimentée par src.middleware.PerformanceMiddleware. Les percentiles sont
+    calculés sur les PERFORMANCE_ECHANTILLONS dernières durées.
+    """
+
+    vue = models.CharField(max_length=200, verbose_name="Vue")
+    methode = models.CharField(max_length=10, verbose_name="Méthode")
+    nombre = models.PositiveIntegerField(default=0, verbose_name="Requêtes HTTP")
+    erreurs = models.PositiveIntegerField(default=0, verbose_name="Erreurs 5xx")
+    duree_totale_ms = models.FloatField(default=0, verbose_name="Durée totale (ms)")
+    requetes_total = models.PositiveIntegerField(default=0, verbose_name="Requêtes SQL")
+    duree_db_totale_ms = models.FloatField(default=0, verbose_name="Durée SQL totale (ms)")
+    duree_rendu_totale_ms = models.FloatField(default=0, verbose_name="Durée de rendu totale (ms)")
+    taille_totale = models.BigIntegerField(default=0, verbose_name="Octets envoyés")
+    echantillons = models.JSONField(default=list, verbose_name="Dernières durées (ms)")
+    mis_a_jour = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        verbose_name = "Performance d'une vue"
+        verbose_name_plural = "Performances des vues"
+        ordering = ['vue', 'methode']
+        constraints = [
+            models.UniqueConstraint(fields=['vue', 'methode'], name='performance_vue_methode_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.methode} {self.vue}"
+
+    def moyenne(self, total):
+        return round(total / self.nombre, 1) if self.nombre else None
+
+    @property
+    def p50(self):
+        return percentile(self.echantillons, 50)
+
+    @property
+    def p95(self):
+        return percentile(self.echantillons, 95)
+
+    @property
+    def p99(self):
+        return percentile(self.echantillons, 99)
+
+    @property
+    def requetes_moyennes(self):
+        return self.moyenne(self.requetes_total)
+
+    @property
+    def duree_db_moyenne(self):
+        return self.moyenne(self.duree_db_totale_ms)
+
+    @property
+    def duree_rendu_moyenne(self):
+        return self.moyenne(self.duree_rendu_totale_ms)
+
+    @property
+    def taille_moyenne(self):
+        return self.moyenne(self.taille_totale)
+
+
+class RequeteLente(models.Model):
+    """
+    Requête SQL dépassant REQUETES_LENTES_SEUIL_MS, cumulée par empreinte
+
+    Alimentée par src.requetes_lentes : les requêtes qui ne diffèrent que
+    par leurs valeurs partagent une même ligne (nombre, durée cumulée).
+    """
+
+    empreinte = models.CharField(max_length=16, unique=True, verbose_name="Empreinte")
+    sql = models.TextField(verbose_name="SQL normalisé")
+    exemple = models.TextField(verbose_name="Exemple")
+    params = models.JSONField(default=list, verbose_name="Paramètres de l'exemple")
+    application = models.CharField(max_length=50, blank=True, db_index=True, verbose_name="Application")
+    appelant = models.CharField(max_length=255, blank=True, verbose_name="Appelant")
+    vue = models.CharField(max_length=200, blank=True, verbose_name="Vue")
+    nombre = models.PositiveIntegerField(default=0, verbose_name="Occurrences")
+    duree_totale_ms = models.FloatField(default=0, verbose_name="Durée cumulée (ms)")
+    duree_max_ms = models.FloatField(default=0, verbose_name="Durée maximale (ms)")
+    plan = models.TextField(blank=True, verbose_name="Plan d'exécution")
+    parcours_complets = models.CharField(max_length=255, blank=True, verbose_name="Tables parcourues sans index")
+    premiere_occurrence = models.DateTimeField(auto_now_add=True, verbose_name="Première occurrence")
+    derniere_occurrence = models.DateTimeField(auto_now=True, verbose_name="Dernière occurrence")
+
+    class Meta:
+        verbose_name = "Requête lente"
+        verbose_name_plural = "Requêtes lentes"
+        ordering = ['-duree_totale_ms']
+
+    def __str__(self):
+        return f"{self.empreinte} ({self.appelant or self.application})"
+
+    @property
+    def duree_moyenne_ms(self):
+        return round(self.duree_totale_ms / self.nombre, 1) if self.nombre else None
@@ -0,0 +1,122 @@
+# src/performance.py
+import json
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+
+logger = logging.getLogger('src.performance')
+
+
+def percentile(valeurs, p):
+    """Percentile `p` (0-100) par la méthode du rang le plus proche"""
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    return valeurs[max(0, math.ceil(len(valeurs) * p / 100) - 1)]
+
+
+class ChronometreDB:
+    """execute_wrapper qui cumule le nombre et la durée des requêtes SQL"""
+
+    def __init__(self):
+        self.requetes = 0
+        self.duree = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duree += time.perf_counter() - debut
+            self.requetes += 1
+
+
+class Collecteur:
+    """
+    Agrégats par vue tenus en mémoire, reportés périodiquement en base
+
+    Chaque processus cumule ses mesures et les ajoute à PerformanceVue au
+    plus toutes les PERFORMANCE_VIDAGE_SECONDES : une écriture par vue et
+    par période, pas une par requête.
+    """
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.tampon = {}
+        self.dernier_vidage = time.monotonic()
+
+    def ajouter(self, mesure):
+        cle = (mesure['vue'], mesure['methode'])
+        with self.verrou:
+            agregat = self.tampon.setdefault(cle, {
+                'nombre': 0, 'erreurs': 0, 'duree_ms': 0.0, 'requetes': 0,
+                'duree_db_ms': 0.0, 'duree_rendu_ms': 0.0, 'taille': 0, 'echantillons': [],
+            })
+            agregat['nombre'] += 1
+            agregat['erreurs'] += mesure['statut'] >= 500
+            agregat['duree_ms'] += mesure['duree_ms']
+            agregat['requetes'] += mesure['requetes']
+            agregat['duree_db_ms'] += mesure['duree_db_ms']
+            agregat['duree_rendu_ms'] += mesure['duree_rendu_ms'] or 0
+            agregat['taille'] += mesure['taille'] or 0
+            agregat['echantillons'].append(round(mesure['duree_ms'], 1))
+
+    def vidage_du(self):
+        return time.monotonic() - self.dernier_vidage >= settings.PERFORMANCE_VIDAGE_SECONDES
+
+    def vider(self):
+        """Reporte les agrégats en base ; ne fait rien dans une transaction (elle pourrait être annulée)"""
+        if connection.in_atomic_block:
+            return
+        with self.verrou:
+            tampon, self.tampon = self.tampon, {}
+            self.dernier_vidage = time.monotonic()
+
+        from .models import PerformanceVue
+
+        try:
+            for (vue, methode), agregat in tampon.items():
+                with transaction.atomic():
+                    ligne, _ = PerformanceVue.objects.select_for_update().get_or_create(vue=vue, methode=methode)
+                    # Fenêtre glissante : seules les dernières durées servent aux percentiles
+                    ligne.echantillons = (ligne.echantillons + agregat['echantillons'])[-settings.PERFORMANCE_ECHANTILLONS:]
+                    ligne.save(update_fields=['echantillons', 'mis_a_jour'])
+                    PerformanceVue.objects.filter(pk=ligne.pk).update(
+                        nombre=F('nombre') + agregat['nombre'],
+                        erreurs=F('erreurs') + agregat['erreurs'],
+                        duree_totale_ms=F('duree_totale_ms') + agregat['duree_ms'],
+                        requetes_total=F('requetes_total') + agregat['requetes'],
+                        duree_db_totale_ms=F('duree_db_totale_ms') + agregat['duree_db_ms'],
+                        duree_rendu_totale_ms=F('duree_rendu_totale_ms') + agregat['duree_rendu_ms'],
+                        taille_totale=F('taille_totale') + agregat['taille'],
+                    )
+        except DatabaseError:
+            logger.exception("Mesures de performance non enregistrées")
+
+
+collecteur = Collecteur()
+
+
+def journaliser(mesure):
+    """Une ligne JSON par requête HTTP, sur le logger src.performance"""
+    logger.info(json.dumps(mesure, ensure_ascii=False))
+
+
+def en_tete_server_timing(mesure):
+    """
+    Valeur de l'en-tête Server-Timing (affichée par les outils de développement
+    des navigateurs, onglet Réseau > Minutage)
+    """
+    elements = [
+        f'total;dur={mesure["duree_ms"]:.1f}',
+        f'db;dur={mesure["duree_db_ms"]:.1f};desc="{mesure["requetes"]} SQL"',
+    ]
+    if mesure['duree_rendu_ms'] is not None:
+        elements.append(f'rendu;dur={mesure["duree_rendu_ms"]:.1f}')
+    return ', '.join(elements)
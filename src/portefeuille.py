@@ -0,0 +1,368 @@
+# src/portefeuille.py
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from contrats.models import Contrats, ContratLocataire
+from immeuble.models import Immeuble, Appartement
+from immeuble.occupation import OccupationManager
+from paiements.models import PaiementLocataire, DepenseProprietaire, TypeDepense
+from paiements.relances import date_echeance
+from paiements.statistiques import StatistiqueManager, ajouter_mois
+from persons.models import Proprietaires, Locataires
+from quittances.models import Quittance
+
+
+# Tailles prédéfinies (benchmarks) : nombre d'immeubles, d'appartements par immeuble, années d'historique
+TAILLES_PORTEFEUILLE = {
+    'petit': {'proprietaires': 5, 'immeubles': 5, 'appartements': 8, 'annees': 2},
+    'moyen': {'proprietaires': 30, 'immeubles': 40, 'appartements': 12, 'annees': 3},
+    'grand': {'proprietaires': 150, 'immeubles': 150, 'appartements': 15, 'annees': 5},
+}
+
+BATCH_SIZE = 2000
+
+NOMS = [
+    'Martin', 'Bernard', 'Thomas', 'Petit', 'Robert', 'Richard', 'Durand', 'Dubois', 'Moreau', 'Laurent',
+    'Simon', 'Michel', 'Lefebvre', 'Leroy', 'Roux', 'David', 'Bertrand', 'Morel', 'Fournier', 'Girard',
+    'Bonnet', 'Dupont', 'Lambert', 'Fontaine', 'Rousseau', 'Vincent', 'Muller', 'Lefevre', 'Faure', 'Andre',
+]
+PRENOMS = [
+    'Camille', 'Léa', 'Manon', 'Chloé', 'Emma', 'Inès', 'Sarah', 'Julie', 'Lucie', 'Marie',
+    'Lucas', 'Hugo', 'Louis', 'Nathan', 'Thomas', 'Théo', 'Paul', 'Jules', 'Antoine', 'Maxime',
+]
+VILLES = [
+    ('Lyon', '69003'), ('Nantes', '44000'), ('Lille', '59000'), ('Bordeaux', '33000'),
+    ('Rennes', '35000'), ('Toulouse', '31000'), ('Grenoble', '38000'), ('Montpellier', '34000'),
+]
+RUES = ['rue de la République', 'avenue Jean Jaurès', 'rue Victor Hugo', 'boulevard Pasteur', 'rue des Lilas']
+
+# Types de dépenses : (nom, catégorie, répartissable sur les locataires, montant HT moyen)
+TYPES_DEPENSES = [
+    ('Entretien des parties communes', 'charges', True, 350),
+    ('Eau froide', 'charges', True, 900),
+    ('Assurance immeuble', 'assurance', False, 1800),
+    ('Taxe foncière', 'taxe', False, 2500),
+    ('Réparation plomberie', 'entretien', False, 280),
+    ('Ravalement de façade', 'travaux', False, 12000),
+]
+
+
+class PortefeuilleGenerator:
+    """
+    Générateur de portefeuille synthétique (benchmarks, profilage, tests de charge)
+
+    Produit des propriétaires, immeubles, appartements, une succession de
+    baux par appartement (colocations via ContratLocataire), les paiements
+    mensuels de chaque bail, les quittances des mois réglés et les dépenses,
+    puis les agrégats mensuels (occupation, statistiques).
+    Tout est inséré par lots, sans save() ni signal par objet : bulk_create
+    pour les tables de référence, insertion brute pour les tables mensuelles.
+    À graine et date de référence identiques, le portefeuille est identique.
+    """
+
+    def __init__(self, proprietaires=30, immeubles=40, appartements=12, annees=3,
+                 colocation=0.3, vacance=0.08, depenses=6, graine=42, aujourd_hui=None):
+        self.nb_proprietaires = proprietaires
+        self.nb_immeubles = immeubles
+        self.nb_appartements = appartements
+        self.annees = annees
+        self.colocation = colocation
+        self.vacance = vacance
+        self.depenses_par_an = depenses
+        self.aujourd_hui = aujourd_hui or date.today()
+        self.rng = random.Random(graine)
+        self.graine = graine
+        self.compteurs = {}
+        self.numeros_quittances = {}
+
+    def inserer(self, model, objets):
+        """bulk_create par lots ; les clés primaires sont renseignées sur les objets"""
+        model.objects.bulk_create(objets, batch_size=BATCH_SIZE)
+        self.compteurs[model._meta.label] = self.compteurs.get(model._meta.label, 0) + len(objets)
+        return objets
+
+    def personne(self):
+        return self.rng.choice(NOMS), self.rng.choice(PRENOMS)
+
+    def generer(self):
+        """
+        Génère le portefeuille complet dans une transaction
+
+        Returns:
+            dict: Nombre d'objets créés par modèle
+        """
+        with transaction.atomic():
+            proprietaires = self.generer_proprietaires()
+            appartements = self.generer_immeubles(proprietaires)
+            contrats = self.generer_contrats(appartements)
+            self.generer_locataires(contrats)
+            self.generer_paiements(contrats)
+            self.generer_depenses(appartements)
+
+            Appartement.objects.filter(
+                id__in=[c.appartement_id for c in contrats if c.actif]
+            ).update(loue=True, updated_at=timezone.now())
+
+            # Les insertions en masse ne déclenchent pas les signaux de maintenance :
+            # les deux tables d'agrégats sont reconstruites ici
+            self.compteurs['immeuble.OccupationMensuelle'] = OccupationManager.reconstruire()
+            self.compteurs['paiements.StatistiqueMensuelle'] = StatistiqueManager.reconstruire()
+
+        return self.compteurs
+
+    def generer_proprietaires(self):
+        proprietaires = []
+        for i in range(self.nb_proprietaires):
+            nom, prenom = self.personne()
+            proprietaires.append(Proprietaires(
+                nom=nom,
+                prenom=prenom,
+                raison_sociale=f"SCI {nom} {i}" if self.rng.random() < 0.2 else '',
+                email=f"proprietaire{i}.{self.graine}@exemple.fr",
+                telephone=f"06 {self.rng.randint(10000000, 99999999)}",
+            ))
+        return self.inserer(Proprietaires, proprietaires)
+
+    def generer_immeubles(self, proprietaires):
+        immeubles = []
+        for i in range(self.nb_immeubles):
+            ville, code_postal = self.rng.choice(VILLES)
+            immeubles.append(Immeuble(
+                nom=f"Résidence {self.rng.choice(NOMS)} {i + 1}",
+                adresse=f"{self.rng.randint(1, 150)} {self.rng.choice(RUES)}",
+                ville=ville,
+                code_postal=code_postal,
+                charges_communes_annuelles=Decimal(self.rng.randint(20, 120) * 100),
+            ))
+        self.inserer(Immeuble, immeubles)
+
+        appartements = []
+        for immeuble in immeubles:
+            # Un propriétaire unique pour la moitié des immeubles
+            unique = self.rng.choice(proprietaires) if self.rng.random() < 0.5 else None
+            for n in range(self.nb_appartements):
+                surface = self.rng.randint(18, 110)
+                appartements.append(Appartement(
+                    immeuble=immeuble,
+                    numero=f"{n // 4 + 1}{n % 4 + 1:02d}",
+                    etage=n // 4,
+                    proprietaire=unique or self.rng.choice(proprietaires),
+                    surface=Decimal(surface),
+                    tantiemes=surface * 10,
+                    loyer_base=Decimal(200 + surface * self.rng.randint(10, 16)),
+                    charges_mensuelles=Decimal(20 + surface),
+                ))
+        return self.inserer(Appartement, appartements)
+
+    def generer_contrats(self, appartements):
+        """Baux successifs de chaque appartement depuis le début de l'historique"""
+        debut_historique = ajouter_mois(self.aujourd_hui.replace(day=1), -12 * self.annees)
+        contrats = []
+        for appartement in appartements:
+            debut = ajouter_mois(debut_historique, self.rng.randint(0, 6))
+            while debut <= self.aujourd_hui:
+                duree = self.rng.randint(12, 48)
+                fin = ajouter_mois(debut, duree) - timedelta(days=1)
+                # Le bail en cours reste actif, sauf appartement laissé vacant
+                termine = fin < self.aujourd_hui or self.rng.random() < self.vacance
+                contrats.append(Contrats(
+                    appartement=appartement,
+                    date_debut=debut,
+                    date_fin=fin,
+                    date_fin_effective=min(fin, self.aujourd_hui) if termine else None,
+                    loyer_mensuel=appartement.loyer_base,
+                    charges_mensuelles=appartement.charges_mensuelles,
+                    jour_echeance=self.rng.choice([1, 5, 5, 5, 10]),
+                    depot_garantie=appartement.loyer_base,
+                    date_revision=ajouter_mois(debut, 12),
+                    actif=not termine,
+                ))
+                if not termine:
+                    break
+                # Vacance entre deux baux
+                debut = ajouter_mois(fin + timedelta(days=1), self.rng.randint(0, 3))
+        return self.inserer(Contrats, contrats)
+
+    def generer_locataires(self, contrats):
+        """Un à trois locataires par bail (colocation), chacun rattaché par ContratLocataire"""
+        locataires, relations = [], []
+        for contrat in contrats:
+            nombre = 1
+            if self.rng.random() < self.colocation:
+                nombre = self.rng.choice([2, 2, 3])
+            for ordre in range(1, nombre + 1):
+                nom, prenom = self.personne()
+                locataire = Locataires(
+                    nom=nom,
+                    prenom=prenom,
+                    email=f"locataire{len(locataires)}.{self.graine}@exemple.fr",
+                    telephone=f"07 {self.rng.randint(10000000, 99999999)}",
+                    actif=contrat.actif,
+                )
+                locataires.append(locataire)
+                relations.append((contrat, locataire, ordre))
+
+        self.inserer(Locataires, locataires)
+        self.inserer(ContratLocataire, [
+            ContratLocataire(
+                contrat=contrat,
+                locataire=locataire,
+                principal=ordre == 1,
+                ordre=ordre,
+                role='titulaire' if ordre == 1 else 'cotitulaire',
+                date_entree=contrat.date_debut,
+                date_sortie=contrat.date_fin_effective,
+            )
+            for contrat, locataire, ordre in relations
+        ])
+
+    def numero_quittance(self, mois):
+        """Numéro au format de Quittance.save() : Q + AAAAMM + compteur du mois"""
+        compteur = self.numeros_quittances.get(mois, 0) + 1
+        self.numeros_quittances[mois] = compteur
+        return f"Q{mois:%Y%m}{compteur:04d}"
+
+    def inserer_lignes(self, model, lignes):
+        """
+        Insertion brute (executemany) de lignes déjà prêtes pour la base
+
+        Pour les tables mensuelles (paiements, quittances), la préparation
+        champ par champ de bulk_create coûte plusieurs fois l'écriture
+        elle-même. Les lignes sont des dictionnaires {attname: valeur
+        adaptée} ; les champs absents reçoivent leur valeur par défaut et les
+        clés primaires sont attribuées ici.
+        """
+        champs = model._meta.concrete_fields
+        maintenant = connection.ops.adapt_datetimefield_value(timezone.now())
+        defauts = {
+            champ.attname: champ.get_db_prep_save(champ.get_default(), connection)
+            for champ in champs
+        }
+        defauts.update(created_at=maintenant, updated_at=maintenant)
+
+        suivant = (model.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+        for numero, ligne in enumerate(lignes, start=suivant):
+            ligne[model._meta.pk.attname] = numero
+
+        colonnes = ', '.join(connection.ops.quote_name(champ.column) for champ in champs)
+        marqueurs = ', '.join(['%s'] * len(champs))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({colonnes}) VALUES ({marqueurs})",
+                [tuple(ligne.get(champ.attname, defauts[champ.attname]) for champ in champs) for ligne in lignes]
+            )
+            # Clés explicites : les séquences (PostgreSQL) repartent après la dernière
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
+        self.compteurs[model._meta.label] = self.compteurs.get(model._meta.label, 0) + len(lignes)
+
+    def generer_paiements(self, contrats):
+        """Paiements mensuels de chaque bail et quittances des mois réglés, insérés par lots"""
+        mois_courant = self.aujourd_hui.replace(day=1)
+        adapter = connection.ops.adapt_datefield_value
+        paiements = []
+
+        for contrat in contrats:
+            fin = contrat.date_fin_effective or self.aujourd_hui
+            mois = contrat.date_debut.replace(day=1)
+            while mois <= fin and mois <= mois_courant:
+                echeance = date_echeance(mois, contrat.jour_echeance)
+                tirage = self.rng.random()
+                if tirage >= 0.02 and echeance <= self.aujourd_hui:
+                    # Sinon : impayé, ou échéance pas encore atteinte
+                    partiel = tirage < 0.05
+                    loyer = contrat.loyer_mensuel
+                    if partiel:
+                        loyer = (loyer / 2).quantize(Decimal('0.01'))
+                    paiements.append({
+                        'contrat_id': contrat.id,
+                        'mois': mois,
+                        'loyer': loyer,
+                        'loyer_attendu': contrat.loyer_mensuel,
+                        'charges': contrat.charges_mensuelles,
+                        'date_paiement': adapter(echeance + timedelta(days=self.rng.randint(-4, 12))),
+                        'date_echeance': adapter(echeance),
+                        'mode_paiement': self.rng.choice(['virement', 'virement', 'prelevement', 'cheque']),
+                        'statut': 'partiel' if partiel else 'recu',
+                        'valide': mois < mois_courant,
+                    })
+                mois = ajouter_mois(mois, 1)
+
+            if len(paiements) >= BATCH_SIZE * 5:
+                self.inserer_paiements(paiements)
+                paiements = []
+
+        self.inserer_paiements(paiements)
+
+    def inserer_paiements(self, paiements):
+        mois_courant = self.aujourd_hui.replace(day=1)
+        quittances = [
+            {
+                'contrat_id': paiement['contrat_id'],
+                'mois': paiement['mois'],
+                'numero': self.numero_quittance(paiement['mois']),
+                'loyer': paiement['loyer'],
+                'charges': paiement['charges'],
+                'total': paiement['loyer'] + paiement['charges'],
+                'paiement': paiement,
+                'envoyee': paiement['mois'] < mois_courant,
+                'mode_envoi': 'email',
+            }
+            for paiement in paiements
+            if paiement['statut'] == 'recu'
+        ]
+        for ligne in paiements:
+            ligne['mois'] = connection.ops.adapt_datefield_value(ligne['mois'])
+        self.inserer_lignes(PaiementLocataire, paiements)
+
+        maintenant = connection.ops.adapt_datetimefield_value(timezone.now())
+        for ligne in quittances:
+            ligne['paiement_id'] = ligne.pop('paiement')['id']
+            ligne['mois'] = connection.ops.adapt_datefield_value(ligne['mois'])
+            ligne['date_generation'] = maintenant
+        self.inserer_lignes(Quittance, quittances)
+
+    def generer_depenses(self, appartements):
+        """Dépenses de l'historique, rattachées à l'immeuble ou à un appartement"""
+        types = {}
+        for nom, categorie, repartissable, montant in TYPES_DEPENSES:
+            types[nom] = TypeDepense.objects.get_or_create(
+                nom=nom,
+                defaults={'categorie': categorie, 'recurrent': categorie in ('charges', 'assurance', 'taxe')}
+            )[0]
+
+        par_immeuble = {}
+        for appartement in appartements:
+            par_immeuble.setdefault(appartement.immeuble_id, []).append(appartement)
+
+        depenses = []
+        debut = ajouter_mois(self.aujourd_hui.replace(day=1), -12 * self.annees)
+        jours = (self.aujourd_hui - debut).days
+        for immeuble_id, appartements_immeuble in par_immeuble.items():
+            for _ in range(self.depenses_par_an * self.annees):
+                nom, categorie, repartissable, montant = self.rng.choice(TYPES_DEPENSES)
+                montant_ht = Decimal(self.rng.randint(montant // 2, montant * 3 // 2))
+                tva = (montant_ht * Decimal('0.20')).quantize(Decimal('0.01'))
+                date_depense = debut + timedelta(days=self.rng.randint(0, jours))
+                appartement = self.rng.choice(appartements_immeuble) if categorie == 'entretien' else None
+                depenses.append(DepenseProprietaire(
+                    immeuble_id=None if appartement else immeuble_id,
+                    appartement=appartement,
+                    type_depense=types[nom],
+                    designation=nom,
+                    montant_ht=montant_ht,
+                    tva=tva,
+                    montant_ttc=montant_ht + tva,
+                    date_depense=date_depense,
+                    date_paiement=date_depense + timedelta(days=15),
+                    fournisseur=f"Entreprise {self.rng.choice(NOMS)}",
+                    statut='payee',
+                    repartissable=repartissable,
+                ))
+        self.inserer(DepenseProprietaire, depenses)
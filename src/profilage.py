@@ -0,0 +1,107 @@
+# src/profilage.py
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+
+def pile_repliee(cadre):
+    """Pile d'appels au format replié (collapsed) : 'module:fonction;...', de la racine à la feuille"""
+    appels = []
+    while cadre is not None:
+        appels.append(f"{cadre.f_globals.get('__name__', '?')}:{cadre.f_code.co_name}")
+        cadre = cadre.f_back
+    return ';'.join(reversed(appels))
+
+
+class Echantillonneur:
+    """
+    Profileur par échantillonnage, en pur Python
+
+    Un thread relève toutes les `intervalle_ms` la pile du thread observé
+    (sys._current_frames) et compte les piles identiques. Un thread plutôt
+    qu'un signal (SIGPROF) : les requêtes sont servies hors du thread
+    principal par les serveurs multi-threads. Coût négligeable pour le code
+    observé, mais seules les fonctions Python apparaissent (le temps passé
+    dans une extension C est attribué à la fonction Python qui l'appelle).
+
+    Utilisable comme gestionnaire de contexte :
+        with Echantillonneur() as profil:
+            ...
+        profil.enregistrer('generation')
+    """
+
+    def __init__(self, intervalle_ms=None, thread_id=None):
+        self.intervalle = (intervalle_ms or settings.PROFILAGE_INTERVALLE_MS) / 1000
+        self.cible = thread_id or threading.get_ident()
+        self.piles = Counter()
+        self.arret = threading.Event()
+        self.thread = None
+        self.duree = 0.0
+
+    def demarrer(self):
+        self.debut = time.perf_counter()
+        self.thread = threading.Thread(target=self.echantillonner, name='echantillonneur', daemon=True)
+        self.thread.start()
+        return self
+
+    def arreter(self):
+        self.arret.set()
+        self.thread.join()
+        self.duree = time.perf_counter() - self.debut
+
+    def echantillonner(self):
+        while not self.arret.wait(self.intervalle):
+            cadre = sys._current_frames().get(self.cible)
+            if cadre is not None:
+                self.piles[pile_repliee(cadre)] += 1
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+    @property
+    def echantillons(self):
+        return sum(self.piles.values())
+
+    def fonctions_couteuses(self, nombre=10):
+        """Fonctions les plus souvent en haut de pile (temps propre) : [(fonction, part)]"""
+        feuilles = Counter()
+        for pile, compte in self.piles.items():
+            feuilles[pile.rsplit(';', 1)[-1]] += compte
+        total = self.echantillons or 1
+        return [(fonction, compte / total) for fonction, compte in feuilles.most_common(nombre)]
+
+    def enregistrer(self, nom):
+        """
+        Écrit les piles au format replié (une ligne 'pile nombre'), lisible par
+        flamegraph.pl, speedscope ou inferno, dans PROFILAGE_DOSSIER
+
+        Returns:
+            Path: Fichier écrit (None si aucun échantillon)
+        """
+        if not self.piles:
+            return None
+        dossier = Path(settings.PROFILAGE_DOSSIER)
+        dossier.mkdir(parents=True, exist_ok=True)
+        nom = re.sub(r'[^\w.-]+', '-', nom).strip('-') or 'profil'
+        fichier = dossier / f"{datetime.now():%Y%m%d-%H%M%S-%f}_{nom}.folded"
+        fichier.write_text(''.join(f"{pile} {compte}\n" for pile, compte in self.piles.most_common()))
+        purger(dossier)
+        return fichier
+
+
+def purger(dossier):
+    """Conservation : PROFILAGE_MAX_FICHIERS fichiers au plus, aucun de plus de PROFILAGE_JOURS jours"""
+    fichiers = sorted(Path(dossier).glob('*.folded'), key=lambda f: f.stat().st_mtime, reverse=True)
+    limite = time.time() - settings.PROFILAGE_JOURS * 86400
+    for rang, fichier in enumerate(fichiers):
+        if rang >= settings.PROFILAGE_MAX_FICHIERS or fichier.stat().st_mtime < limite:
+            fichier.unlink(missing_ok=True)
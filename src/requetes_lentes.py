@@ -0,0 +1,192 @@
+# src/requetes_lentes.py
+import atexit
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+
+from .db import expliquer
+
+
+logger = logging.getLogger('src.requetes_lentes')
+
+# Nom d'URL de la requête HTTP en cours (renseigné par PerformanceMiddleware)
+vue_courante = ContextVar('vue_courante', default='')
+
+# Vrai pendant l'EXPLAIN et le report en base : ces requêtes ne sont pas observées
+_interne = threading.local()
+
+# Cadres de pile ignorés pour trouver l'appelant : instrumentation et point d'entrée
+MODULES_IGNORES = tuple(
+    str(Path(__file__).parent / nom) for nom in ('requetes_lentes.py', 'db.py', 'middleware.py', 'performance.py')
+) + (str(Path(settings.BASE_DIR) / 'manage.py'),)
+
+
+def empreinte(sql):
+    """
+    Empreinte d'une requête : deux requêtes qui ne diffèrent que par leurs
+    valeurs (paramètres, littéraux, longueur des listes IN) ont la même
+
+    Returns:
+        tuple: (empreinte hexadécimale, SQL normalisé)
+    """
+    normalise = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    normalise = re.sub(r'\b\d+(?:\.\d+)?\b', '?', normalise)
+    normalise = re.sub(r'%s|\?', '?', normalise)
+    normalise = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?...)', normalise)
+    normalise = re.sub(r'\s+', ' ', normalise).strip()
+    return hashlib.sha1(normalise.encode()).hexdigest()[:16], normalise
+
+
+def appelant():
+    """Premier cadre de pile du projet (hors Django et bibliothèques) : 'module.fonction:ligne'"""
+    racine = str(settings.BASE_DIR)
+    cadre = sys._getframe(1)
+    while cadre:
+        fichier = cadre.f_code.co_filename
+        if fichier.startswith(racine) and 'site-packages' not in fichier and fichier not in MODULES_IGNORES:
+            module = Path(fichier).relative_to(racine).with_suffix('').as_posix().replace('/', '.')
+            return f"{module}.{cadre.f_code.co_name}:{cadre.f_lineno}"
+        cadre = cadre.f_back
+    return ''
+
+
+class DetecteurRequetesLentes:
+    """
+    execute_wrapper installé sur chaque connexion quand REQUETES_LENTES_SEUIL_MS est défini
+
+    Toute requête plus longue que le seuil est journalisée (logger
+    src.requetes_lentes, une ligne JSON : SQL, paramètres, durée, vue,
+    appelant) et cumulée par empreinte. Le plan d'exécution est relevé à
+    la première occurrence de chaque empreinte. Les agrégats sont reportés
+    dans RequeteLente (admin, commande requetes_lentes) par vider().
+    """
+
+    def __init__(self, seuil_ms):
+        self.seuil_ms = seuil_ms
+        self.verrou = threading.Lock()
+        self.tampon = {}
+        self.plans = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_interne, 'actif', False):
+            return execute(sql, params, many, context)
+
+        debut = time.perf_counter()
+        resultat = execute(sql, params, many, context)
+        duree = (time.perf_counter() - debut) * 1000
+        if duree >= self.seuil_ms:
+            self.enregistrer(sql, params, many, duree, context['connection'])
+        return resultat
+
+    def enregistrer(self, sql, params, many, duree, connexion):
+        cle, normalise = empreinte(sql)
+        source = appelant()
+        vue = vue_courante.get()
+        # Requête lancée par un template : seul le nom de la vue situe l'application
+        application = source.split('.', 1)[0] if source else vue.partition(':')[0] if ':' in vue else ''
+        parametres = [] if many else [str(p) for p in params or ()]
+        logger.warning(json.dumps({
+            'duree_ms': round(duree, 1), 'sql': sql, 'params': parametres, 'vue': vue, 'appelant': source,
+        }, ensure_ascii=False))
+
+        plan, scans = None, []
+        if not many and cle not in self.plans and sql.lstrip()[:6].upper() in ('SELECT', 'WITH '):
+            self.plans.add(cle)
+            plan, scans = self.expliquer(connexion, sql, params)
+
+        with self.verrou:
+            agregat = self.tampon.setdefault(cle, {
+                'sql': normalise, 'exemple': sql, 'params': parametres, 'vue': vue, 'appelant': source,
+                'application': application, 'nombre': 0, 'duree_ms': 0.0, 'duree_max_ms': 0.0,
+                'plan': None, 'scans': [],
+            })
+            agregat['nombre'] += 1
+            agregat['duree_ms'] += duree
+            agregat['duree_max_ms'] = max(agregat['duree_max_ms'], duree)
+            if plan is not None:
+                agregat['plan'], agregat['scans'] = plan, scans
+
+    def expliquer(self, connexion, sql, params):
+        _interne.actif = True
+        try:
+            with connexion.cursor() as cursor:
+                return expliquer(cursor, sql, params)
+        except DatabaseError:
+            return None, []
+        finally:
+            _interne.actif = False
+
+    def vider(self):
+        """Reporte les agrégats dans RequeteLente ; ne fait rien dans une transaction"""
+        if connection.in_atomic_block or not self.tampon:
+            return
+        with self.verrou:
+            tampon, self.tampon = self.tampon, {}
+
+        from .models import RequeteLente
+
+        _interne.actif = True
+        try:
+            for cle, agregat in tampon.items():
+                with transaction.atomic():
+                    ligne, creee = RequeteLente.objects.get_or_create(empreinte=cle, defaults={
+                        'sql': agregat['sql'],
+                        'exemple': agregat['exemple'],
+                        'params': agregat['params'],
+                        'application': agregat['application'],
+                        'appelant': agregat['appelant'],
+                        'vue': agregat['vue'],
+                    })
+                    if agregat['plan'] is not None:
+                        ligne.plan = '\n'.join(agregat['plan'])
+                        ligne.parcours_complets = ', '.join(agregat['scans'])
+                    ligne.save()
+                    RequeteLente.objects.filter(pk=ligne.pk).update(
+                        nombre=F('nombre') + agregat['nombre'],
+                        duree_totale_ms=F('duree_totale_ms') + agregat['duree_ms'],
+                        duree_max_ms=Greatest('duree_max_ms', Value(agregat['duree_max_ms'])),
+                    )
+        except DatabaseError:
+            logger.exception("Requêtes lentes non enregistrées")
+        finally:
+            _interne.actif = False
+
+
+detecteur = None
+
+
+@receiver(connection_created)
+def installer_detecteur(sender, connection, **kwargs):
+    """Observe chaque nouvelle connexion si REQUETES_LENTES_SEUIL_MS est défini"""
+    global detecteur
+    seuil = getattr(settings, 'REQUETES_LENTES_SEUIL_MS', None)
+    if seuil is None:
+        return
+    if detecteur is None:
+        # Les commandes de gestion n'ont pas de fin de requête HTTP : report à la sortie
+        atexit.register(vider)
+    if detecteur is None or detecteur.seuil_ms != seuil:
+        detecteur = DetecteurRequetesLentes(seuil)
+    if not any(isinstance(w, DetecteurRequetesLentes) for w in connection.execute_wrappers):
+        # En tête de liste : les execute_wrapper() temporaires, ajoutés et retirés
+        # en fin de liste, ne le déplacent pas
+        connection.execute_wrappers.insert(0, detecteur)
+
+
+def vider():
+    """Reporte les requêtes lentes relevées par ce processus (fin de requête HTTP, fin de commande)"""
+    if detecteur is not None:
+        detecteur.vider()
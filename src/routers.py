@@ -0,0 +1,98 @@
+# src/routers.py
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Lectures de reporting autorisées sur la réplique (vues et fonctions marquées)
+_lecture_replica = contextvars.ContextVar('lecture_replica', default=False)
+
+# Suivi des écritures de la requête en cours ({'collant': bool, 'ecriture': bool})
+_suivi = contextvars.ContextVar('suivi_ecritures', default=None)
+
+# Écritures qui ne rendent pas la session « collante » (sauvegarde de la session elle-même)
+APPS_IGNOREES = {'sessions'}
+
+# Clé de session : horodatage de la dernière écriture
+SESSION_DERNIERE_ECRITURE = '_replica_derniere_ecriture'
+
+
+def get_replica():
+    """Alias de la réplique en lecture, ou None si aucune n'est configurée"""
+    return getattr(settings, 'DATABASE_REPLICA', None)
+
+
+@contextmanager
+def lecture_replica():
+    """Envoie les lectures du bloc vers la réplique (si configurée)"""
+    jeton = _lecture_replica.set(True)
+    try:
+        yield
+    finally:
+        _lecture_replica.reset(jeton)
+
+
+@contextmanager
+def suivi_ecritures(collant=False):
+    """
+    Suit les écritures d'une requête (utilisé par ReplicaMiddleware)
+
+    Args:
+        collant: La session a écrit récemment, toutes ses lectures restent sur default
+
+    Yields:
+        dict: État de la requête, 'ecriture' passe à True à la première écriture
+    """
+    jeton = _suivi.set({'collant': collant, 'ecriture': False})
+    try:
+        yield _suivi.get()
+    finally:
+        _suivi.reset(jeton)
+
+
+class LectureReplicaMixin:
+    """Vue de reporting : ses lectures, rendu du template compris, vont sur la réplique"""
+
+    def dispatch(self, request, *args, **kwargs):
+        with lecture_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            # Les QuerySets passés au template sont évalués au rendu
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class ReplicaRouter:
+    """
+    Lectures de reporting sur la réplique, écritures sur default
+
+    Seules les lectures effectuées dans lecture_replica() quittent default.
+    Une requête qui vient d'écrire, ou dont la session a écrit depuis moins
+    de REPLICA_DELAI_COHERENCE secondes, lit sur default : l'utilisateur
+    voit toujours ses propres écritures malgré le retard de réplication.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = get_replica()
+        if not replica or not _lecture_replica.get():
+            return None
+
+        suivi = _suivi.get()
+        if suivi and (suivi['collant'] or suivi['ecriture']):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        suivi = _suivi.get()
+        if suivi is not None and model._meta.app_label not in APPS_IGNOREES:
+            suivi['ecriture'] = True
+        # Explicite : un objet lu sur la réplique est enregistré sur default
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, get_replica()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
@@ -12,9 +12,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 
 from django.conf.global_settings import AUTH_USER_MODEL
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +60,7 @@ INSTALLED_APPS = [
     'contrats',
     'paiements',
     'quittances',
+    'portail',
     #
     # #app à supprimer
     'essais',
@@ -66,12 +70,15 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    'src.middleware.PerformanceMiddleware',
+    'src.middleware.ProfilageMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'src.middleware.ReplicaMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -99,11 +106,124 @@ WSGI_APPLICATION = 'src.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Base de données choisie par variables d'environnement :
+#   DB_ENGINE=sqlite (défaut) ou postgresql
+#   DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#   DB_POOL_MIN, DB_POOL_MAX : taille du pool de connexions PostgreSQL
+#   DB_TEST_NAME : base créée par `manage.py test`
+# PostgreSQL demande psycopg 3 (pip install "psycopg[binary,pool]"), absent
+# de requirements.txt qui ne couvre que SQLite. Sans le paquet psycopg_pool,
+# le pool est remplacé par des connexions persistantes.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'gestion_locative'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'TEST': {
+                'NAME': os.environ.get('DB_TEST_NAME'),
+            },
+        }
     }
+    if importlib.util.find_spec('psycopg_pool'):
+        # Le pool remplace les connexions persistantes (CONN_MAX_AGE doit rester à 0)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+                'timeout': 10,
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = 60
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # Connexions persistantes (secondes), vérifiées avant réutilisation
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE inconnu : {DB_ENGINE} (sqlite ou postgresql)")
+
+# Réplique en lecture (optionnelle) pour le tableau de bord et les statistiques :
+#   DB_REPLICA_NAME (SQLite : chemin du fichier, par ex. une copie de db.sqlite3)
+#   DB_REPLICA_HOST (PostgreSQL : serveur de la réplique)
+# Les écritures restent sur default (src/routers.py).
+DATABASE_REPLICA = None
+
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASE_REPLICA = 'replica'
+    DATABASES[DATABASE_REPLICA] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        # Les tests lisent la base de test de default
+        'TEST': {'MIRROR': 'default'},
+    }
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES[DATABASE_REPLICA]['HOST'] = os.environ['DB_REPLICA_HOST']
+
+DATABASE_ROUTERS = ['src.routers.ReplicaRouter']
+
+# Après une écriture, les lectures de la session restent sur default (secondes)
+REPLICA_DELAI_COHERENCE = 10
+
+# Chaque connexion SQLite reçoit le profil de production de src/db.py (WAL,
+# synchronous=NORMAL, cache, mmap, busy_timeout). Pour le modifier, définir
+# SQLITE_PRAGMAS = {'journal_mode': 'WAL', ...}
+
+# Mesure de chaque requête HTTP (src.middleware.PerformanceMiddleware), désactivée par défaut
+PERFORMANCE_ACTIVE = os.environ.get('PERFORMANCE_ACTIVE', '0') == '1'
+# En-tête Server-Timing (durées et nombre de requêtes SQL), envoyé aux seuls membres du personnel
+PERFORMANCE_SERVER_TIMING = os.environ.get('PERFORMANCE_SERVER_TIMING', '0') == '1'
+# Report des agrégats en base (secondes) et durées conservées par vue pour les percentiles
+PERFORMANCE_VIDAGE_SECONDES = 30
+PERFORMANCE_ECHANTILLONS = 1000
+
+# Journal des requêtes SQL plus longues que ce seuil (ms), avec plan d'exécution
+# (src.requetes_lentes) ; désactivé si absent
+REQUETES_LENTES_SEUIL_MS = None
+if os.environ.get('REQUETES_LENTES_SEUIL_MS'):
+    REQUETES_LENTES_SEUIL_MS = float(os.environ['REQUETES_LENTES_SEUIL_MS'])
+
+# Profilage par échantillonnage (src.profilage) : part des requêtes profilées (0 = aucune),
+# période d'échantillonnage et conservation des fichiers de piles repliées
+PROFILAGE_TAUX = float(os.environ.get('PROFILAGE_TAUX', 0))
+PROFILAGE_DOSSIER = os.environ.get('PROFILAGE_DOSSIER', BASE_DIR / 'profils')
+PROFILAGE_INTERVALLE_MS = 5
+PROFILAGE_MAX_FICHIERS = 200
+PROFILAGE_JOURS = 7
+
+# Une ligne JSON par requête HTTP sur le logger src.performance : PERFORMANCE_LOG=INFO
+# (les requêtes lentes sont journalisées en WARNING sur src.requetes_lentes)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'src.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG', 'WARNING'),
+            'propagate': False,
+        },
+        'src.requetes_lentes': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -157,3 +277,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 SUCCESS_URL = 'home'
+
+# Relances des impayés (voir paiements/relances.py pour toutes les options)
+# Délais en jours, taux de pénalités annuel (0.05 = 5 %)
+RELANCES = {
+    'DELAIS': {
+        'premier': 10,
+        'deuxieme': 15,
+        'mise_demeure': 15,
+        'contentieux': 30,
+    },
+    'TAUX_PENALITES': '0.00',
+}
+
+# Portail locataires : durée de validité des liens de téléchargement signés (secondes).
+# Les liens émis pendant une période sont identiques et valables une à deux périodes.
+PORTAIL_LIEN_DUREE = 3600
+
+# Prévisions de trésorerie : durée de conservation en cache (secondes). La clé
+# contient l'empreinte des données : les entrées périmées expirent au terme de ce délai.
+PREVISIONS_CACHE_DUREE = 3600
+
+# Envoi des emails (quittances) : serveur SMTP, surchargeable par l'environnement
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '0') == '1'
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'quittances@localhost')
+
+# Envoi groupé des quittances (voir quittances/envoi.py pour toutes les options)
+# Connexions SMTP simultanées, débit maximal en messages par seconde
+QUITTANCES_ENVOI = {
+    'WORKERS': int(os.environ.get('QUITTANCES_ENVOI_WORKERS', 4)),
+    'DEBIT': float(os.environ.get('QUITTANCES_ENVOI_DEBIT', 10)),
+}
@@ -0,0 +1,84 @@
+# src/testing.py
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from contrats.models import ContratLocataire
+from persons.models import Locataires
+from .benchmarks import CompteurRequetes
+from .portefeuille import PortefeuilleGenerator
+
+
+# Date de référence des portefeuilles de test : jeux de données identiques d'un jour à l'autre
+DATE_REFERENCE = date(2026, 10, 1)
+
+
+def portefeuille(proprietaires=1, immeubles=1, appartements=1, annees=1, **options):
+    """Portefeuille synthétique minimal (voir src.portefeuille), reproductible"""
+    options.setdefault('aujourd_hui', DATE_REFERENCE)
+    options.setdefault('vacance', 0)
+    return PortefeuilleGenerator(
+        proprietaires=proprietaires, immeubles=immeubles, appartements=appartements, annees=annees, **options
+    ).generer()
+
+
+class BudgetRequetesMixin:
+    """
+    Mixin de TestCase : le nombre de requêtes d'une page ne dépend pas du nombre de lignes
+
+    assertRequetesConstantes() affiche la page avec 10 puis 100 lignes
+    (chaque jeu de données est créé puis annulé dans un point de
+    sauvegarde) et échoue si le nombre de requêtes augmente : toute
+    requête exécutée par ligne (N+1) est détectée, même sur une page
+    paginée.
+    """
+
+    tailles = (10, 100)
+
+    def setUp(self):
+        super().setUp()
+        self.utilisateur = get_user_model().objects.create_user(email='budget@exemple.fr')
+        self.client.force_login(self.utilisateur)
+
+    def compter_requetes(self, url, peupler, lignes):
+        """Nombre de requêtes de la page pour un jeu de `lignes` lignes"""
+        with transaction.atomic():
+            cible = peupler(lignes)
+            compteur = CompteurRequetes()
+            with connection.execute_wrapper(compteur):
+                reponse = self.client.get(url(cible) if callable(url) else url)
+            transaction.set_rollback(True)
+
+        self.assertEqual(reponse.status_code, 200, f"{reponse.status_code} pour {lignes} lignes")
+        return compteur.nombre
+
+    def assertRequetesConstantes(self, url, peupler):
+        """
+        Args:
+            url: URL de la page, ou fonction qui la construit à partir du
+                 résultat de peupler (page de détail)
+            peupler: fonction qui crée un jeu de données de n lignes
+        """
+        nombres = {lignes: self.compter_requetes(url, peupler, lignes) for lignes in self.tailles}
+        self.assertEqual(
+            len(set(nombres.values())), 1,
+            f"Le nombre de requêtes dépend du nombre de lignes (N+1) : {nombres}"
+        )
+
+
+def ajouter_colocataires(contrat, nombre):
+    """Ajoute `nombre` cotitulaires au bail"""
+    locataires = Locataires.objects.bulk_create([
+        Locataires(nom=f"Colocataire {i}", prenom="Test", email=f"colocataire{contrat.pk}.{i}@exemple.fr")
+        for i in range(nombre)
+    ])
+    ordre = contrat.contratlocataire_set.count()
+    ContratLocataire.objects.bulk_create([
+        ContratLocataire(
+            contrat=contrat, locataire=locataire, ordre=ordre + i + 1,
+            role='cotitulaire', date_entree=contrat.date_debut
+        )
+        for i, locataire in enumerate(locataires)
+    ])
+    return contrat
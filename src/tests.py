@@ -0,0 +1,454 @@
+# src/tests.py
+
+import json
+import tempfile
+import time
+from pathlib import Path
+from datetime import date
+from unittest import mock
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from immeuble.models import Immeuble, OccupationMensuelle
+from paiements.models import PaiementLocataire, StatistiqueMensuelle
+from persons.models import Locataires
+from quittances.models import Quittance
+from .benchmarks import BenchmarkRunner, comparer_resultats
+from .db import expliquer
+from .middleware import ReplicaMiddleware
+from .models import PerformanceVue, RequeteLente
+from .performance import collecteur, percentile
+from .profilage import Echantillonneur
+from . import requetes_lentes
+from .requetes_lentes import DetecteurRequetesLentes, empreinte
+from .portefeuille import PortefeuilleGenerator
+from .routers import ReplicaRouter, SESSION_DERNIERE_ECRITURE, lecture_replica, suivi_ecritures
+
+
+@override_settings(DATABASE_REPLICA='replica', REPLICA_DELAI_COHERENCE=10)
+class ReplicaRouterTestCase(TestCase):
+    """Tests du routage des lectures de reporting vers la réplique"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_lectures_reporting(self):
+        """Seules les lectures marquées vont sur la réplique"""
+        self.assertIsNone(self.router.db_for_read(Quittance))
+        with lecture_replica():
+            self.assertEqual(self.router.db_for_read(Quittance), 'replica')
+        self.assertEqual(self.router.db_for_write(Quittance), 'default')
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_sans_replique(self):
+        """Sans réplique configurée, tout reste sur default"""
+        with lecture_replica():
+            self.assertIsNone(self.router.db_for_read(Quittance))
+
+    def test_lecture_apres_ecriture(self):
+        """Après une écriture, la requête lit ses propres données sur default"""
+        with suivi_ecritures() as suivi, lecture_replica():
+            self.router.db_for_write(SessionStore.get_model_class())
+            self.assertEqual(self.router.db_for_read(Quittance), 'replica')
+
+            self.router.db_for_write(Quittance)
+            self.assertTrue(suivi['ecriture'])
+            self.assertEqual(self.router.db_for_read(Quittance), 'default')
+
+    def test_session_collante(self):
+        """Une session qui vient d'écrire reste sur default pendant le délai"""
+        routage = []
+
+        def vue(request):
+            with lecture_replica():
+                routage.append(self.router.db_for_read(Quittance))
+            if request.method == 'POST':
+                Immeuble.objects.create(nom="Le Parc", adresse="1 allée du Parc", ville="Nantes", code_postal="44000")
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(vue)
+        session = SessionStore()
+
+        def requete(methode):
+            request = getattr(RequestFactory(), methode)('/')
+            request.session = session
+            middleware(request)
+
+        requete('get')
+        requete('post')
+        requete('get')
+        session[SESSION_DERNIERE_ECRITURE] = time.time() - 60
+        requete('get')
+
+        self.assertEqual(routage, ['replica', 'replica', 'default', 'replica'])
+
+
+class AnalyseRequetesTestCase(TestCase):
+    """Tests de l'analyse des plans d'exécution"""
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            return expliquer(cursor, sql, params)
+
+    def test_parcours_complet_detecte(self):
+        """Un filtre sans index est signalé comme parcours complet"""
+        _, scans = self.plan(Locataires.objects.filter(telephone='0600000000').order_by())
+        self.assertEqual(scans, ['persons_locataires'])
+
+    def test_index_partiel_utilise(self):
+        """La liste des locataires actifs utilise l'index partiel, sans tri"""
+        plan, scans = self.plan(Locataires.objects.filter(actif=True))
+        self.assertEqual(scans, [])
+        self.assertFalse(any('TEMP B-TREE' in etape for etape in plan))
+
+
+class PortefeuilleGeneratorTestCase(TestCase):
+    """Tests du générateur de portefeuille synthétique"""
+
+    def generer(self, graine=7):
+        return PortefeuilleGenerator(
+            proprietaires=2, immeubles=2, appartements=3, annees=1, graine=graine, aujourd_hui=date(2026, 10, 1)
+        ).generer()
+
+    def test_portefeuille_coherent(self):
+        """Une quittance par paiement reçu, numérotée et rattachée à son paiement"""
+        compteurs = self.generer()
+
+        self.assertEqual(compteurs['immeuble.Appartement'], 6)
+        self.assertEqual(Quittance.objects.count(), PaiementLocataire.objects.filter(statut='recu').count())
+        quittance = Quittance.objects.select_related('paiement').first()
+        self.assertEqual(quittance.paiement.mois, quittance.mois)
+        self.assertEqual(quittance.total, quittance.loyer + quittance.charges)
+        self.assertRegex(quittance.numero, r'^Q\d{10}$')
+
+    def test_agregats_reconstruits(self):
+        """Les insertions en masse sont suivies de la reconstruction des deux tables d'agrégats"""
+        compteurs = self.generer()
+
+        self.assertEqual(compteurs['paiements.StatistiqueMensuelle'], StatistiqueMensuelle.objects.count())
+        self.assertEqual(compteurs['immeuble.OccupationMensuelle'], OccupationMensuelle.objects.count())
+        self.assertGreater(StatistiqueMensuelle.objects.count(), 0)
+
+    def test_reproductible(self):
+        """À graine et date identiques, le portefeuille est identique"""
+        def instantane():
+            with transaction.atomic():
+                compteurs = self.generer()
+                paiements = list(PaiementLocataire.objects.order_by('id').values_list(
+                    'contrat__appartement__numero', 'mois', 'loyer', 'statut'
+                ))
+                transaction.set_rollback(True)
+            return compteurs, paiements
+
+        self.assertEqual(instantane(), instantane())
+
+
+class BenchmarkTestCase(TestCase):
+    """Tests du benchmark des chemins critiques"""
+
+    def test_mesures(self):
+        """Chaque scénario est mesuré sans modifier la base"""
+        PortefeuilleGenerator(
+            proprietaires=1, immeubles=1, appartements=2, annees=1, aujourd_hui=date(2026, 10, 1)
+        ).generer()
+        quittances = Quittance.objects.count()
+
+        with tempfile.TemporaryDirectory() as media, override_settings(DEBUG=False, MEDIA_ROOT=media):
+            resultats = BenchmarkRunner(date(2026, 10, 1), repetitions=1).lancer(
+                ['liste_quittances', 'generer_quittances_mois']
+            )
+
+        self.assertEqual(set(resultats), {'liste_quittances', 'generer_quittances_mois'})
+        self.assertGreater(resultats['liste_quittances']['requetes'], 0)
+        self.assertEqual(Quittance.objects.count(), quittances)
+
+    def test_regressions(self):
+        """Hausse de durée au-delà du seuil et toute requête supplémentaire sont signalées"""
+        def resultats(duree, requetes):
+            mesure = {'duree_ms': duree, 'min_ms': duree, 'requetes': requetes, 'memoire_ko': 500}
+            return {'tailles': {'petit': {'scenarios': {'dashboard': mesure}}}}
+
+        reference = resultats(100, 10)
+        self.assertEqual(comparer_resultats(reference, resultats(120, 10), 0.25), [])
+        self.assertEqual(
+            comparer_resultats(reference, resultats(130, 11), 0.25),
+            [('petit', 'dashboard', 'duree_ms', 100, 130), ('petit', 'dashboard', 'requetes', 10, 11)]
+        )
+
+
+@override_settings(PERFORMANCE_ACTIVE=True, PERFORMANCE_SERVER_TIMING=True)
+class PerformanceMiddlewareTestCase(TransactionTestCase):
+    """Tests de la mesure des requêtes HTTP"""
+
+    def setUp(self):
+        collecteur.tampon.clear()
+        self.utilisateur = get_user_model().objects.create_user(email='perf@exemple.fr')
+        self.utilisateur.is_admin = True
+        self.utilisateur.save()
+        self.client.force_login(self.utilisateur)
+
+    def test_mesure_requete(self):
+        """Server-Timing, ligne JSON et agrégat par nom d'URL"""
+        with self.assertLogs('src.performance', 'INFO') as logs:
+            response = self.client.get(reverse('quittances:list'))
+
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ SQL", rendu;dur=')
+        mesure = json.loads(logs.records[0].getMessage())
+        self.assertEqual(mesure['vue'], 'quittances:list')
+        self.assertGreater(mesure['requetes'], 0)
+        self.assertEqual(mesure['taille'], len(response.content))
+
+        collecteur.vider()
+        ligne = PerformanceVue.objects.get(vue='quittances:list', methode='GET')
+        self.assertEqual(ligne.nombre, 1)
+        self.assertEqual(ligne.requetes_total, mesure['requetes'])
+        self.assertEqual(ligne.p95, mesure['duree_ms'])
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=False)
+    def test_sans_server_timing(self):
+        """L'en-tête Server-Timing peut être désactivé"""
+        response = self.client.get(reverse('quittances:list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_reserve_au_personnel(self):
+        """Les durées SQL ne sont pas exposées aux autres utilisateurs ni aux anonymes"""
+        self.utilisateur.is_admin = False
+        self.utilisateur.save()
+        self.assertNotIn('Server-Timing', self.client.get(reverse('quittances:list')))
+        self.client.logout()
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+
+    def test_vue_courante_retablie(self):
+        """Le nom de la vue ne survit pas à la requête"""
+        self.client.get(reverse('quittances:list'))
+        self.assertEqual(requetes_lentes.vue_courante.get(), '')
+
+    @override_settings(PERFORMANCE_VIDAGE_SECONDES=0)
+    def test_report_apres_reponse(self):
+        """Le report en base a lieu à la fermeture de la réponse, pas pendant la vue"""
+        with mock.patch.object(collecteur, 'vider', wraps=collecteur.vider) as vider:
+            response = self.client.get(reverse('quittances:list'))
+        self.assertEqual(response.status_code, 200)
+        vider.assert_called()
+        self.assertTrue(PerformanceVue.objects.filter(vue='quittances:list').exists())
+
+    def test_percentiles(self):
+        """Percentiles par rang le plus proche"""
+        valeurs = list(range(1, 101))
+        self.assertEqual((percentile(valeurs, 50), percentile(valeurs, 95), percentile(valeurs, 99)), (50, 95, 99))
+        self.assertIsNone(percentile([], 50))
+
+
+class RequetesLentesTestCase(TransactionTestCase):
+    """Tests du journal des requêtes lentes"""
+
+    def test_empreinte(self):
+        """Les requêtes qui ne diffèrent que par leurs valeurs ont la même empreinte"""
+        self.assertEqual(
+            empreinte('SELECT * FROM t WHERE id IN (%s, %s) AND nom = %s LIMIT 21')[0],
+            empreinte("SELECT * FROM t WHERE id IN (%s)  AND nom = 'x' LIMIT 1")[0]
+        )
+        self.assertNotEqual(empreinte('SELECT * FROM t')[0], empreinte('SELECT * FROM u')[0])
+
+    def test_journal(self):
+        """Requêtes cumulées par empreinte, avec appelant et plan d'exécution"""
+        detecteur = DetecteurRequetesLentes(seuil_ms=0)
+        with self.assertLogs('src.requetes_lentes', 'WARNING'), connection.execute_wrapper(detecteur):
+            for telephone in ('0600000000', '0611111111'):
+                list(Locataires.objects.filter(telephone=telephone).order_by())
+        detecteur.vider()
+
+        requete = RequeteLente.objects.get(sql__contains='"telephone" = ?')
+        self.assertEqual(requete.nombre, 2)
+        self.assertEqual(requete.application, 'src')
+        self.assertTrue(requete.appelant.startswith('src.tests.test_journal:'))
+        self.assertEqual(requete.parcours_complets, 'persons_locataires')
+        self.assertEqual(requete.params, ['0600000000'])
+
+
+def calcul_long(duree):
+    """Boucle active, pour le profileur"""
+    fin = time.perf_counter() + duree
+    total = 0
+    while time.perf_counter() < fin:
+        total += 1
+    return total
+
+
+class ProfilageTestCase(TestCase):
+    """Tests du profileur par échantillonnage"""
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.dossier = Path(dossier.name)
+        reglages = override_settings(PROFILAGE_DOSSIER=self.dossier, PROFILAGE_MAX_FICHIERS=2)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+    def test_piles_repliees(self):
+        """La fonction active apparaît en haut des piles enregistrées"""
+        with Echantillonneur(intervalle_ms=1) as profil:
+            calcul_long(0.2)
+
+        self.assertGreater(profil.echantillons, 10)
+        fonction, part = profil.fonctions_couteuses(1)[0]
+        self.assertEqual(fonction, 'src.tests:calcul_long')
+        self.assertGreater(part, 0.5)
+
+        fichier = profil.enregistrer('calcul long')
+        pile, nombre = fichier.read_text().splitlines()[0].rsplit(' ', 1)
+        self.assertTrue(pile.endswith('src.tests:test_piles_repliees;src.tests:calcul_long'))
+        self.assertTrue(fichier.name.endswith('_calcul-long.folded'))
+
+    def test_conservation(self):
+        """Au-delà de PROFILAGE_MAX_FICHIERS, les plus anciens fichiers sont supprimés"""
+        for i in range(3):
+            with Echantillonneur(intervalle_ms=1) as profil:
+                calcul_long(0.02)
+            profil.enregistrer(f'profil{i}')
+            time.sleep(0.01)
+
+        self.assertEqual(sorted(f.name.split('_')[1] for f in self.dossier.iterdir()), ['profil1.folded', 'profil2.folded'])
+
+    @override_settings(PROFILAGE_TAUX=1, PROFILAGE_INTERVALLE_MS=0.5)
+    def test_requete_profilee(self):
+        """Une requête tirée au sort est profilée sous le nom de sa vue"""
+        self.client.force_login(get_user_model().objects.create_user(email='profil@exemple.fr'))
+        self.client.get(reverse('quittances:list'))
+        self.assertEqual([f.name.split('_', 1)[1] for f in self.dossier.iterdir()], ['GET_quittances-list.folded'])
+
+
+class SauvegardeTestCase(TransactionTestCase):
+    """Tests des sauvegardes (scripts/backup.py) : aller-retour complet, incrémental et media"""
+
+    def setUp(self):
+        from scripts import backup
+
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.dossier = Path(dossier.name)
+        with mock.patch.object(backup, 'PROJECT_ROOT', self.dossier):
+            self.manager = backup.DatabaseManager(chunk_size=3, workers=2)
+
+        # Les sorties console et la confirmation interactive sont neutralisées
+        for cible, valeur in (('builtins.input', 'y'), ('builtins.print', None)):
+            patch = mock.patch(cible, return_value=valeur)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def generer(self):
+        PortefeuilleGenerator(
+            proprietaires=1, immeubles=2, appartements=3, annees=1, aujourd_hui=date(2026, 10, 1)
+        ).generer()
+
+    def instantane(self):
+        """Contenu de quelques tables, comparable après restauration"""
+        from immeuble.models import Appartement
+        return {
+            'appartements': list(Appartement.objects.order_by('pk').values_list('pk', 'immeuble_id', 'numero')),
+            'paiements': list(PaiementLocataire.objects.order_by('pk').values_list('pk', 'mois', 'loyer', 'quittance')),
+            'quittances': list(Quittance.objects.order_by('pk').values_list('pk', 'numero', 'paiement')),
+            'occupation': list(OccupationMensuelle.objects.order_by('pk').values_list('immeuble', 'mois')),
+        }
+
+    def test_complete(self):
+        """Une sauvegarde complète restaurée redonne exactement le contenu sauvegardé"""
+        self.generer()
+        avant = self.instantane()
+        sauvegarde = self.manager.create_backup('complete')
+
+        Immeuble.objects.order_by('pk').first().delete()
+        PaiementLocataire.objects.update(loyer=1)
+        self.assertNotEqual(self.instantane(), avant)
+
+        # Chaque modèle est comparé au manifest (nombre et empreinte) avant validation
+        self.manager.restore_backup(sauvegarde)
+
+        self.assertEqual(self.instantane(), avant)
+        manifest = self.manager.read_manifest(sauvegarde)
+        self.assertEqual(manifest['stats']['paiements.PaiementLocataire'], len(avant['paiements']))
+        self.assertNotIn('accounts.JournalSuppression', manifest['models'])
+
+    def test_incrementale(self):
+        """Complète puis incrémentale : modifications et suppressions sont rejouées"""
+        from immeuble.models import Appartement
+
+        self.generer()
+        self.manager.create_backup('complete')
+
+        supprime = Immeuble.objects.order_by('pk').first()
+        supprime.delete()
+        appartement = Appartement.objects.order_by('pk').first()
+        appartement.numero = "Z9"
+        appartement.save()
+        Appartement.objects.create(immeuble=appartement.immeuble, numero="N1", etage=4)
+        avant = self.instantane()
+
+        incrementale = self.manager.create_backup('incrementale', incremental=True)
+        manifest = self.manager.read_manifest(incrementale)
+        self.assertEqual(manifest['parent'], 'complete')
+        self.assertGreater(manifest['suppressions']['count'], 0)
+        # Table dérivée : toujours complète
+        self.assertEqual(manifest['stats']['immeuble.OccupationMensuelle'], len(avant['occupation']))
+
+        Appartement.objects.create(immeuble=appartement.immeuble, numero="N2", etage=5)
+        Immeuble.objects.all().delete()
+
+        self.manager.restore_backup(incrementale)
+
+        self.assertEqual(self.instantane(), avant)
+        self.assertFalse(Immeuble.objects.filter(pk=supprime.pk).exists())
+        self.assertEqual(Appartement.objects.get(pk=appartement.pk).numero, "Z9")
+
+    def test_ordre_des_cles_etrangeres(self):
+        """Chaque modèle est restauré après les modèles que ses clés obligatoires référencent"""
+        from scripts.backup import get_dependances
+
+        ordre = {model: rang for rang, model in enumerate(self.manager.models)}
+        for model in self.manager.models:
+            for cible, obligatoire in get_dependances(model, set(ordre)).items():
+                if obligatoire:
+                    self.assertLess(ordre[cible], ordre[model], f"{cible._meta.label} -> {model._meta.label}")
+
+        labels = self.manager.restore_order
+        self.assertLess(labels.index('immeuble.Immeuble'), labels.index('immeuble.Appartement'))
+        self.assertLess(labels.index('immeuble.Appartement'), labels.index('contrats.Contrats'))
+        self.assertLess(labels.index('contrats.Contrats'), labels.index('contrats.ContratLocataire'))
+        # Cycle Quittance.paiement <-> PaiementLocataire.quittance rompu sur une clé facultative
+        self.assertIn('quittances.Quittance', labels)
+        self.assertIn('paiements.PaiementLocataire', labels)
+
+    def test_media_dedupliques(self):
+        """Un même contenu n'est stocké qu'une fois, et les fichiers modifiés sont restaurés"""
+        media = self.dossier / 'media'
+        (media / 'quittances').mkdir(parents=True)
+        (media / 'quittances' / 'q1.pdf').write_bytes(b'%PDF quittance')
+        (media / 'quittances' / 'q2.pdf').write_bytes(b'%PDF quittance')
+        (media / 'contrats.pdf').write_bytes(b'%PDF contrat')
+
+        objets = self.dossier / 'backups' / 'objets'
+        with override_settings(MEDIA_ROOT=media):
+            premier = self.manager.create_media_backup('media_1')
+            self.assertEqual(len(list(objets.glob('*/*'))), 2)
+
+            # Nouveau point : seul le contenu inédit est ajouté au magasin
+            (media / 'quittances' / 'q3.pdf').write_bytes(b'%PDF quittance')
+            (media / 'factures.pdf').write_bytes(b'%PDF facture')
+            self.manager.create_media_backup('media_2')
+            self.assertEqual(len(list(objets.glob('*/*'))), 3)
+
+            (media / 'contrats.pdf').write_bytes(b'abime')
+            (media / 'quittances' / 'q1.pdf').unlink()
+            self.manager.restore_backup(premier, purger=True)
+
+        self.assertEqual((media / 'contrats.pdf').read_bytes(), b'%PDF contrat')
+        self.assertEqual((media / 'quittances' / 'q1.pdf').read_bytes(), b'%PDF quittance')
+        self.assertFalse((media / 'factures.pdf').exists())
+        self.assertEqual(len(self.manager.read_manifest(premier)['fichiers']), 3)
@@ -26,6 +26,7 @@ urlpatterns = [
     path('contrats/', include('contrats.urls')),
     path('paiements/', include('paiements.urls')),
     path('quittances/', include('quittances.urls')),
+    path('portail/', include('portail.urls')),
 
     path('users/create/', create_user_view, name='create_user'),
 
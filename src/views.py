@@ -9,10 +9,14 @@ from django.db.models import Count, Sum, Q, Avg
 from django.utils import timezone
 from datetime import date, timedelta, datetime
 from immeuble.models import Immeuble, Appartement
+from immeuble.occupation import OccupationManager
 from persons.models import Locataires
 from contrats.models import Contrats
 from paiements.models import PaiementLocataire
+from paiements.statistiques import ajouter_mois
 from quittances.models import Quittance
+from .db import derniers_par
+from .routers import LectureReplicaMixin
 
 
 def home(request):
@@ -20,18 +24,19 @@ def home(request):
 
 
 # @method_decorator(login_required, name='dispatch')
-class DashboardView(TemplateView):
-    """Tableau de bord principal"""
+class DashboardView(LectureReplicaMixin, TemplateView):
+    """Tableau de bord principal (lu sur la réplique si elle est configurée)"""
     template_name = 'dashboard.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Statistiques générales
+        # Statistiques générales (occupation déduite des contrats en cours)
+        aujourd_hui = date.today()
         context.update({
             'total_immeubles': Immeuble.objects.count(),
             'total_appartements': Appartement.objects.count(),
-            'appartements_loues': Appartement.objects.filter(loue=True).count(),
+            'appartements_loues': OccupationManager.appartements_occupes(aujourd_hui),
             'total_locataires': Locataires.objects.filter(actif=True).count(),
         })
 
@@ -43,8 +48,11 @@ class DashboardView(TemplateView):
         else:
             context['taux_occupation'] = 0
 
+        # Taux d'occupation des douze derniers mois (jours occupés / jours disponibles)
+        mois_actuel = aujourd_hui.replace(day=1)
+        context['taux_occupation_annuel'] = OccupationManager.taux_global(ajouter_mois(mois_actuel, -11), mois_actuel)
+
         # Revenus du mois
-        mois_actuel = date.today().replace(day=1)
         revenus_mois = PaiementLocataire.objects.filter(
             mois=mois_actuel,
             valide=True
@@ -91,6 +99,15 @@ class DashboardView(TemplateView):
             'locataires'  # ✅ ManyToMany nécessite prefetch_related
         ).distinct()
 
+        # Dernier paiement de chaque contrat en une requête (DISTINCT ON sous PostgreSQL)
+        derniers_paiements = {
+            paiement.contrat_id: paiement
+            for paiement in derniers_par(
+                PaiementLocataire.objects.filter(contrat__in=contrats_sans_paiement.values('pk')),
+                'contrat', '-mois', '-id'
+            )
+        }
+
         retards = []
         for contrat in contrats_sans_paiement:
             # ✅ CORRECTION : Vérifier qu'il y a au moins un locataire
@@ -100,7 +117,8 @@ class DashboardView(TemplateView):
                     retards.append({
                         'contrat': contrat,
                         'jours_retard': jours_retard,
-                        'montant_du': contrat.loyer_total
+                        'montant_du': contrat.loyer_total,
+                        'dernier_paiement': derniers_paiements.get(contrat.id)
                     })
 
         return sorted(retards, key=lambda x: x['jours_retard'], reverse=True)[:5]
@@ -197,8 +215,20 @@ class DashboardView(TemplateView):
         return list(reversed(donnees))
 
     def get_repartition_immeubles(self):
-        """Répartition des appartements par immeuble"""
-        return Immeuble.objects.annotate(
-            nb_appartements=Count('appartements'),
-            nb_loues=Count('appartements', filter=Q(appartements__loue=True))
-        ).values('nom', 'nb_appartements', 'nb_loues')
\ No newline at end of file
+        """Répartition des appartements par immeuble, avec le taux d'occupation des douze derniers mois"""
+        mois_actuel = date.today().replace(day=1)
+        taux = OccupationManager.taux(ajouter_mois(mois_actuel, -11), mois_actuel)
+        occupes = dict(
+            OccupationManager.contrats_en_cours(date.today())
+            .values('appartement__immeuble').annotate(nombre=Count('appartement', distinct=True))
+            .values_list('appartement__immeuble', 'nombre')
+        )
+        return [
+            {
+                'nom': immeuble['nom'],
+                'nb_appartements': immeuble['nb_appartements'],
+                'nb_loues': occupes.get(immeuble['id'], 0),
+                'taux_occupation': taux.get(immeuble['id'], 0),
+            }
+            for immeuble in Immeuble.objects.annotate(nb_appartements=Count('appartements')).values('id', 'nom', 'nb_appartements')
+        ]
\ No newline at end of file